@@ -2,11 +2,12 @@ from __future__ import annotations
 
 from functools import wraps
 
-from flask import Blueprint, abort, current_app, flash, redirect, render_template, request, url_for
+from flask import Blueprint, Response, abort, current_app, flash, redirect, render_template, request, send_file, url_for
 from flask_login import current_user, login_required
 from werkzeug.security import generate_password_hash
 
 from models import User, db
+from services.profiling import get_profiling_controller
 from services.usage_metrics import monthly_usage_summary
 
 
@@ -67,7 +68,7 @@ def users_create():
 def dashboard():
     users = User.query.order_by(User.created_at.asc()).all()
     usage = _monthly_usage()
-    return render_template("admin_dashboard.html", users=users, usage=usage)
+    return render_template("admin_dashboard.html", users=users, usage=usage, profiling=_profiling_context())
 
 
 @admin_bp.route("/users/<int:user_id>/delete", methods=["POST"])
@@ -94,6 +95,95 @@ def users_delete(user_id: int):
     return redirect(url_for("admin.dashboard"))
 
 
+@admin_bp.route("/profiling/start", methods=["POST"])
+@admin_required
+def profiling_start():
+    controller = get_profiling_controller(current_app)
+    if controller is None:
+        flash("Profiling is disabled.", "error")
+        return redirect(url_for("admin.dashboard"))
+
+    endpoint = (request.form.get("endpoint") or "").strip()
+    if endpoint and endpoint not in _profilable_endpoints():
+        flash("Unknown endpoint.", "error")
+        return redirect(url_for("admin.dashboard"))
+
+    try:
+        max_requests = int(request.form.get("max_requests") or 20)
+        duration_seconds = float(request.form.get("duration_seconds") or 300)
+        sample_rate = float(request.form.get("sample_rate") or 1.0)
+    except ValueError:
+        flash("Profiling limits must be numeric.", "error")
+        return redirect(url_for("admin.dashboard"))
+
+    max_requests = max(1, min(max_requests, int(current_app.config.get("PROFILING_MAX_REQUESTS", 200))))
+    duration_seconds = max(1.0, min(duration_seconds, float(current_app.config.get("PROFILING_MAX_SECONDS", 3600))))
+    session = controller.start(
+        endpoint=endpoint,
+        max_requests=max_requests,
+        duration_seconds=duration_seconds,
+        sample_rate=sample_rate,
+        trace_memory=request.form.get("trace_memory") == "on",
+        keep_sessions=int(current_app.config.get("PROFILING_KEEP_SESSIONS", 10)),
+    )
+    flash(f"Profiling session {session.session_id} started.", "success")
+    return redirect(url_for("admin.dashboard"))
+
+
+@admin_bp.route("/profiling/stop", methods=["POST"])
+@admin_required
+def profiling_stop():
+    controller = get_profiling_controller(current_app)
+    if controller is None or controller.active_session() is None:
+        flash("No profiling session is running.", "error")
+        return redirect(url_for("admin.dashboard"))
+
+    controller.stop()
+    flash("Profiling session stopped.", "success")
+    return redirect(url_for("admin.dashboard"))
+
+
+@admin_bp.route("/profiling/<session_id>/report.txt", methods=["GET"])
+@admin_required
+def profiling_report(session_id: str):
+    controller = get_profiling_controller(current_app)
+    if controller is None or controller.session_file(session_id, "requests.jsonl") is None:
+        abort(404)
+
+    sort = request.args.get("sort", "cumulative")
+    if sort not in ("cumulative", "tottime", "calls"):
+        sort = "cumulative"
+    report = controller.combined_report(session_id, sort=sort)
+    if report is None:
+        abort(404)
+    return Response(report, mimetype="text/plain")
+
+
+@admin_bp.route("/profiling/<session_id>/files/<filename>", methods=["GET"])
+@admin_required
+def profiling_download(session_id: str, filename: str):
+    controller = get_profiling_controller(current_app)
+    path = controller.session_file(session_id, filename) if controller is not None else None
+    if path is None or filename == "requests.jsonl":
+        abort(404)
+    return send_file(path, as_attachment=True, download_name=f"{session_id}-{filename}")
+
+
+def _profiling_context() -> dict | None:
+    controller = get_profiling_controller(current_app)
+    if controller is None:
+        return None
+    return {
+        "active": controller.active_session(),
+        "sessions": controller.list_sessions(),
+        "endpoints": _profilable_endpoints(),
+    }
+
+
+def _profilable_endpoints() -> list[str]:
+    return sorted({rule.endpoint for rule in current_app.url_map.iter_rules() if rule.endpoint != "static"})
+
+
 def _monthly_usage() -> dict[str, int | float]:
     quota_chars = int(current_app.config.get("MONTHLY_QUOTA_CHARS", 1_000_000))
     summary = monthly_usage_summary(quota_chars=quota_chars)
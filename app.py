@@ -13,10 +13,19 @@ from admin import admin_bp
 from auth import auth_bp
 from models import User, db
 from routes_admin_api import admin_api_bp
+from routes_audio import audio_bp
 from routes_dictionary import dictionary_bp
+from routes_metrics import metrics_bp
 from routes_translate import translate_bp
 from routes_tts import tts_bp
 from routes_user import user_bp
+from services.audio_codec import AUDIO_ENCODINGS
+from services.audio_eviction import EVICTION_POLICIES
+from services.audio_janitor import init_audio_janitor, janitor_from_config
+from services.dictionary_manager import init_dictionary_manager
+from services.metrics import init_metrics
+from services.profiling import init_profiling
+from services.request_timing import init_request_timing
 from services.runtime_config import apply_runtime_config
 from services.tts_google import GoogleTTSWrapper
 
@@ -59,6 +68,19 @@ def create_app() -> Flask:
 
     app.config["SECRET_KEY"] = secret_key or "dev-secret-key"
     apply_runtime_config(app.config, flask_env=flask_env)
+    if app.config["TTS_AUDIO_ENCODING"] not in AUDIO_ENCODINGS:
+        raise RuntimeError(f"TTS_AUDIO_ENCODING must be one of: {', '.join(AUDIO_ENCODINGS)}.")
+    if app.config["AUDIO_EVICTION_POLICY"] not in EVICTION_POLICIES:
+        raise RuntimeError(f"AUDIO_EVICTION_POLICY must be one of: {', '.join(EVICTION_POLICIES)}.")
+    if app.config["AUDIO_STORAGE_BACKEND"] not in ("filesystem", "s3"):
+        raise RuntimeError("AUDIO_STORAGE_BACKEND must be one of: filesystem, s3.")
+    if app.config["AUDIO_STORAGE_BACKEND"] == "s3" and not app.config["AUDIO_S3_BUCKET"]:
+        raise RuntimeError("AUDIO_S3_BUCKET is required when AUDIO_STORAGE_BACKEND=s3.")
+    if app.config["AUDIO_STORAGE_BACKEND"] == "s3" and app.config["AUDIO_EVICTION_POLICY"] != "lru":
+        app.logger.warning(
+            "AUDIO_EVICTION_POLICY=%s is ignored with AUDIO_STORAGE_BACKEND=s3; the shared bucket evicts by LRU.",
+            app.config["AUDIO_EVICTION_POLICY"],
+        )
 
     sqlite_path = _build_sqlite_path(app)
     app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{sqlite_path}"
@@ -66,6 +88,11 @@ def create_app() -> Flask:
 
     db.init_app(app)
     login_manager.init_app(app)
+    init_request_timing(app)
+    init_metrics(app)
+    init_profiling(app)
+    init_audio_janitor(app)
+    init_dictionary_manager(app)
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(admin_bp)
@@ -74,6 +101,8 @@ def create_app() -> Flask:
     app.register_blueprint(tts_bp)
     app.register_blueprint(translate_bp)
     app.register_blueprint(dictionary_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(audio_bp)
 
     @app.route("/")
     @login_required
@@ -93,6 +122,7 @@ def create_app() -> Flask:
             voice_catalog=voice_catalog,
             max_input_chars=flask_app.config["MAX_INPUT_CHARS"],
             max_translation_input_chars=flask_app.config["MAX_TRANSLATION_INPUT_CHARS"],
+            max_dictionary_alternatives=flask_app.config["MAX_DICTIONARY_ALTERNATIVES"],
         )
 
     @app.route("/healthz")
@@ -121,6 +151,16 @@ def create_app() -> Flask:
             db.session.commit()
             click.echo(f"Admin user '{username}' created.")
 
+    @app.cli.command("cleanup-audio")
+    def cleanup_audio() -> None:
+        """Run one audio eviction pass (for cron when the janitor thread is disabled)."""
+        result = janitor_from_config(app).run_once()
+        click.echo(
+            f"Deleted {result['deleted_files']} files; "
+            f"{result['remaining_files']} files / {result['remaining_bytes']} bytes remain. "
+            f"Cache hit ratio {result['hit_ratio']:.1%} ({result['hits']} hits / {result['misses']} misses)."
+        )
+
     with app.app_context():
         db.create_all()
         _enable_sqlite_pragmas(app)
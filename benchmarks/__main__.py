@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from datetime import UTC, datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.cases import CASES, SCALES
+from benchmarks.runner import compare_reports, result_key, run_suite
+
+
+DEFAULT_OUT_DIR = ROOT / "benchmarks" / "results"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run hot-path micro-benchmarks and write results as JSON.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="full", help="Input size preset")
+    parser.add_argument(
+        "--only",
+        action="append",
+        default=[],
+        help=f"Glob of case names to run (repeatable). Cases: {', '.join(CASES)}",
+    )
+    parser.add_argument("--out", help="Output JSON path (default: benchmarks/results/bench-<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    def progress(result) -> None:
+        print(
+            f"{result_key(result.to_dict()):<70} median={result.median_seconds * 1000:10.3f}ms "
+            f"peak_alloc={result.peak_alloc_bytes / 1024:10.1f}KiB"
+            + (f" bytes_per_term={result.extra['bytes_per_term']:.1f}" if "bytes_per_term" in result.extra else ""),
+            flush=True,
+        )
+
+    report = run_suite(args.scale, only=args.only or None, progress=progress)
+
+    out_path = Path(args.out) if args.out else DEFAULT_OUT_DIR / f"bench-{datetime.now(UTC):%Y%m%dT%H%M%SZ}.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    print(f"wrote {out_path}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        for row in compare_reports(baseline, report):
+            print(f"{row['key']:<70} x{row['ratio']:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
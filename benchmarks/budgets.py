@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.harness import BenchmarkResult, measure
+from benchmarks.synthetic import cantonese_passage, dictionary_terms, populate_audio_dir, write_dictionary
+from services.audio_store import AudioStore
+from services.dictionary_loader import DictionaryLoader
+from services.dictionary_lookup import DictionaryLookupService
+from services.ssml_builder import SSMLBuilder, Token
+
+
+BASELINES_PATH = ROOT / "benchmarks" / "baselines.json"
+
+# A case may get this much slower (after calibration) or allocate this much more before failing.
+TIME_TOLERANCE = float(os.getenv("PERF_TIME_TOLERANCE", "1.6"))
+ALLOC_TOLERANCE = float(os.getenv("PERF_ALLOC_TOLERANCE", "1.3"))
+ALLOC_SLACK_BYTES = 32 * 1024
+
+
+@dataclass(frozen=True, slots=True)
+class BudgetCase:
+    """A hot path measured at several input sizes.
+
+    `make(size)` returns `(fn, setup)`; `max_exponent` bounds the log-log slope of
+    time against size (1.0 is linear, 0.0 is constant).
+    """
+
+    name: str
+    sizes: tuple[int, ...]
+    make: Callable[[int], tuple[Callable[[], Any], Callable[[], Any] | None]]
+    max_exponent: float
+
+
+class BudgetFixtures:
+    def __init__(self, workdir: Path) -> None:
+        self.workdir = workdir
+        self.builder = SSMLBuilder()
+        self._lookup: DictionaryLookupService | None = None
+        self._terms: list[str] | None = None
+
+    def plain_tokens(self, chars: int) -> list[Token]:
+        # Chunking never reads Jyutping, so skip pycantonese to keep the gate fast.
+        text = cantonese_passage(chars, seed=chars)
+        return [Token(token_id=idx, char=char, raw_index=idx, jyutping="") for idx, char in enumerate(text)]
+
+    def terms(self) -> list[str]:
+        if self._terms is None:
+            self._terms = dictionary_terms(20_000, seed=7)
+        return self._terms
+
+    def lookup_service(self) -> DictionaryLookupService:
+        if self._lookup is None:
+            path = write_dictionary(self.workdir / "budget-dictionary.u8", self.terms(), seed=7)
+            self._lookup = DictionaryLookupService(DictionaryLoader().load_file(path, source="synthetic"))
+        return self._lookup
+
+
+def budget_cases(fixtures: BudgetFixtures) -> list[BudgetCase]:
+    builder = fixtures.builder
+
+    def token_chunks(size: int):
+        tokens = fixtures.plain_tokens(size)
+        return (lambda: builder.build_token_chunks(tokens, mode="full")), None
+
+    def text_chunks(size: int):
+        tokens = fixtures.plain_tokens(size)
+        return (lambda: builder.build_text_chunks(tokens, target_max_bytes=350, hard_max_bytes=700)), None
+
+    def tokenize(size: int):
+        text = cantonese_passage(size, seed=size)
+        return (lambda: builder.build_tokens(text)), None
+
+    def lookup_end(size: int):
+        service = fixtures.lookup_service()
+        text = cantonese_passage(size, seed=size + 1, vocabulary=fixtures.terms()[:5_000])
+        return (lambda: service.lookup_at(text, len(text) - 1)), None
+
+    def cleanup_steady(size: int):
+        root = fixtures.workdir / f"steady_{size}"
+        total = populate_audio_dir(root, size)
+        return (lambda: AudioStore(str(root)).cleanup(ttl_hours=10**6, max_files=size * 2, max_bytes=total * 2)), None
+
+    def cleanup_evict(size: int):
+        root = fixtures.workdir / f"evict_{size}"
+        evict = max(1, size // 10)
+
+        def setup() -> None:
+            shutil.rmtree(root, ignore_errors=True)
+            populate_audio_dir(root, size)
+            AudioStore(str(root)).rebuild_index()
+
+        return (lambda: AudioStore(str(root)).cleanup(ttl_hours=10**6, max_files=size - evict, max_bytes=10**12)), setup
+
+    return [
+        BudgetCase("chunking.build_token_chunks", (1_000, 4_000, 12_000), token_chunks, max_exponent=1.25),
+        BudgetCase("chunking.build_text_chunks", (1_000, 4_000, 12_000), text_chunks, max_exponent=1.25),
+        BudgetCase("tokenization.build_tokens", (500, 2_000), tokenize, max_exponent=1.25),
+        # The prefix index only probes starts within the longest term of the tap: O(1) in document length.
+        BudgetCase("dictionary.lookup_at_end", (1_000, 4_000, 12_000), lookup_end, max_exponent=0.3),
+        # The indexed store touches only what it evicts: steady state is O(1), eviction O(k log n).
+        BudgetCase("audio.cleanup_steady", (300, 1_200), cleanup_steady, max_exponent=0.5),
+        BudgetCase("audio.cleanup_evict", (300, 1_200), cleanup_evict, max_exponent=1.3),
+    ]
+
+
+def calibrate(repeats: int = 7) -> float:
+    """Best-of-N seconds for a fixed pure-Python workload; timings are stored relative to it."""
+
+    def workload() -> int:
+        table: dict[str, int] = {}
+        for idx in range(20_000):
+            key = f"k{idx % 997}"
+            table[key] = table.get(key, 0) + idx * idx
+        return sum(table.values())
+
+    return measure("calibration", workload, repeats=repeats, track_allocations=False).best_seconds
+
+
+def run_case(case: BudgetCase, repeats: int = 7) -> list[BenchmarkResult]:
+    results = []
+    for size in case.sizes:
+        fn, setup = case.make(size)
+        results.append(measure(case.name, fn, params={"size": size}, setup=setup, repeats=repeats))
+    return results
+
+
+def run_calibrated(case: BudgetCase) -> tuple[list[BenchmarkResult], float]:
+    """Run `case` between two calibrations and keep the faster one.
+
+    Shared machines have slow phases; bracketing the case keeps a slow phase that
+    only hits one calibration from skewing the normalized times.
+    """
+    before = calibrate()
+    results = run_case(case)
+    return results, min(before, calibrate())
+
+
+def scaling_exponent(results: list[BenchmarkResult]) -> float:
+    """Least-squares slope of log(time) against log(size)."""
+    points = [(math.log(item.params["size"]), math.log(max(item.best_seconds, 1e-9))) for item in results]
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    denominator = sum((x - mean_x) ** 2 for x, _ in points)
+    if denominator == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / denominator
+
+
+def check_case(case: BudgetCase, results: list[BenchmarkResult], calibration: float, baselines: dict) -> list[str]:
+    """Return human-readable budget violations (empty when within budget)."""
+    violations: list[str] = []
+    stored = baselines.get("cases", {}).get(case.name, {})
+
+    exponent = scaling_exponent(results)
+    if exponent > case.max_exponent:
+        violations.append(f"{case.name}: scales as n^{exponent:.2f}, budget is n^{case.max_exponent:.2f}")
+
+    for result in results:
+        size_key = str(result.params["size"])
+        baseline = stored.get(size_key)
+        if baseline is None:
+            violations.append(f"{case.name}[size={size_key}]: no stored baseline (run python -m benchmarks.budgets --update)")
+            continue
+
+        normalized = result.best_seconds / calibration
+        allowed = baseline["normalized_time"] * TIME_TOLERANCE
+        if normalized > allowed:
+            violations.append(
+                f"{case.name}[size={size_key}]: {normalized:.2f} calibration units, "
+                f"baseline {baseline['normalized_time']:.2f} (limit {allowed:.2f})"
+            )
+
+        allowed_alloc = baseline["peak_alloc_bytes"] * ALLOC_TOLERANCE + ALLOC_SLACK_BYTES
+        if result.peak_alloc_bytes > allowed_alloc:
+            violations.append(
+                f"{case.name}[size={size_key}]: peak allocation {result.peak_alloc_bytes} B, "
+                f"baseline {baseline['peak_alloc_bytes']} B (limit {int(allowed_alloc)} B)"
+            )
+    return violations
+
+
+def load_baselines(path: Path = BASELINES_PATH) -> dict:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def baseline_entry(results: list[BenchmarkResult], calibration: float) -> dict[str, dict[str, float]]:
+    return {
+        str(result.params["size"]): {
+            "normalized_time": round(result.best_seconds / calibration, 4),
+            "peak_alloc_bytes": result.peak_alloc_bytes,
+        }
+        for result in results
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check hot-path performance budgets against stored baselines.")
+    parser.add_argument("--update", action="store_true", help="Rewrite stored baselines from this run")
+    parser.add_argument("--only", action="append", default=[], help="Case name prefix to run (repeatable)")
+    args = parser.parse_args()
+
+    baselines = load_baselines()
+    failures: list[str] = []
+    with tempfile.TemporaryDirectory(prefix="canto-budgets-") as tmp:
+        fixtures = BudgetFixtures(Path(tmp))
+        cases = [case for case in budget_cases(fixtures) if not args.only or case.name.startswith(tuple(args.only))]
+        for case in cases:
+            results, calibration = run_calibrated(case)
+            exponent = scaling_exponent(results)
+            print(f"{case.name:<32} exponent={exponent:5.2f} (max {case.max_exponent:.2f})", flush=True)
+            if args.update:
+                baselines.setdefault("cases", {})[case.name] = baseline_entry(results, calibration)
+            else:
+                failures.extend(check_case(case, results, calibration, baselines))
+
+    if args.update:
+        BASELINES_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"wrote {BASELINES_PATH}")
+        return 0
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
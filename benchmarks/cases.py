@@ -0,0 +1,382 @@
+from __future__ import annotations
+
+import itertools
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator
+
+from flask import Flask, jsonify
+
+from benchmarks.harness import BenchmarkResult, measure
+from benchmarks.synthetic import (
+    cantonese_passage,
+    dictionary_terms,
+    populate_audio_dir,
+    write_dictionary,
+)
+from services.audio_store import AudioStore
+from services.dictionary_compact import CompactDictionary, dictionary_memory_report
+from services.dictionary_compiled import CompiledDictionary, compile_dictionary
+from services.dictionary_loader import DictionaryLoader
+from services.dictionary_lookup import DictionaryLookupService
+from services.dictionary_search import DictionaryPrefixIndex, EnglishReverseIndex, JyutpingReverseIndex
+from services.ssml_builder import SSMLBuilder
+
+
+@dataclass(frozen=True, slots=True)
+class Scale:
+    passage_chars: tuple[int, ...] = (1_000, 4_000, 12_000)
+    dictionary_terms: int = 120_000
+    audio_files: tuple[int, ...] = (1_000, 4_000)
+    repeats: int = 5
+
+
+SCALES = {
+    "full": Scale(),
+    "quick": Scale(passage_chars=(1_000, 4_000), dictionary_terms=20_000, audio_files=(300, 1_000), repeats=3),
+}
+
+LOOKUP_POSITIONS = {"start": 0.0, "middle": 0.5, "end": 1.0}
+
+
+class BenchmarkContext:
+    """Lazily built, shared fixtures so each input is generated once per run."""
+
+    def __init__(self, scale: Scale, workdir: Path) -> None:
+        self.scale = scale
+        self.workdir = workdir
+        self.builder = SSMLBuilder()
+        self._passages: dict[int, str] = {}
+        self._terms: list[str] | None = None
+        self._dictionary_path: Path | None = None
+        self._lookup: DictionaryLookupService | None = None
+        self._app: Flask | None = None
+
+    def passage(self, chars: int) -> str:
+        if chars not in self._passages:
+            self._passages[chars] = cantonese_passage(chars, seed=chars)
+        return self._passages[chars]
+
+    def dictionary_passage(self, chars: int) -> str:
+        # Reader text assembled from dictionary terms so taps resolve to real matches.
+        return cantonese_passage(chars, seed=chars + 1, vocabulary=self.terms()[:5_000])
+
+    def terms(self) -> list[str]:
+        if self._terms is None:
+            self._terms = dictionary_terms(self.scale.dictionary_terms, seed=7)
+        return self._terms
+
+    def dictionary_path(self) -> Path:
+        if self._dictionary_path is None:
+            self._dictionary_path = write_dictionary(self.workdir / "dictionary.u8", self.terms(), seed=7)
+        return self._dictionary_path
+
+    def lookup_service(self) -> DictionaryLookupService:
+        if self._lookup is None:
+            entries = DictionaryLoader().load_file(self.dictionary_path(), source="synthetic")
+            self._lookup = DictionaryLookupService(entries)
+        return self._lookup
+
+    def app(self) -> Flask:
+        if self._app is None:
+            self._app = Flask("benchmarks")
+        return self._app
+
+
+CaseFn = Callable[[BenchmarkContext], Iterator[BenchmarkResult]]
+CASES: dict[str, CaseFn] = {}
+
+
+def case(name: str) -> Callable[[CaseFn], CaseFn]:
+    def register(fn: CaseFn) -> CaseFn:
+        CASES[name] = fn
+        return fn
+
+    return register
+
+
+@case("ssml.build_tokens")
+def bench_build_tokens(ctx: BenchmarkContext) -> Iterator[BenchmarkResult]:
+    for chars in ctx.scale.passage_chars:
+        text = ctx.passage(chars)
+        yield measure(
+            "ssml.build_tokens",
+            lambda: ctx.builder.build_tokens(text),
+            params={"chars": chars},
+            repeats=ctx.scale.repeats,
+        )
+
+
+@case("ssml.attach_jyutping")
+def bench_attach_jyutping(ctx: BenchmarkContext) -> Iterator[BenchmarkResult]:
+    for chars in ctx.scale.passage_chars:
+        tokens = ctx.builder.build_tokens(ctx.passage(chars))
+        yield measure(
+            "ssml.attach_jyutping",
+            lambda: ctx.builder.attach_jyutping(tokens),
+            params={"chars": chars},
+            repeats=ctx.scale.repeats,
+        )
+
+
+@case("ssml.build_token_chunks")
+def bench_build_token_chunks(ctx: BenchmarkContext) -> Iterator[BenchmarkResult]:
+    for mode in ("full", "reduced"):
+        for chars in ctx.scale.passage_chars:
+            tokens = ctx.builder.build_tokens(ctx.passage(chars))
+            yield measure(
+                "ssml.build_token_chunks",
+                lambda: ctx.builder.build_token_chunks(tokens, mode=mode),
+                params={"chars": chars, "mode": mode},
+                repeats=ctx.scale.repeats,
+            )
+
+
+@case("ssml.build_text_chunks")
+def bench_build_text_chunks(ctx: BenchmarkContext) -> Iterator[BenchmarkResult]:
+    for chars in ctx.scale.passage_chars:
+        tokens = ctx.builder.build_tokens(ctx.passage(chars))
+        # HQ mode chunk budgets (HQ_TEXT_TARGET_MAX_BYTES / HQ_TEXT_HARD_MAX_BYTES).
+        yield measure(
+            "ssml.build_text_chunks",
+            lambda: ctx.builder.build_text_chunks(tokens, target_max_bytes=350, hard_max_bytes=700),
+            params={"chars": chars},
+            repeats=ctx.scale.repeats,
+        )
+
+
+@case("ssml.build_ssml_for_chunk")
+def bench_build_ssml_for_chunk(ctx: BenchmarkContext) -> Iterator[BenchmarkResult]:
+    for chars in ctx.scale.passage_chars:
+        tokens = ctx.builder.build_tokens(ctx.passage(chars))
+        chunks = ctx.builder.build_token_chunks(tokens, mode="full")
+
+        def build_all() -> list:
+            return [ctx.builder.build_ssml_for_chunk(chunk, mode="full") for chunk in chunks]
+
+        yield measure(
+            "ssml.build_ssml_for_chunk",
+            build_all,
+            params={"chars": chars, "chunks": len(chunks)},
+            repeats=ctx.scale.repeats,
+        )
+
+
+@case("dictionary.load_file")
+def bench_load_file(ctx: BenchmarkContext) -> Iterator[BenchmarkResult]:
+    path = ctx.dictionary_path()
+    loader = DictionaryLoader()
+    yield measure(
+        "dictionary.load_file",
+        lambda: loader.load_file(path, source="synthetic"),
+        params={"terms": ctx.scale.dictionary_terms},
+        repeats=min(3, ctx.scale.repeats),
+        min_time=0.0,
+    )
+
+
+@case("dictionary.memory")
+def bench_dictionary_memory(ctx: BenchmarkContext) -> Iterator[BenchmarkResult]:
+    # Build time of each in-process representation, with its deep size in `extra`.
+    path = ctx.dictionary_path()
+    loader = DictionaryLoader()
+
+    def build_compact() -> CompactDictionary:
+        compact = CompactDictionary()
+        compact.extend(loader.iter_file(path, source="synthetic"))
+        compact.freeze()
+        return compact
+
+    for representation, build in (
+        ("dict", lambda: loader.load_file(path, source="synthetic")),
+        ("compact", build_compact),
+    ):
+        result = measure(
+            "dictionary.memory",
+            build,
+            params={"representation": representation, "terms": ctx.scale.dictionary_terms},
+            repeats=min(3, ctx.scale.repeats),
+            min_time=0.0,
+        )
+        result.extra.update(dictionary_memory_report(build()).to_dict())
+        yield result
+
+
+@case("dictionary.open_compiled")
+def bench_open_compiled(ctx: BenchmarkContext) -> Iterator[BenchmarkResult]:
+    path = ctx.workdir / "dictionary.bin"
+    compile_dictionary(DictionaryLoader().load_file(ctx.dictionary_path(), source="synthetic"), path)
+
+    def open_and_lookup() -> None:
+        compiled = CompiledDictionary(path)
+        try:
+            DictionaryLookupService.from_compiled(compiled).lookup_at(ctx.dictionary_passage(1_000), 500)
+        finally:
+            compiled.close()
+
+    yield measure(
+        "dictionary.open_compiled",
+        open_and_lookup,
+        params={"terms": ctx.scale.dictionary_terms},
+        repeats=ctx.scale.repeats,
+    )
+
+
+@case("dictionary.prefix_search")
+def bench_prefix_search(ctx: BenchmarkContext) -> Iterator[BenchmarkResult]:
+    # One autocomplete page per call. "cold" cycles through more prefixes than the page
+    # cache holds, so every call searches; "cached" repeats a single prefix.
+    path = ctx.workdir / "dictionary.bin"
+    entries = DictionaryLoader().load_file(ctx.dictionary_path(), source="synthetic")
+    if not path.exists():
+        compile_dictionary(entries, path)
+    prefixes = sorted({term[:length] for term in ctx.terms() for length in (1, 2)})[:4_096]
+    compiled = CompiledDictionary(path)
+    try:
+        for representation, index in (
+            ("compact", DictionaryPrefixIndex(CompactDictionary.from_entries(entries))),
+            ("compiled", DictionaryPrefixIndex(compiled)),
+        ):
+            queries = itertools.cycle(prefixes)
+            yield measure(
+                "dictionary.prefix_search",
+                lambda: index.search(next(queries), limit=10),
+                params={"representation": representation, "cache": "cold", "terms": ctx.scale.dictionary_terms},
+                repeats=ctx.scale.repeats,
+            )
+            yield measure(
+                "dictionary.prefix_search",
+                lambda: index.search(prefixes[0], limit=10),
+                params={"representation": representation, "cache": "cached", "terms": ctx.scale.dictionary_terms},
+                repeats=ctx.scale.repeats,
+            )
+    finally:
+        compiled.close()
+
+
+@case("dictionary.reverse_search")
+def bench_reverse_search(ctx: BenchmarkContext) -> Iterator[BenchmarkResult]:
+    # Building both reverse indexes (once per dictionary load), then one page per call at
+    # moving offsets so the page cache never answers. Synthetic readings are "j1".."j6"
+    # and definitions "meaning N", so every token posts a large share of all terms: a
+    # worst case for run lengths and intersections.
+    entries = DictionaryLoader().load_file(ctx.dictionary_path(), source="synthetic")
+    terms = DictionaryPrefixIndex(CompactDictionary.from_entries(entries))
+    yield measure(
+        "dictionary.reverse_search",
+        lambda: (JyutpingReverseIndex(terms), EnglishReverseIndex(terms)),
+        params={"stage": "build", "terms": ctx.scale.dictionary_terms},
+        repeats=min(3, ctx.scale.repeats),
+        min_time=0.0,
+    )
+    indexes = {"jyutping": JyutpingReverseIndex(terms), "english": EnglishReverseIndex(terms)}
+    for mode, query in (("jyutping", "j3"), ("jyutping", "j"), ("jyutping", "j1 j2"), ("english", "meaning")):
+        offsets = itertools.cycle(range(0, 20_000, 10))
+        yield measure(
+            "dictionary.reverse_search",
+            lambda: indexes[mode].search(query, limit=10, offset=next(offsets)),
+            params={"stage": "search", "mode": mode, "query": query, "terms": ctx.scale.dictionary_terms},
+            repeats=ctx.scale.repeats,
+        )
+
+
+@case("dictionary.lookup_at")
+def bench_lookup_at(ctx: BenchmarkContext) -> Iterator[BenchmarkResult]:
+    service = ctx.lookup_service()
+    for chars in ctx.scale.passage_chars:
+        text = ctx.dictionary_passage(chars)
+        for position, fraction in LOOKUP_POSITIONS.items():
+            index = min(len(text) - 1, int(len(text) * fraction))
+            yield measure(
+                "dictionary.lookup_at",
+                lambda: service.lookup_at(text, index, max_alternatives=3),
+                params={"chars": chars, "position": position, "terms": ctx.scale.dictionary_terms},
+                repeats=ctx.scale.repeats,
+            )
+
+
+@case("audio.cleanup")
+def bench_audio_cleanup(ctx: BenchmarkContext) -> Iterator[BenchmarkResult]:
+    for files in ctx.scale.audio_files:
+        root = ctx.workdir / f"audio_{files}"
+        total_bytes = populate_audio_dir(root, files)
+
+        # Steady state: nothing to evict, cleanup only has to inspect the store.
+        yield measure(
+            "audio.cleanup",
+            lambda: AudioStore(str(root)).cleanup(ttl_hours=10**6, max_files=files * 2, max_bytes=total_bytes * 2),
+            params={"files": files, "evict": 0},
+            repeats=ctx.scale.repeats,
+            min_time=0.0,
+        )
+
+        # Over the high watermark by 10%: the oldest tenth of the files must go.
+        evict = max(1, files // 10)
+
+        def repopulate() -> None:
+            shutil.rmtree(root, ignore_errors=True)
+            populate_audio_dir(root, files)
+            AudioStore(str(root)).rebuild_index()
+
+        yield measure(
+            "audio.cleanup",
+            lambda: AudioStore(str(root)).cleanup(ttl_hours=10**6, max_files=files - evict, max_bytes=total_bytes * 2),
+            params={"files": files, "evict": evict},
+            setup=repopulate,
+            repeats=ctx.scale.repeats,
+        )
+        shutil.rmtree(root, ignore_errors=True)
+
+
+@case("serialize.tts_response")
+def bench_serialize_tts_response(ctx: BenchmarkContext) -> Iterator[BenchmarkResult]:
+    from routes_tts import _serialize_tokens
+
+    app = ctx.app()
+    for chars in ctx.scale.passage_chars:
+        tokens = ctx.builder.build_tokens(ctx.passage(chars))
+        mark_to_token = {f"c_{token.token_id}": token.token_id for token in tokens if not token.char.isspace()}
+        timepoints = [{"mark_name": name, "seconds": idx * 0.21} for idx, name in enumerate(mark_to_token)]
+
+        def serialize() -> bytes:
+            with app.app_context():
+                payload = {
+                    "audio_url": "/static/temp_audio/bench.mp3",
+                    "duration_seconds": timepoints[-1]["seconds"] if timepoints else 0.0,
+                    "timepoints": timepoints,
+                    "tokens": _serialize_tokens(tokens),
+                    "mark_to_token": mark_to_token,
+                    "sync_mode": "full",
+                    "sync_supported": True,
+                    "voice_mode": "standard",
+                    "jyutping_available": ctx.builder.jyutping_available,
+                }
+                return jsonify(payload).get_data()
+
+        yield measure(
+            "serialize.tts_response",
+            serialize,
+            params={"chars": chars},
+            repeats=ctx.scale.repeats,
+        )
+
+
+@case("serialize.dictionary_lookup")
+def bench_serialize_dictionary_lookup(ctx: BenchmarkContext) -> Iterator[BenchmarkResult]:
+    from routes_dictionary import _serialize_result
+
+    app = ctx.app()
+    text = ctx.dictionary_passage(ctx.scale.passage_chars[0])
+    result = ctx.lookup_service().lookup_at(text, len(text) // 2, max_alternatives=3)
+
+    def serialize() -> bytes:
+        with app.app_context():
+            return jsonify(_serialize_result(result)).get_data()
+
+    yield measure(
+        "serialize.dictionary_lookup",
+        serialize,
+        params={"alternatives": len(result.alternatives)},
+        repeats=ctx.scale.repeats,
+    )
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import gc
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable
+
+
+@dataclass(slots=True)
+class BenchmarkResult:
+    name: str
+    params: dict[str, Any]
+    loops: int
+    repeats: int
+    best_seconds: float
+    median_seconds: float
+    mean_seconds: float
+    peak_alloc_bytes: int
+    retained_alloc_bytes: int
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def measure(
+    name: str,
+    fn: Callable[[], Any],
+    params: dict[str, Any] | None = None,
+    setup: Callable[[], Any] | None = None,
+    repeats: int = 5,
+    min_time: float = 0.05,
+    max_loops: int = 10_000,
+    track_allocations: bool = True,
+) -> BenchmarkResult:
+    """Time `fn` and report per-call seconds plus tracemalloc allocation peaks.
+
+    Without `setup`, each repeat runs `fn` in a loop sized (like `timeit.autorange`)
+    to take at least `min_time`. With `setup`, every call gets fresh state from
+    `setup()` and runs exactly once per repeat; setup time is never counted.
+    """
+    loops = 1 if setup is not None else _autorange(fn, min_time=min_time, max_loops=max_loops)
+
+    samples: list[float] = []
+    gc_was_enabled = gc.isenabled()
+    try:
+        for _ in range(max(1, repeats)):
+            if setup is not None:
+                setup()
+            gc.collect()
+            gc.disable()
+            started = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            elapsed = time.perf_counter() - started
+            if gc_was_enabled:
+                gc.enable()
+            samples.append(elapsed / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    peak_bytes = 0
+    retained_bytes = 0
+    if track_allocations:
+        if setup is not None:
+            setup()
+        peak_bytes, retained_bytes = _measure_allocations(fn)
+
+    return BenchmarkResult(
+        name=name,
+        params=dict(params or {}),
+        loops=loops,
+        repeats=len(samples),
+        best_seconds=min(samples),
+        median_seconds=statistics.median(samples),
+        mean_seconds=statistics.fmean(samples),
+        peak_alloc_bytes=peak_bytes,
+        retained_alloc_bytes=retained_bytes,
+    )
+
+
+def _autorange(fn: Callable[[], Any], min_time: float, max_loops: int) -> int:
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or loops >= max_loops:
+            return loops
+        loops = min(max_loops, loops * 2 if elapsed <= 0 else max(loops * 2, int(loops * min_time / elapsed) + 1))
+
+
+def _measure_allocations(fn: Callable[[], Any]) -> tuple[int, int]:
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    try:
+        gc.collect()
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = fn()
+        current, peak = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+    return max(0, peak - baseline), max(0, current - baseline)
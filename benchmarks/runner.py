@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import fnmatch
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from benchmarks.cases import CASES, SCALES, BenchmarkContext
+
+
+def run_suite(scale_name: str = "full", only: list[str] | None = None, progress=None) -> dict[str, Any]:
+    """Run the selected benchmark cases and return a JSON-serializable report."""
+    scale = SCALES[scale_name]
+    selected = [name for name in CASES if not only or any(fnmatch.fnmatch(name, pattern) for pattern in only)]
+
+    results: list[dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="canto-bench-") as tmp:
+        ctx = BenchmarkContext(scale, Path(tmp))
+        if any(name.startswith(("ssml.", "serialize.tts")) for name in selected):
+            # Load pycantonese's tables up front so the first case does not absorb it.
+            ctx.builder.build_tokens("你好")
+        for name in selected:
+            for result in CASES[name](ctx):
+                if progress is not None:
+                    progress(result)
+                results.append(result.to_dict())
+
+    return {
+        "meta": {
+            "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "scale": scale_name,
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "git_commit": _git_commit(),
+        },
+        "results": results,
+    }
+
+
+def result_key(result: dict[str, Any]) -> str:
+    params = ",".join(f"{key}={result['params'][key]}" for key in sorted(result["params"]))
+    return f"{result['name']}[{params}]"
+
+
+def compare_reports(baseline: dict[str, Any], current: dict[str, Any]) -> list[dict[str, Any]]:
+    """Pair results by name + params and report the current/baseline time ratio."""
+    previous = {result_key(item): item for item in baseline.get("results", [])}
+    rows: list[dict[str, Any]] = []
+    for item in current.get("results", []):
+        key = result_key(item)
+        before = previous.get(key)
+        if before is None or before["median_seconds"] <= 0:
+            continue
+        rows.append(
+            {
+                "key": key,
+                "baseline_seconds": before["median_seconds"],
+                "current_seconds": item["median_seconds"],
+                "ratio": item["median_seconds"] / before["median_seconds"],
+            }
+        )
+    return rows
+
+
+def _git_commit() -> str:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parents[1],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    return completed.stdout.strip() if completed.returncode == 0 else ""
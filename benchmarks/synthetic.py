@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import os
+import random
+from pathlib import Path
+
+
+# Frequent Cantonese/Chinese characters so generated passages exercise the same
+# Jyutping lookups and byte widths as real reader input.
+COMMON_CHARS = (
+    "我你佢哋嘅係唔喺咗啲同個去嚟講話食飯飲茶好多少大細人日月年時間今明"
+    "天地水火山石木金上下左右前後中外東南西北高低長短新舊快慢早晚學生老師"
+    "朋友屋企公司學校醫院銀行車站電話電腦手機香港廣東城市街市問題方法工作"
+    "開心睇聽寫讀買賣行企坐瞓起身返放假錢銀價貴平靚衫褲鞋帽雨雪風雲花草樹"
+    "魚肉菜米麵包蛋奶糖鹽油醋茶咖啡酒水果蘋橙蕉西瓜雞鴨牛豬羊狗貓鳥馬"
+)
+SENTENCE_PUNCTUATION = "。！？"
+CLAUSE_PUNCTUATION = "，；："
+
+
+def cantonese_passage(chars: int, seed: int = 0, vocabulary: list[str] | None = None) -> str:
+    """Return a deterministic passage of exactly `chars` characters.
+
+    With `vocabulary`, sentences are assembled from those terms so dictionary
+    lookups land on real matches; otherwise characters are drawn from
+    `COMMON_CHARS`.
+    """
+    rng = random.Random(seed)
+    parts: list[str] = []
+    size = 0
+    while size < chars:
+        clause_count = rng.randint(1, 3)
+        for clause_index in range(clause_count):
+            clause_len = rng.randint(4, 14)
+            clause: list[str] = []
+            clause_size = 0
+            while clause_size < clause_len:
+                piece = rng.choice(vocabulary) if vocabulary else rng.choice(COMMON_CHARS)
+                clause.append(piece)
+                clause_size += len(piece)
+            parts.append("".join(clause))
+            if clause_index < clause_count - 1:
+                parts.append(rng.choice(CLAUSE_PUNCTUATION))
+            else:
+                parts.append(rng.choice(SENTENCE_PUNCTUATION))
+            size += clause_size + 1
+        if rng.random() < 0.08:
+            parts.append("\n")
+            size += 1
+    return "".join(parts)[:chars]
+
+
+def dictionary_terms(count: int, seed: int = 0) -> list[str]:
+    """Return `count` unique terms with a CC-CEDICT-like length distribution."""
+    rng = random.Random(seed)
+    # Mostly two- and three-character words, with a long tail of idioms/phrases.
+    lengths = (1, 2, 2, 2, 2, 3, 3, 3, 4, 4, 5, 6, 8, 12)
+    pool = COMMON_CHARS + "".join(chr(code) for code in range(0x4E00, 0x4E00 + 3000))
+    seen: set[str] = set()
+    terms: list[str] = []
+    while len(terms) < count:
+        length = rng.choice(lengths)
+        term = "".join(rng.choice(pool) for _ in range(length))
+        if term in seen:
+            continue
+        seen.add(term)
+        terms.append(term)
+    return terms
+
+
+def dictionary_lines(terms: list[str], seed: int = 0, with_jyutping: bool = True) -> list[str]:
+    """Format `terms` as CC-CEDICT (or CC-Canto, with `{jyutping}`) source lines."""
+    rng = random.Random(seed)
+    lines = ["# synthetic dictionary for benchmarks"]
+    for term in terms:
+        pinyin = " ".join(f"x{rng.randint(1, 5)}" for _ in term)
+        jyutping = " ".join(f"j{rng.randint(1, 6)}" for _ in term)
+        definitions = "/".join(f"meaning {rng.randint(0, 50_000)}" for _ in range(rng.randint(1, 4)))
+        if with_jyutping:
+            lines.append(f"{term} {term} [{pinyin}] {{{jyutping}}} /{definitions}/")
+        else:
+            lines.append(f"{term} {term} [{pinyin}] /{definitions}/")
+    return lines
+
+
+def write_dictionary(path: Path, terms: list[str], seed: int = 0, with_jyutping: bool = True) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(dictionary_lines(terms, seed=seed, with_jyutping=with_jyutping)) + "\n", encoding="utf-8")
+    return path
+
+
+def populate_audio_dir(root: Path, count: int, seed: int = 0, base_mtime: float = 1_700_000_000.0) -> int:
+    """Fill `root` with `count` small mp3-named files with spread-out mtimes.
+
+    Returns the total number of bytes written.
+    """
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    total = 0
+    for idx in range(count):
+        size = rng.randint(2_000, 40_000)
+        path = root / f"tts_bench_{idx:06d}.mp3"
+        path.write_bytes(b"\0" * size)
+        stamp = base_mtime + idx * 7
+        os.utime(path, (stamp, stamp))
+        total += size
+    return total
@@ -0,0 +1,36 @@
+"""Gunicorn settings (picked up automatically from the working directory).
+
+With `GUNICORN_PRELOAD=true` (the default) the master imports the app, warms the
+dictionary, Jyutping tables and voice catalog once, and freezes them with
+`gc.freeze()`, so every worker inherits them copy-on-write instead of rebuilding
+them on its first requests. Command-line flags still override these values.
+"""
+
+from __future__ import annotations
+
+import os
+
+from services.runtime_config import env_bool
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+preload_app = env_bool("GUNICORN_PRELOAD", True)
+
+
+def on_starting(server) -> None:
+    # The preloaded app exists by now, and the master's SIGCHLD handler does not yet:
+    # pycantonese parses its corpus with a process pool that must reap its own children.
+    if server.cfg.preload_app:
+        from services.preload import warm_up
+
+        warm_up(server.app.wsgi())
+
+
+def post_fork(server, worker) -> None:
+    if server.cfg.preload_app:
+        from services.preload import after_fork
+
+        after_fork(server.app.wsgi())
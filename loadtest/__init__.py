@@ -0,0 +1 @@
+"""Load-test harness: real app under gunicorn, stubbed Google TTS and Grok upstreams."""
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import UTC, datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import dictionary_terms, write_dictionary
+from loadtest.runner import (
+    GunicornProcess,
+    app_environment,
+    bootstrap_users,
+    free_port,
+    run_level,
+    summarize_level,
+)
+from loadtest.scenarios import SCENARIOS, Workload
+
+
+DEFAULT_OUT_DIR = ROOT / "loadtest" / "results"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Boot the real app under gunicorn with stubbed upstreams and drive concurrent reader traffic."
+    )
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma list from: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", default="1,4,8,16,32", help="Comma list of concurrent readers to ramp through")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per scenario/concurrency level")
+    parser.add_argument("--warmup", type=float, default=10.0, help="Unrecorded warm-up seconds before measuring")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean seconds a reader waits between requests")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--users", type=int, default=16, help="Distinct accounts (sessions are spread across them)")
+    parser.add_argument("--dictionary-terms", type=int, default=60_000, help="Size of each generated dictionary file")
+    parser.add_argument("--tts-latency-ms", type=float, default=120.0, help="Stub TTS base latency per call")
+    parser.add_argument("--translate-latency-ms", type=float, default=400.0, help="Stub Grok base latency per call")
+    parser.add_argument("--p95-slo-ms", type=float, default=2_000.0, help="p95 above this marks latency collapse")
+    parser.add_argument("--gunicorn-arg", action="append", default=[], help="Extra gunicorn argument (repeatable)")
+    parser.add_argument("--out", help="Output JSON path (default: loadtest/results/loadtest-<timestamp>.json)")
+    parser.add_argument("--keep-workdir", action="store_true", help="Keep the temp DB/audio/log directory")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    levels = [int(value) for value in args.concurrency.split(",") if value.strip()]
+
+    workdir = Path(tempfile.mkdtemp(prefix="canto-loadtest-"))
+    stub = None
+    server = None
+    try:
+        print(f"workdir: {workdir}", flush=True)
+        terms = dictionary_terms(args.dictionary_terms * 2, seed=11)
+        cedict_path = write_dictionary(workdir / "cc-cedict.u8", terms[: args.dictionary_terms], with_jyutping=False)
+        canto_path = write_dictionary(workdir / "cc-canto.u8", terms[args.dictionary_terms // 2 :], seed=12)
+
+        stub_port = free_port()
+        stub = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "loadtest.stub_upstreams",
+                "--port",
+                str(stub_port),
+                "--tts-latency-ms",
+                str(args.tts_latency_ms),
+                "--translate-latency-ms",
+                str(args.translate_latency_ms),
+            ],
+            cwd=ROOT,
+            stdout=subprocess.DEVNULL,
+        )
+        stub_url = f"http://127.0.0.1:{stub_port}"
+        _wait_for(f"{stub_url}/v1beta1/voices")
+
+        env = app_environment(workdir, stub_url, cedict_path, canto_path)
+        usernames = bootstrap_users(env, args.users)
+
+        server = GunicornProcess(env, free_port(), args.workers, args.threads, args.gunicorn_arg)
+        server.start(workdir / "gunicorn.log")
+        print(f"gunicorn up on :{server.port} workers={server.worker_pids()}", flush=True)
+
+        workload = Workload.build(vocabulary=terms[:20_000])
+        if args.warmup > 0:
+            run_level(
+                server,
+                usernames,
+                workload,
+                "warmup",
+                SCENARIOS["mixed"],
+                concurrency=args.workers * args.threads,
+                duration=args.warmup,
+            )
+
+        results = []
+        for scenario in scenarios:
+            for concurrency in levels:
+                level = run_level(
+                    server,
+                    usernames,
+                    workload,
+                    scenario,
+                    SCENARIOS[scenario],
+                    concurrency=concurrency,
+                    duration=args.duration,
+                    think_time=args.think_time,
+                    seed=concurrency,
+                )
+                summary = summarize_level(level)
+                results.append(summary)
+                overall = summary["overall"]
+                print(
+                    f"{scenario:<11} c={concurrency:<4} rps={overall['throughput_rps']:8.2f} "
+                    f"p50={overall['p50_ms']:8.1f}ms p95={overall['p95_ms']:8.1f}ms p99={overall['p99_ms']:8.1f}ms "
+                    f"err={overall['error_rate']:.2%} rss_max={summary['worker_rss']['peak_bytes_max'] / 2**20:.1f}MiB",
+                    flush=True,
+                )
+
+        report = {
+            "meta": {
+                "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+                "workers": args.workers,
+                "threads": args.threads,
+                "duration_seconds": args.duration,
+                "think_time_seconds": args.think_time,
+                "dictionary_terms": args.dictionary_terms,
+                "stub_tts_latency_ms": args.tts_latency_ms,
+                "stub_translate_latency_ms": args.translate_latency_ms,
+                "p95_slo_ms": args.p95_slo_ms,
+                "gunicorn_args": args.gunicorn_arg,
+            },
+            "levels": results,
+            "capacity": {scenario: _capacity(results, scenario, args.p95_slo_ms) for scenario in scenarios},
+        }
+        for scenario, capacity in report["capacity"].items():
+            print(f"capacity[{scenario}]: {capacity}", flush=True)
+
+        out_path = Path(args.out) if args.out else DEFAULT_OUT_DIR / f"loadtest-{datetime.now(UTC):%Y%m%dT%H%M%SZ}.json"
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"wrote {out_path}")
+        return 0
+    finally:
+        if server is not None:
+            server.stop()
+        if stub is not None:
+            stub.terminate()
+            stub.wait(timeout=10)
+        if args.keep_workdir:
+            print(f"kept workdir: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _capacity(results: list[dict], scenario: str, p95_slo_ms: float) -> dict:
+    """Highest concurrency that stayed within the p95 SLO with <1% errors."""
+    sustained = None
+    collapsed_at = None
+    for summary in results:
+        if summary["scenario"] != scenario:
+            continue
+        overall = summary["overall"]
+        if overall["p95_ms"] <= p95_slo_ms and overall["error_rate"] < 0.01:
+            if collapsed_at is None:
+                sustained = summary["concurrency"]
+        elif collapsed_at is None:
+            collapsed_at = summary["concurrency"]
+    return {"max_sustained_concurrency": sustained, "collapsed_at_concurrency": collapsed_at}
+
+
+def _wait_for(url: str, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import http.client
+import json
+import time
+from dataclasses import dataclass
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+
+
+@dataclass(slots=True)
+class Sample:
+    operation: str
+    status: int
+    seconds: float
+    response_bytes: int
+
+
+class SessionClient:
+    """Keep-alive HTTP client holding one logged-in reader session."""
+
+    def __init__(self, host: str, port: int, timeout: float = 60.0) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.cookies: dict[str, str] = {}
+        self._conn: http.client.HTTPConnection | None = None
+
+    def login(self, username: str, password: str) -> None:
+        body = urlencode({"username": username, "password": password}).encode("utf-8")
+        status, _ = self._request("POST", "/login", body, "application/x-www-form-urlencoded")
+        if status not in (302, 303) or "session" not in self.cookies:
+            raise RuntimeError(f"Login failed for {username} (status {status})")
+
+    def post_json(self, operation: str, path: str, payload: dict) -> Sample:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        started = time.perf_counter()
+        try:
+            status, data = self._request("POST", path, body, "application/json")
+        except (OSError, http.client.HTTPException):
+            self.close()
+            status, data = 599, b""
+        return Sample(operation=operation, status=status, seconds=time.perf_counter() - started, response_bytes=len(data))
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _request(self, method: str, path: str, body: bytes, content_type: str) -> tuple[int, bytes]:
+        if self._conn is None:
+            self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        headers = {"Content-Type": content_type, "Content-Length": str(len(body))}
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in self.cookies.items())
+        self._conn.request(method, path, body=body, headers=headers)
+        response = self._conn.getresponse()
+        data = response.read()
+        for header in response.headers.get_all("Set-Cookie") or []:
+            parsed = SimpleCookie()
+            parsed.load(header)
+            for name, morsel in parsed.items():
+                self.cookies[name] = morsel.value
+        if response.will_close:
+            self.close()
+        return response.status, data
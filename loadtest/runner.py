@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from loadtest.client import Sample, SessionClient
+from loadtest.scenarios import Workload, pick_operation, run_operation
+
+
+ROOT = Path(__file__).resolve().parents[1]
+LOADTEST_PASSWORD = "loadtest-password"
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def app_environment(workdir: Path, stub_url: str, cedict_path: Path, canto_path: Path) -> dict[str, str]:
+    """Environment for the app under test: real config, upstreams pointed at the stub."""
+    env = dict(os.environ)
+    env.update(
+        {
+            "FLASK_ENV": "production",
+            "SECRET_KEY": "loadtest-secret",
+            "DATABASE_PATH": str(workdir / "loadtest.db"),
+            "TEMP_AUDIO_DIR": str(workdir / "temp_audio"),
+            "TTS_API_ENDPOINT": stub_url,
+            "GROK_API_KEY": "loadtest-key",
+            "GROK_BASE_URL": stub_url,
+            "DICTIONARY_ENABLED": "true",
+            "DICTIONARY_CC_CEDICT_PATH": str(cedict_path),
+            "DICTIONARY_CC_CANTO_PATH": str(canto_path),
+            "PYTHONUNBUFFERED": "1",
+        }
+    )
+    env.pop("GOOGLE_APPLICATION_CREDENTIALS", None)
+    env.pop("GCP_SERVICE_ACCOUNT_JSON", None)
+    return env
+
+
+def bootstrap_users(env: dict[str, str], count: int) -> list[str]:
+    """Create `count` reader accounts in the app database (runs in a subprocess)."""
+    subprocess.run(
+        [sys.executable, "-m", "loadtest.runner", "--bootstrap-users", str(count)],
+        cwd=ROOT,
+        env=env,
+        check=True,
+    )
+    return [f"loadtest_user_{idx}" for idx in range(count)]
+
+
+class GunicornProcess:
+    def __init__(self, env: dict[str, str], port: int, workers: int, threads: int, extra_args: list[str]) -> None:
+        self.env = env
+        self.port = port
+        self.workers = workers
+        self.threads = threads
+        self.extra_args = extra_args
+        self.process: subprocess.Popen | None = None
+
+    def start(self, log_path: Path, timeout: float = 60.0) -> None:
+        command = [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "-w",
+            str(self.workers),
+            "-k",
+            "gthread",
+            "--threads",
+            str(self.threads),
+            "-b",
+            f"127.0.0.1:{self.port}",
+            *self.extra_args,
+            "app:app",
+        ]
+        self._log = log_path.open("wb")
+        self.process = subprocess.Popen(command, cwd=ROOT, env=self.env, stdout=self._log, stderr=subprocess.STDOUT)
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited early; see {log_path}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/healthz", timeout=1) as resp:
+                    if resp.status == 200 and len(self.worker_pids()) >= self.workers:
+                        return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"gunicorn did not become healthy within {timeout}s; see {log_path}")
+
+    def worker_pids(self) -> list[int]:
+        if self.process is None:
+            return []
+        pid = self.process.pid
+        try:
+            children = Path(f"/proc/{pid}/task/{pid}/children").read_text().split()
+        except OSError:
+            return []
+        return [int(child) for child in children]
+
+    def stop(self) -> None:
+        if self.process is None:
+            return
+        self.process.send_signal(signal.SIGTERM)
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self._log.close()
+        self.process = None
+
+
+def read_rss_bytes(pid: int) -> int:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        return 0
+    return 0
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, server: GunicornProcess, interval: float = 0.5) -> None:
+        super().__init__(name="rss-sampler", daemon=True)
+        self.server = server
+        self.interval = interval
+        self.peak_by_pid: dict[int, int] = {}
+        self.last_by_pid: dict[int, int] = {}
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            for pid in self.server.worker_pids():
+                rss = read_rss_bytes(pid)
+                self.last_by_pid[pid] = rss
+                self.peak_by_pid[pid] = max(rss, self.peak_by_pid.get(pid, 0))
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> dict[str, Any]:
+        self._stop_event.set()
+        self.join(timeout=5)
+        return {
+            "workers": len(self.peak_by_pid),
+            "peak_bytes_by_worker": {str(pid): value for pid, value in sorted(self.peak_by_pid.items())},
+            "peak_bytes_max": max(self.peak_by_pid.values(), default=0),
+            "final_bytes_total": sum(self.last_by_pid.values()),
+        }
+
+
+@dataclass(slots=True)
+class LevelResult:
+    scenario: str
+    concurrency: int
+    duration_seconds: float
+    samples: list[Sample] = field(default_factory=list)
+    rss: dict[str, Any] = field(default_factory=dict)
+
+
+def run_level(
+    server: GunicornProcess,
+    usernames: list[str],
+    workload: Workload,
+    scenario: str,
+    weights: dict[str, float],
+    concurrency: int,
+    duration: float,
+    think_time: float = 0.0,
+    seed: int = 0,
+) -> LevelResult:
+    """Drive `concurrency` logged-in readers in a closed loop for `duration` seconds."""
+    clients = []
+    for idx in range(concurrency):
+        client = SessionClient("127.0.0.1", server.port)
+        client.login(usernames[idx % len(usernames)], LOADTEST_PASSWORD)
+        clients.append(client)
+
+    samples: list[Sample] = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def reader(client: SessionClient, reader_seed: int) -> None:
+        rng = random.Random(reader_seed)
+        local: list[Sample] = []
+        while time.monotonic() < deadline:
+            local.append(run_operation(client, pick_operation(weights, rng), workload, rng))
+            if think_time > 0:
+                time.sleep(rng.expovariate(1.0 / think_time))
+        client.close()
+        with lock:
+            samples.extend(local)
+
+    sampler = RssSampler(server)
+    sampler.start()
+    started = time.monotonic()
+    threads = [
+        threading.Thread(target=reader, args=(client, seed * 1000 + idx), daemon=True)
+        for idx, client in enumerate(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    rss = sampler.stop()
+    return LevelResult(scenario=scenario, concurrency=concurrency, duration_seconds=elapsed, samples=samples, rss=rss)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize_samples(samples: list[Sample], duration: float) -> dict[str, Any]:
+    latencies = sorted(sample.seconds for sample in samples)
+    errors = sum(1 for sample in samples if sample.status >= 500 or sample.status == 0)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": (errors / len(samples)) if samples else 0.0,
+        "throughput_rps": (len(samples) / duration) if duration > 0 else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": (latencies[-1] * 1000) if latencies else 0.0,
+        "status_counts": _status_counts(samples),
+    }
+
+
+def summarize_level(level: LevelResult) -> dict[str, Any]:
+    by_operation: dict[str, list[Sample]] = {}
+    for sample in level.samples:
+        by_operation.setdefault(sample.operation, []).append(sample)
+    return {
+        "scenario": level.scenario,
+        "concurrency": level.concurrency,
+        "duration_seconds": level.duration_seconds,
+        "overall": summarize_samples(level.samples, level.duration_seconds),
+        "operations": {
+            name: summarize_samples(items, level.duration_seconds) for name, items in sorted(by_operation.items())
+        },
+        "worker_rss": level.rss,
+    }
+
+
+def _status_counts(samples: list[Sample]) -> dict[str, int]:
+    counts: dict[str, int] = {}
+    for sample in samples:
+        counts[str(sample.status)] = counts.get(str(sample.status), 0) + 1
+    return counts
+
+
+def _bootstrap_users_main(count: int) -> int:
+    from werkzeug.security import generate_password_hash
+
+    from app import create_app
+    from models import User, db
+
+    app = create_app()
+    with app.app_context():
+        password_hash = generate_password_hash(LOADTEST_PASSWORD)
+        for idx in range(count):
+            username = f"loadtest_user_{idx}"
+            if User.query.filter_by(username=username).first() is None:
+                db.session.add(User(username=username, password_hash=password_hash, is_admin=False))
+        db.session.commit()
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--bootstrap-users":
+        if str(ROOT) not in sys.path:
+            sys.path.insert(0, str(ROOT))
+        raise SystemExit(_bootstrap_users_main(int(sys.argv[2])))
+    raise SystemExit("usage: python -m loadtest (see --help)")
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+
+from benchmarks.synthetic import cantonese_passage
+
+from loadtest.client import Sample, SessionClient
+
+
+STANDARD_VOICE = "yue-HK-Standard-A"
+HQ_VOICE = "yue-HK-Chirp3-HD-Orus"
+
+# Operation weights per scenario; each virtual reader picks its next request from these.
+SCENARIOS: dict[str, dict[str, float]] = {
+    "reader": {"synthesize": 0.6, "lookup": 0.2, "speak": 0.1, "translate": 0.1},
+    "dictionary": {"synthesize": 0.05, "lookup": 0.6, "speak": 0.3, "translate": 0.05},
+    "mixed": {"synthesize": 0.3, "lookup": 0.35, "speak": 0.2, "translate": 0.15},
+}
+
+
+@dataclass(slots=True)
+class Workload:
+    """Pre-generated request bodies so payload building never skews latency."""
+
+    passages: list[str]
+    lookup_passages: list[str]
+    terms: list[str]
+
+    @classmethod
+    def build(cls, vocabulary: list[str], seed: int = 0) -> Workload:
+        sizes = (200, 600, 1_000, 2_500, 4_000)
+        passages = [cantonese_passage(size, seed=seed + idx) for idx, size in enumerate(sizes * 4)]
+        lookup_sizes = (1_000, 4_000, 12_000)
+        lookup_passages = [
+            cantonese_passage(size, seed=seed + 100 + idx, vocabulary=vocabulary)
+            for idx, size in enumerate(lookup_sizes * 3)
+        ]
+        return cls(passages=passages, lookup_passages=lookup_passages, terms=vocabulary[:2_000])
+
+
+def run_operation(client: SessionClient, operation: str, workload: Workload, rng: random.Random) -> Sample:
+    if operation == "synthesize":
+        high_quality = rng.random() < 0.2
+        return client.post_json(
+            operation,
+            "/api/tts/synthesize",
+            {
+                "text": rng.choice(workload.passages),
+                "voice_name": HQ_VOICE if high_quality else STANDARD_VOICE,
+                "voice_mode": "high_quality" if high_quality else "standard",
+                "speaking_rate": 1.0,
+            },
+        )
+    if operation == "lookup":
+        text = rng.choice(workload.lookup_passages)
+        return client.post_json(operation, "/api/dictionary/lookup", {"text": text, "index": rng.randrange(len(text))})
+    if operation == "speak":
+        return client.post_json(
+            operation,
+            "/api/dictionary/speak",
+            {"text": rng.choice(workload.terms), "voice_name": STANDARD_VOICE, "voice_mode": "standard"},
+        )
+    if operation == "translate":
+        text = rng.choice(workload.passages)[:2_000]
+        return client.post_json(operation, "/api/translate", {"text": text})
+    raise ValueError(f"Unknown operation: {operation}")
+
+
+def pick_operation(weights: dict[str, float], rng: random.Random) -> str:
+    operations = list(weights)
+    return rng.choices(operations, weights=[weights[name] for name in operations], k=1)[0]
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+from services.audio_backends import sigv4_authorization, sigv4_presign_query
+
+
+DEFAULT_ACCESS_KEY = "stub-access-key"
+DEFAULT_SECRET_KEY = "stub-secret-key"
+_AUTH_RE = re.compile(r"Credential=([^/]+)/([^,]+), SignedHeaders=([^,]+), Signature=([0-9a-f]+)")
+
+
+@dataclass(slots=True)
+class StubObject:
+    content: bytes
+    mtime: float
+    content_type: str
+
+
+class StubS3Handler(BaseHTTPRequestHandler):
+    """In-memory stand-in for MinIO / S3: path-style object GET/HEAD/PUT/DELETE,
+    copy-in-place and ListObjectsV2, with SigV4 (header or presigned) checked on
+    every request."""
+
+    server_version = "canto-stub-s3/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self) -> None:
+        self._object_request("HEAD")
+
+    def do_GET(self) -> None:
+        bucket, key = self._split()
+        if bucket and not key:
+            if self._authorized():
+                self._list(bucket)
+            return
+        self._object_request("GET")
+
+    def do_PUT(self) -> None:
+        self._object_request("PUT")
+
+    def do_DELETE(self) -> None:
+        self._object_request("DELETE")
+
+    def _object_request(self, method: str) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0)) if method == "PUT" else b""
+        if not self._authorized(body):
+            return
+        bucket, key = self._split()
+        objects = self.server.objects  # type: ignore[attr-defined]
+        lock = self.server.lock  # type: ignore[attr-defined]
+        path = f"{bucket}/{key}"
+        with lock:
+            if method == "PUT":
+                source = self.headers.get("x-amz-copy-source")
+                if source:
+                    original = objects.get(unquote(source).lstrip("/"))
+                    if original is None:
+                        self._send(404, b"<Error><Code>NoSuchKey</Code></Error>")
+                        return
+                    content = original.content
+                else:
+                    content = body
+                content_type = self.headers.get("Content-Type") or "application/octet-stream"
+                objects[path] = StubObject(content, time.time(), content_type)
+                self._send(200, b"<CopyObjectResult/>" if source else b"")
+                return
+            stored = objects.get(path)
+            if method == "DELETE":
+                objects.pop(path, None)
+                self._send(204, b"")
+                return
+        if stored is None:
+            self._send(404, b"<Error><Code>NoSuchKey</Code></Error>", head=method == "HEAD")
+            return
+        headers = {"Last-Modified": formatdate(stored.mtime, usegmt=True), "Content-Type": stored.content_type}
+        self._send(200, stored.content, headers=headers, head=method == "HEAD")
+
+    def _list(self, bucket: str) -> None:
+        query = dict(parse_qsl(urlsplit(self.path).query, keep_blank_values=True))
+        prefix = f"{bucket}/{query.get('prefix', '')}"
+        max_keys = int(query.get("max-keys") or 1000)
+        start_after = query.get("continuation-token", "")
+        with self.server.lock:  # type: ignore[attr-defined]
+            keys = sorted(
+                path for path in self.server.objects if path.startswith(prefix)  # type: ignore[attr-defined]
+            )
+            keys = [path for path in keys if path[len(bucket) + 1 :] > start_after]
+            page = [(path, self.server.objects[path]) for path in keys[:max_keys]]  # type: ignore[attr-defined]
+        truncated = len(keys) > max_keys
+        items = "".join(
+            "<Contents><Key>{}</Key><LastModified>{}</LastModified><Size>{}</Size></Contents>".format(
+                escape(path[len(bucket) + 1 :]),
+                datetime.fromtimestamp(stored.mtime, UTC).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z",
+                len(stored.content),
+            )
+            for path, stored in page
+        )
+        token = escape(page[-1][0][len(bucket) + 1 :]) if truncated else ""
+        body = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+            f"<Name>{escape(bucket)}</Name><KeyCount>{len(page)}</KeyCount>"
+            f"<IsTruncated>{'true' if truncated else 'false'}</IsTruncated>"
+            f"{f'<NextContinuationToken>{token}</NextContinuationToken>' if truncated else ''}"
+            f"{items}</ListBucketResult>"
+        )
+        self._send(200, body.encode("utf-8"), headers={"Content-Type": "application/xml"})
+
+    def _authorized(self, body: bytes = b"") -> bool:
+        parts = urlsplit(self.path)
+        path = unquote(parts.path)
+        query = dict(parse_qsl(parts.query, keep_blank_values=True))
+        settings = self.server.settings  # type: ignore[attr-defined]
+        if "X-Amz-Signature" in query:
+            signature = query.pop("X-Amz-Signature")
+            amz_date = query.get("X-Amz-Date", "")
+            try:
+                issued = datetime.strptime(amz_date, "%Y%m%dT%H%M%SZ").replace(tzinfo=UTC)
+                expires = int(query.get("X-Amz-Expires", "0"))
+            except ValueError:
+                issued, expires = datetime.now(UTC), -1
+            expected = sigv4_presign_query(
+                self.command,
+                self.headers.get("Host", ""),
+                path,
+                access_key=settings.access_key,
+                secret_key=settings.secret_key,
+                region=settings.region,
+                expires=expires,
+                now=issued,
+            )["X-Amz-Signature"]
+            valid = hmac.compare_digest(signature, expected) and time.time() <= issued.timestamp() + expires
+        else:
+            match = _AUTH_RE.search(self.headers.get("Authorization", ""))
+            payload_hash = self.headers.get("x-amz-content-sha256", "")
+            valid = bool(match) and (self.command != "PUT" or payload_hash == hashlib.sha256(body).hexdigest())
+            if valid:
+                signed = {name: self.headers.get(name, "") for name in match.group(3).split(";")}
+                expected = sigv4_authorization(
+                    self.command,
+                    path,
+                    query,
+                    signed,
+                    payload_hash=payload_hash,
+                    access_key=settings.access_key,
+                    secret_key=settings.secret_key,
+                    region=settings.region,
+                )
+                valid = match.group(1) == settings.access_key and hmac.compare_digest(
+                    expected.rsplit("Signature=", 1)[-1], match.group(4)
+                )
+        if not valid:
+            self.server.rejected += 1  # type: ignore[attr-defined]
+            self._send(403, b"<Error><Code>SignatureDoesNotMatch</Code></Error>", head=self.command == "HEAD")
+        return valid
+
+    def _split(self) -> tuple[str, str]:
+        path = unquote(urlsplit(self.path).path).lstrip("/")
+        bucket, _, key = path.partition("/")
+        return bucket, key
+
+    def _send(self, status: int, body: bytes, headers: dict[str, str] | None = None, head: bool = False) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def log_message(self, _format: str, *_args) -> None:
+        return
+
+
+@dataclass(slots=True)
+class StubS3Settings:
+    access_key: str = DEFAULT_ACCESS_KEY
+    secret_key: str = DEFAULT_SECRET_KEY
+    region: str = "us-east-1"
+
+
+def _make_server(host: str, port: int, settings: StubS3Settings | None) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), StubS3Handler)
+    server.daemon_threads = True
+    server.settings = settings or StubS3Settings()  # type: ignore[attr-defined]
+    server.objects = {}  # type: ignore[attr-defined]
+    server.lock = threading.Lock()  # type: ignore[attr-defined]
+    server.rejected = 0  # type: ignore[attr-defined]
+    return server
+
+
+def start_stub_s3(host: str = "127.0.0.1", port: int = 0, settings: StubS3Settings | None = None) -> ThreadingHTTPServer:
+    """Start the stand-in on a daemon thread and return the bound server."""
+    server = _make_server(host, port, settings)
+    thread = threading.Thread(target=server.serve_forever, name="stub-s3", daemon=True)
+    thread.start()
+    return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local in-memory stand-in for an S3-compatible bucket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--access-key", default=DEFAULT_ACCESS_KEY)
+    parser.add_argument("--secret-key", default=DEFAULT_SECRET_KEY)
+    args = parser.parse_args()
+
+    server = _make_server(args.host, args.port, StubS3Settings(access_key=args.access_key, secret_key=args.secret_key))
+    print(f"stub S3 listening on http://{args.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from services.audio_codec import build_ogg_opus
+
+
+_MARK_RE = re.compile(r'<mark name="([^"]+)"/>')
+_TAG_RE = re.compile(r"<[^>]+>")
+
+HQ_VOICES = ("yue-HK-Chirp3-HD-Aoede", "yue-HK-Chirp3-HD-Orus")
+STANDARD_VOICES = ("yue-HK-Standard-A", "yue-HK-Standard-B", "yue-HK-Standard-C", "yue-HK-Standard-D")
+
+
+@dataclass(slots=True)
+class StubSettings:
+    tts_base_latency_ms: float = 120.0
+    tts_per_char_latency_ms: float = 0.4
+    tts_bytes_per_char: int = 600
+    seconds_per_mark: float = 0.25
+    translate_base_latency_ms: float = 400.0
+    translate_per_char_latency_ms: float = 0.2
+
+
+class StubUpstreamHandler(BaseHTTPRequestHandler):
+    """Stand-in for the Google TTS REST API (v1beta1) and the Grok chat endpoint."""
+
+    server_version = "canto-stub/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def settings(self) -> StubSettings:
+        return self.server.settings  # type: ignore[attr-defined]
+
+    def do_GET(self) -> None:
+        path = urlsplit(self.path).path
+        if path.endswith("/voices"):
+            voices = [{"name": name, "languageCodes": ["yue-HK"]} for name in STANDARD_VOICES + HQ_VOICES]
+            self._send_json(200, {"voices": voices})
+            return
+        self._send_json(404, {"error": {"message": f"unknown path {path}"}})
+
+    def do_POST(self) -> None:
+        path = urlsplit(self.path).path
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "invalid json"}})
+            return
+
+        if path.endswith("/text:synthesize"):
+            self._synthesize(payload)
+            return
+        if path.endswith("/chat/completions"):
+            self._chat_completion(payload)
+            return
+        self._send_json(404, {"error": {"message": f"unknown path {path}"}})
+
+    def _synthesize(self, payload: dict) -> None:
+        source = payload.get("input") or {}
+        ssml = str(source.get("ssml") or "")
+        text = _TAG_RE.sub("", ssml) if ssml else str(source.get("text") or "")
+        marks = _MARK_RE.findall(ssml)
+
+        self._sleep(self.settings.tts_base_latency_ms + self.settings.tts_per_char_latency_ms * len(text))
+
+        timepoints = [
+            {"markName": name, "timeSeconds": round((idx + 1) * self.settings.seconds_per_mark, 3)}
+            for idx, name in enumerate(marks)
+        ]
+        size = max(1, len(text) * self.settings.tts_bytes_per_char)
+        encoding = str((payload.get("audioConfig") or payload.get("audio_config") or {}).get("audioEncoding") or "")
+        if encoding == "OGG_OPUS":
+            # 20 ms CELT frames, so the app's Ogg merger has real pages to splice.
+            frames = max(1, size // 160)
+            audio = build_ogg_opus([bytes([0xF8]) + b"\xff" * 159] * frames)
+        else:
+            audio = b"ID3" + b"\xff" * size
+        self._send_json(
+            200,
+            {
+                "audioContent": base64.b64encode(audio).decode("ascii"),
+                "timepoints": timepoints,
+            },
+        )
+
+    def _chat_completion(self, payload: dict) -> None:
+        messages = payload.get("messages") or []
+        user_text = str(messages[-1].get("content") or "") if messages else ""
+        self._sleep(self.settings.translate_base_latency_ms + self.settings.translate_per_char_latency_ms * len(user_text))
+        translation = f"[stub translation of {len(user_text)} chars]"
+        self._send_json(200, {"choices": [{"message": {"role": "assistant", "content": translation}}]})
+
+    def _sleep(self, millis: float) -> None:
+        if millis > 0:
+            time.sleep(millis / 1000.0)
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, _format: str, *_args) -> None:
+        return
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, settings: StubSettings | None = None) -> ThreadingHTTPServer:
+    """Start the stand-in on a daemon thread and return the bound server."""
+    server = ThreadingHTTPServer((host, port), StubUpstreamHandler)
+    server.daemon_threads = True
+    server.settings = settings or StubSettings()  # type: ignore[attr-defined]
+    thread = threading.Thread(target=server.serve_forever, name="stub-upstreams", daemon=True)
+    thread.start()
+    return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local stand-in for Google TTS (REST) and Grok chat completions.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--tts-latency-ms", type=float, default=StubSettings.tts_base_latency_ms)
+    parser.add_argument("--translate-latency-ms", type=float, default=StubSettings.translate_base_latency_ms)
+    args = parser.parse_args()
+
+    settings = StubSettings(tts_base_latency_ms=args.tts_latency_ms, translate_base_latency_ms=args.translate_latency_ms)
+    server = ThreadingHTTPServer((args.host, args.port), StubUpstreamHandler)
+    server.daemon_threads = True
+    server.settings = settings  # type: ignore[attr-defined]
+    print(f"stub upstreams listening on http://{args.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
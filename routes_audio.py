@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from flask import Blueprint, abort, current_app, redirect, send_file
+
+from services.audio_codec import mimetype_for_name
+from services.audio_policy import audio_backend_from_config
+from services.audio_store import AudioStore
+
+
+audio_bp = Blueprint("audio", __name__)
+
+_IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+@audio_bp.route("/audio/<path:filename>", methods=["GET"])
+def serve(filename: str):
+    backend = audio_backend_from_config(current_app)
+    store = AudioStore(current_app.config.get("TEMP_AUDIO_DIR", "static/temp_audio"), backend=backend)
+    if backend is not None:
+        # Shared object store: the browser fetches (and range-requests) from the bucket.
+        remote = store.download_url(filename)
+        if remote is None:
+            abort(404)
+        url, immutable = remote
+        response = redirect(url, code=302)
+        response.cache_control.private = True
+        response.cache_control.max_age = backend.download_max_age if immutable else 0
+        return response
+
+    resolved = store.servable_path(filename)
+    if resolved is None:
+        abort(404)
+    path, immutable = resolved
+
+    mimetype = mimetype_for_name(filename)
+    mode = str(current_app.config.get("AUDIO_DELIVERY_MODE", "direct"))
+    if mode == "x-accel":
+        # nginx serves the file (ranges, conditionals, sendfile) from an `internal` location.
+        response = current_app.response_class(mimetype=mimetype)
+        prefix = str(current_app.config.get("AUDIO_ACCEL_PREFIX", "/_audio_files/")).rstrip("/")
+        response.headers["X-Accel-Redirect"] = f"{prefix}/{filename}"
+    elif mode == "x-sendfile":
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers["X-Sendfile"] = str(path.resolve())
+    else:
+        # Full downloads go through wsgi.file_wrapper (sendfile(2) under gunicorn);
+        # Range / If-None-Match / If-Modified-Since are answered by werkzeug.
+        response = send_file(path, mimetype=mimetype, conditional=True, etag=True, max_age=0)
+        # Advertise ranges on full responses too, so the player seeks instead of re-downloading.
+        response.accept_ranges = "bytes"
+
+    if immutable:
+        # Content-addressed: the bytes behind a blob name never change.
+        response.cache_control.public = True
+        response.cache_control.max_age = _IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+        response.cache_control.no_cache = None
+    else:
+        response.cache_control.no_cache = True
+    return response
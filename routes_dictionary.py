@@ -1,24 +1,59 @@
 from __future__ import annotations
 
 import hashlib
+import json
+import re
+import time
 from html import escape
 from pathlib import Path
 
-from flask import Blueprint, current_app, jsonify, request
-from flask_login import login_required
+from flask import Blueprint, Flask, current_app, jsonify, request, send_file, url_for
+from flask_login import current_user, login_required
 
-from services.audio_policy import cleanup_audio_store
+from services.audio_backends import AudioStorageError
+from services.audio_codec import DEFAULT_AUDIO_ENCODING, extension_for, sniff_mimetype
+from services.audio_hot_cache import HotClipCache
+from services.audio_policy import audio_backend_from_config, audio_stats_dir, cleanup_audio_store
 from services.audio_store import AudioStore
-from services.dictionary_loader import DictionaryLoader
-from services.dictionary_lookup import DictionaryLookupResult, DictionaryLookupService
+from services.dictionary_lookup import DictionaryLookupResult, DictionaryLookupService, DictionarySegmentation
+from services.dictionary_manager import (
+    DictionaryUnavailableError,
+    DictionaryWarmingError,
+    LoadedDictionary,
+    get_dictionary_manager,
+)
+from services.dictionary_search import SEARCH_MODES
+from services.dictionary_shards import MANIFEST_NAME, SHARD_NAME
+from services.document_registry import DocumentRegistry, RegisteredDocument
+from services.metrics import DICTIONARY_CACHE, DICTIONARY_LOOKUP_SECONDS
+from services.request_timing import record_size, timed_stage
 from services.tts_google import GoogleTTSWrapper, TTSServiceError
 
 
 dictionary_bp = Blueprint("dictionary", __name__, url_prefix="/api/dictionary")
 
+_SPEAK_CACHE_KEY = re.compile(r"^[0-9a-f]{32}$")
+# A cache key always maps to the same (voice_mode, voice_name, text) audio.
+_HOT_CLIP_MAX_AGE = 365 * 24 * 3600
+# A `?v=` term or search URL never changes meaning; a new dictionary build gets new URLs.
+_VERSIONED_MAX_AGE = 365 * 24 * 3600
+# Shard names carry a hash of their bytes.
+_SHARD_MAX_AGE = 365 * 24 * 3600
 
-class DictionaryUnavailableError(Exception):
-    pass
+
+@dictionary_bp.route("/documents", methods=["POST"])
+@login_required
+def register_document():
+    """Register a reader text once; later calls send its `document_id` instead."""
+    if not bool(current_app.config.get("DICTIONARY_ENABLED", True)):
+        return jsonify({"error": "Dictionary mode is disabled."}), 503
+
+    document, error = _document_from_payload(request.get_json(silent=True) or {})
+    if error is not None:
+        return error
+    # With the registry disabled the id is never accepted, so clients keep sending the text.
+    registered = _get_document_registry().enabled
+    return jsonify({"document_id": document.document_id, "length": len(document.text), "registered": registered}), 200
 
 
 @dictionary_bp.route("/lookup", methods=["POST"])
@@ -28,35 +63,189 @@ def lookup():
         return jsonify({"error": "Dictionary mode is disabled."}), 503
 
     payload = request.get_json(silent=True) or {}
-    text = str(payload.get("text") or "")
     index = payload.get("index")
 
     if not isinstance(index, int):
         return jsonify({"error": "index must be an integer"}), 400
 
-    normalized = text.replace("\r\n", "\n").replace("\r", "\n").strip()
-    if not normalized:
-        return jsonify({"error": "text is required"}), 400
-
-    max_chars = int(current_app.config.get("MAX_DICTIONARY_INPUT_CHARS", 12000))
-    if len(normalized) > max_chars:
-        return jsonify({"error": f"Input exceeds max length ({max_chars})."}), 413
+    document, error = _document_from_payload(payload)
+    if error is not None:
+        return error
+    normalized = document.text
 
     if index < 0 or index >= len(normalized):
         return jsonify({"error": "index is out of range"}), 400
 
     try:
-        service = _get_dictionary_service()
+        with timed_stage("dictionary_load"):
+            dictionary = _get_dictionary()
+    except DictionaryUnavailableError as exc:
+        return _dictionary_unavailable_response(exc)
+    service = dictionary.service
+
+    max_alternatives = int(current_app.config.get("MAX_DICTIONARY_ALTERNATIVES", 3))
+    started = time.perf_counter()
+    with timed_stage("lookup"):
+        segmentation = document.cached_segmentation(_segmentation_key(dictionary, max_alternatives))
+        if segmentation is not None:
+            result = segmentation.result_at(index)
+        else:
+            result = service.lookup_at(normalized, index, max_alternatives=max_alternatives)
+    DICTIONARY_LOOKUP_SECONDS.observe(time.perf_counter() - started)
+
+    return jsonify(_serialize_result(result)), 200
+
+
+@dictionary_bp.route("/segment", methods=["POST"])
+@login_required
+def segment():
+    """Resolve every index of a document at once so the reader can answer taps locally."""
+    if not bool(current_app.config.get("DICTIONARY_ENABLED", True)):
+        return jsonify({"error": "Dictionary mode is disabled."}), 503
+
+    document, error = _document_from_payload(request.get_json(silent=True) or {})
+    if error is not None:
+        return error
+
+    try:
+        with timed_stage("dictionary_load"):
+            dictionary = _get_dictionary()
     except DictionaryUnavailableError as exc:
-        return jsonify({"error": str(exc)}), 503
+        return _dictionary_unavailable_response(exc)
+    service = dictionary.service
+
+    max_alternatives = int(current_app.config.get("MAX_DICTIONARY_ALTERNATIVES", 3))
+    with timed_stage("segment"):
+        segmentation = document.segmentation(
+            _segmentation_key(dictionary, max_alternatives),
+            lambda text: service.segment(text, max_alternatives=max_alternatives),
+        )
+    with timed_stage("serialize"):
+        body = _serialize_segmentation(segmentation, len(document.text))
+    body["document_id"] = document.document_id
+    body["dictionary_version"] = dictionary.version
+    record_size("spans", len(body["spans"]))
+    return jsonify(body), 200
+
+
+@dictionary_bp.route("/term/<term>", methods=["GET"])
+@login_required
+def term_entries(term: str):
+    """Every entry for one term. Depends only on the term and the dictionary version,
+    so `?v=<version>` URLs are cached for a year and others revalidate by ETag."""
+    if not bool(current_app.config.get("DICTIONARY_ENABLED", True)):
+        return jsonify({"error": "Dictionary mode is disabled."}), 503
+
+    term = term.strip()
+    if not term:
+        return jsonify({"error": "term is required"}), 400
+    max_term_chars = int(current_app.config.get("MAX_DICTIONARY_TERM_CHARS", 64))
+    if len(term) > max_term_chars:
+        return jsonify({"error": f"term exceeds max length ({max_term_chars})."}), 413
 
-    result = service.lookup_at(
-        normalized,
-        index,
-        max_alternatives=int(current_app.config.get("MAX_DICTIONARY_ALTERNATIVES", 3)),
+    try:
+        with timed_stage("dictionary_load"):
+            dictionary = _get_dictionary()
+    except DictionaryUnavailableError as exc:
+        return _dictionary_unavailable_response(exc)
+
+    entries = dictionary.service.entries_for(term)
+    response = jsonify(
+        {
+            "term": term,
+            "version": dictionary.version,
+            "entries": [
+                {"definitions": list(entry.definitions), "source": entry.source, "jyutping": entry.jyutping}
+                for entry in entries
+            ],
+        }
     )
+    return _versioned_response(response, dictionary, term)
 
-    return jsonify(_serialize_result(result)), 200
+
+@dictionary_bp.route("/search", methods=["GET"])
+@login_required
+def search():
+    """Search by `mode`, paginated by `offset`/`limit` and cached like `/term/<term>`.
+
+    `prefix` (the default) is autocomplete: terms starting with `q`, in code point
+    order. `jyutping` and `english` are reverse lookups: terms read with every
+    syllable of `q` (tones optional) or defined with every word of `q`, best first.
+    """
+    if not bool(current_app.config.get("DICTIONARY_ENABLED", True)):
+        return jsonify({"error": "Dictionary mode is disabled."}), 503
+
+    query = str(request.args.get("q") or "").strip()
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+    mode = str(request.args.get("mode") or "prefix")
+    if mode not in SEARCH_MODES:
+        return jsonify({"error": f"mode must be one of: {', '.join(SEARCH_MODES)}"}), 400
+    max_term_chars = int(current_app.config.get("MAX_DICTIONARY_TERM_CHARS", 64))
+    if len(query) > max_term_chars:
+        return jsonify({"error": f"q exceeds max length ({max_term_chars})."}), 413
+    max_results = int(current_app.config.get("MAX_DICTIONARY_SEARCH_RESULTS", 50))
+    limit = request.args.get("limit", 10, type=int)
+    offset = request.args.get("offset", 0, type=int)
+    if limit is None or offset is None or not 1 <= limit <= max_results or offset < 0:
+        return jsonify({"error": f"limit must be 1-{max_results} and offset >= 0"}), 400
+
+    try:
+        with timed_stage("dictionary_load"):
+            dictionary = _get_dictionary()
+    except DictionaryUnavailableError as exc:
+        return _dictionary_unavailable_response(exc)
+
+    with timed_stage("search"):
+        page = dictionary.search_indexes[mode].search(query, limit=limit, offset=offset)
+    response = jsonify(
+        {
+            "query": query,
+            "mode": mode,
+            "version": dictionary.version,
+            "total": page.total,
+            "offset": page.offset,
+            "next_offset": page.next_offset,
+            "results": [
+                {"term": match.term, "jyutping": match.jyutping, "definitions": list(match.definitions)}
+                for match in page.matches
+            ],
+        }
+    )
+    return _versioned_response(response, dictionary, "search", mode, query, offset, limit)
+
+
+@dictionary_bp.route("/shards/<name>", methods=["GET"])
+@login_required
+def shard(name: str):
+    """Static browser shards from `scripts/prepare_dictionary_data.py` and their manifest."""
+    shards_dir = str(current_app.config.get("DICTIONARY_SHARDS_DIR", ""))
+    if not bool(current_app.config.get("DICTIONARY_ENABLED", True)) or not shards_dir:
+        return jsonify({"error": "Not found"}), 404
+    if name != MANIFEST_NAME and not SHARD_NAME.match(name):
+        return jsonify({"error": "Not found"}), 404
+    path = Path(shards_dir)
+    if not path.is_absolute():
+        path = Path(current_app.root_path) / path
+    path = path / name
+    if not path.is_file():
+        return jsonify({"error": "Not found"}), 404
+
+    if name == MANIFEST_NAME:
+        if not _shards_match_dictionary(path):
+            # Built from other files (e.g. before a reload); the worker falls back to /segment.
+            return jsonify({"error": "Not found"}), 404
+        response = send_file(path, mimetype="application/json", conditional=True, etag=True, max_age=0)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+    # Stored gzipped; the browser inflates it transparently.
+    response = send_file(path, mimetype="application/json", conditional=True, etag=True, max_age=_SHARD_MAX_AGE)
+    response.headers["Content-Encoding"] = "gzip"
+    response.cache_control.private = True
+    response.cache_control.public = None
+    response.cache_control.immutable = True
+    return response
 
 
 @dictionary_bp.route("/speak", methods=["POST"])
@@ -64,6 +253,15 @@ def lookup():
 def speak():
     payload = request.get_json(silent=True) or {}
     text = str(payload.get("text") or "").strip()
+    if not text and payload.get("document_id"):
+        # A span of a registered document: {document_id, start, end}.
+        document = _get_document_registry().get(current_user.id, str(payload["document_id"]))
+        if document is None:
+            return _unknown_document_response()
+        start, end = payload.get("start"), payload.get("end")
+        if not isinstance(start, int) or not isinstance(end, int) or not 0 <= start < end <= len(document.text):
+            return jsonify({"error": "start/end are out of range"}), 400
+        text = document.text[start:end].strip()
     voice_name = str(payload.get("voice_name") or "")
     voice_mode = str(payload.get("voice_mode") or "standard")
 
@@ -75,33 +273,102 @@ def speak():
     if voice_mode not in ("standard", "high_quality"):
         return jsonify({"error": "Unsupported voice_mode"}), 400
 
-    tts = GoogleTTSWrapper(timeout_seconds=float(current_app.config.get("TTS_TIMEOUT_SECONDS", 20.0)))
+    audio_encoding = str(current_app.config.get("TTS_AUDIO_ENCODING", DEFAULT_AUDIO_ENCODING))
+    tts = GoogleTTSWrapper(
+        timeout_seconds=float(current_app.config.get("TTS_TIMEOUT_SECONDS", 20.0)),
+        audio_encoding=audio_encoding,
+    )
     if not tts.validate_voice(voice_name, voice_mode):
         return jsonify({"error": "Unsupported voice_name"}), 400
 
-    store = AudioStore(current_app.config.get("TEMP_AUDIO_DIR", "static/temp_audio"))
-    cleanup_audio_store(current_app, store)
-
-    cache_key = _dictionary_speak_cache_key(text=text, voice_name=voice_name, voice_mode=voice_mode)
-    cached = store.get_audio_by_key(cache_key, prefix="dict")
+    cache_key = _dictionary_speak_cache_key(
+        text=text, voice_name=voice_name, voice_mode=voice_mode, audio_encoding=audio_encoding
+    )
+    hot_cache = _get_hot_clip_cache()
+    if hot_cache.enabled:
+        with timed_stage("hot_cache"):
+            hot = hot_cache.get(cache_key)
+        DICTIONARY_CACHE.inc(cache="speak_audio_hot", result="hit" if hot else "miss")
+        if hot is not None:
+            if hot_cache.claim_refresh(cache_key):
+                with timed_stage("cache_refresh"):
+                    _refresh_hot_clip(cache_key, hot.content, cost=len(text), audio_encoding=audio_encoding)
+            return jsonify({"audio_url": _hot_clip_url(cache_key), "cached": True}), 200
+
+    store = _audio_store()
+    with timed_stage("cache_check"):
+        cached = store.get_audio_by_key(cache_key, prefix="dict")
+    DICTIONARY_CACHE.inc(cache="speak_audio", result="hit" if cached else "miss")
     if cached:
+        if cached.bytes_size <= hot_cache.max_clip_bytes and hot_cache.enabled:
+            content = store.read(cached.filename) or b""
+            if content and hot_cache.put(cache_key, content) is not None:
+                return jsonify({"audio_url": _hot_clip_url(cache_key), "cached": True}), 200
         return jsonify({"audio_url": cached.url, "cached": True}), 200
 
     try:
-        if voice_mode == "high_quality":
-            chunk = tts.synthesize_text(text, voice_name)
-        else:
-            ssml = f"<speak>{escape(text)}</speak>"
-            chunk = tts.synthesize_ssml(ssml, voice_name, 1.0)
+        with timed_stage("tts_call"):
+            if voice_mode == "high_quality":
+                chunk = tts.synthesize_text(text, voice_name)
+            else:
+                ssml = f"<speak>{escape(text)}</speak>"
+                chunk = tts.synthesize_ssml(ssml, voice_name, 1.0)
     except TTSServiceError as exc:
         current_app.logger.exception("Dictionary TTS failed: %s", exc)
         return jsonify({"error": "Dictionary speech failed."}), 502
 
-    stored = store.save_audio_with_key(chunk.audio_content, cache_key=cache_key, prefix="dict")
-    cleanup_audio_store(current_app, store)
+    record_size("audio_bytes", len(chunk.audio_content))
+    try:
+        with timed_stage("audio_write"):
+            stored = store.save_audio_with_key(
+                chunk.audio_content,
+                cache_key=cache_key,
+                prefix="dict",
+                cost=len(text),
+                extension=extension_for(audio_encoding),
+            )
+    except AudioStorageError as exc:
+        # Still serve the clip from the hot tier if it fits; it is only missing from the store.
+        current_app.logger.error("Storing dictionary audio failed: %s", exc)
+        stored = None
+    else:
+        with timed_stage("cap_check"):
+            cleanup_audio_store(current_app, store)
+    if hot_cache.put(cache_key, chunk.audio_content) is not None:
+        return jsonify({"audio_url": _hot_clip_url(cache_key), "cached": False}), 200
+    if stored is None:
+        return jsonify({"error": "Audio storage is unavailable; try again shortly."}), 502
     return jsonify({"audio_url": stored.url, "cached": False}), 200
 
 
+@dictionary_bp.route("/audio/<cache_key>", methods=["GET"])
+@login_required
+def audio(cache_key: str):
+    if not _SPEAK_CACHE_KEY.match(cache_key):
+        return jsonify({"error": "Not found"}), 404
+
+    hot_cache = _get_hot_clip_cache()
+    hot = hot_cache.get(cache_key)
+    if hot is not None:
+        content, etag = hot.content, hot.etag
+    else:
+        store = _audio_store()
+        stored = store.get_audio_by_key(cache_key, prefix="dict")
+        content = (store.read(stored.filename) or b"") if stored else b""
+        if not content:
+            return jsonify({"error": "Not found"}), 404
+        clip = hot_cache.put(cache_key, content)
+        # Blob names are the same content hash the hot cache uses as its ETag.
+        etag = clip.etag if clip else Path(stored.filename).stem
+
+    response = current_app.response_class(content, mimetype=sniff_mimetype(content))
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = _HOT_CLIP_MAX_AGE
+    response.cache_control.immutable = True
+    return response.make_conditional(request, accept_ranges=True, complete_length=len(content))
+
+
 def _serialize_result(result: DictionaryLookupResult) -> dict:
     def _serialize_candidate(candidate):
         return {
@@ -119,48 +386,173 @@ def _serialize_result(result: DictionaryLookupResult) -> dict:
     }
 
 
-def _get_dictionary_service() -> DictionaryLookupService:
+def _serialize_segmentation(segmentation: DictionarySegmentation, length: int) -> dict:
+    """Compact form: each distinct entry once, spans as [entry id, start, end], runs as
+    [start, end, [span ids, best first]]. Indexes outside every run have no match."""
+    entries: list[dict] = []
+    entry_ids: dict[tuple, int] = {}
+    spans: list[list[int]] = []
+    for candidate in segmentation.candidates:
+        key = (candidate.term, candidate.source, candidate.jyutping, candidate.definitions)
+        entry_id = entry_ids.get(key)
+        if entry_id is None:
+            entry_id = entry_ids[key] = len(entries)
+            entries.append(
+                {
+                    "term": candidate.term,
+                    "definitions": list(candidate.definitions),
+                    "source": candidate.source,
+                    "jyutping": candidate.jyutping,
+                }
+            )
+        spans.append([entry_id, candidate.start, candidate.end])
+
+    return {
+        "length": length,
+        "entries": entries,
+        "spans": spans,
+        "runs": [[start, end, list(ids)] for start, end, ids in segmentation.runs],
+    }
+
+
+def load_dictionary_service(app: Flask) -> DictionaryLookupService:
+    """Build (or reuse) `app`'s dictionary service and wait for it, e.g. to preload it."""
+    return get_dictionary_manager(app).wait().service
+
+
+def _get_dictionary() -> LoadedDictionary:
+    manager = get_dictionary_manager(current_app)
+    manager.watch()
+    try:
+        loaded = manager.current()
+    except DictionaryWarmingError:
+        DICTIONARY_CACHE.inc(cache="service", result="warming")
+        raise
+    DICTIONARY_CACHE.inc(cache="service", result="hit")
+    return loaded
+
+
+def _shards_match_dictionary(manifest_path: Path) -> bool:
+    try:
+        dictionary = _get_dictionary()
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (DictionaryUnavailableError, OSError, ValueError):
+        return False
+    return isinstance(manifest, dict) and bool(dictionary.version) and manifest.get("sources") == dictionary.version
+
+
+def _versioned_response(response, dictionary: LoadedDictionary, *parts: object):
+    """Cache a response that depends only on `parts` and the dictionary version: a year for
+    `?v=<version>` URLs, revalidation by ETag otherwise."""
+    key = "\x00".join(str(part) for part in (dictionary.version, *parts))
+    response.set_etag(hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest())
+    response.cache_control.private = True
+    if request.args.get("v") == dictionary.version:
+        response.cache_control.max_age = _VERSIONED_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def _dictionary_unavailable_response(exc: DictionaryUnavailableError):
+    if isinstance(exc, DictionaryWarmingError):
+        # Answer at once rather than holding a worker thread for the whole build.
+        response = jsonify({"error": str(exc), "code": "dictionary_warming"})
+        response.headers["Retry-After"] = "1"
+        return response, 503
+    return jsonify({"error": str(exc)}), 503
+
+
+def _document_from_payload(payload: dict) -> tuple[RegisteredDocument | None, tuple | None]:
+    """The payload's registered document (by `document_id`), or register its `text`."""
+    registry = _get_document_registry()
+    document_id = payload.get("document_id")
+    if document_id and not payload.get("text"):
+        document = registry.get(current_user.id, str(document_id))
+        if document is None:
+            return None, _unknown_document_response()
+        return document, None
+
+    normalized = str(payload.get("text") or "").replace("\r\n", "\n").replace("\r", "\n").strip()
+    if not normalized:
+        return None, (jsonify({"error": "text is required"}), 400)
+
+    max_chars = int(current_app.config.get("MAX_DICTIONARY_INPUT_CHARS", 12000))
+    if len(normalized) > max_chars:
+        return None, (jsonify({"error": f"Input exceeds max length ({max_chars})."}), 413)
+
+    record_size("input_chars", len(normalized))
+    return registry.register(current_user.id, normalized), None
+
+
+def _unknown_document_response():
+    # Expired, evicted, or registered with another worker: the client re-sends the text.
+    return jsonify({"error": "Unknown or expired document_id.", "code": "unknown_document"}), 404
+
+
+def _get_document_registry() -> DocumentRegistry:
     app = current_app
     expected_key = (
-        str(app.config.get("DICTIONARY_CC_CEDICT_PATH", "")),
-        str(app.config.get("DICTIONARY_CC_CANTO_PATH", "")),
+        int(app.config.get("DICTIONARY_DOCUMENT_REGISTRY_SIZE", 32)),
+        float(app.config.get("DICTIONARY_DOCUMENT_TTL_SECONDS", 1800)),
     )
+    ext = app.extensions.setdefault("dictionary_documents", {})
+    if ext.get("key") != expected_key:
+        ext["key"] = expected_key
+        ext["registry"] = DocumentRegistry(*expected_key)
+    return ext["registry"]
 
-    ext = app.extensions.setdefault("dictionary", {})
-    if ext.get("key") == expected_key and isinstance(ext.get("service"), DictionaryLookupService):
-        return ext["service"]
-
-    cedict_path = _resolve_path(expected_key[0])
-    canto_path = _resolve_path(expected_key[1])
-
-    missing: list[str] = []
-    if not cedict_path.exists():
-        missing.append(str(cedict_path))
-    if not canto_path.exists():
-        missing.append(str(canto_path))
-    if missing:
-        raise DictionaryUnavailableError(f"Dictionary files missing: {', '.join(missing)}")
-
-    loader = DictionaryLoader()
-    merged = loader.merge(
-        loader.load_file(cedict_path, source="cc-cedict"),
-        loader.load_file(canto_path, source="cc-canto"),
+
+def _segmentation_key(dictionary: LoadedDictionary, max_alternatives: int) -> tuple[int, int]:
+    # Segmentations are tied to the dictionary they were computed with.
+    return dictionary.generation, max_alternatives
+
+
+def _audio_store() -> AudioStore:
+    return AudioStore(
+        current_app.config.get("TEMP_AUDIO_DIR", "static/temp_audio"),
+        stats_dir=audio_stats_dir(current_app),
+        backend=audio_backend_from_config(current_app),
     )
-    service = DictionaryLookupService(merged)
 
-    ext["key"] = expected_key
-    ext["service"] = service
-    ext["term_count"] = len(merged)
-    return service
+
+def _refresh_hot_clip(cache_key: str, content: bytes, cost: int, audio_encoding: str) -> None:
+    """Report a hot-tier hit to the store: touch and journal it, or write it back if evicted."""
+    store = _audio_store()
+    if store.get_audio_by_key(cache_key, prefix="dict") is not None:
+        return
+    try:
+        store.save_audio_with_key(
+            content, cache_key=cache_key, prefix="dict", cost=cost, extension=extension_for(audio_encoding)
+        )
+    except AudioStorageError as exc:
+        current_app.logger.warning("Writing back hot dictionary audio failed: %s", exc)
+
+
+def _get_hot_clip_cache() -> HotClipCache:
+    app = current_app
+    expected_key = (
+        int(app.config.get("DICTIONARY_AUDIO_HOT_CACHE_BYTES", 8 * 1024 * 1024)),
+        int(app.config.get("DICTIONARY_AUDIO_HOT_CLIP_MAX_BYTES", 256 * 1024)),
+    )
+    ext = app.extensions.setdefault("dictionary_audio", {})
+    if ext.get("key") != expected_key:
+        ext["key"] = expected_key
+        ext["cache"] = HotClipCache(*expected_key)
+    return ext["cache"]
 
 
-def _resolve_path(path_value: str) -> Path:
-    path = Path(path_value)
-    if path.is_absolute():
-        return path
-    return Path(current_app.root_path) / path
+def _hot_clip_url(cache_key: str) -> str:
+    return url_for("dictionary.audio", cache_key=cache_key)
 
 
-def _dictionary_speak_cache_key(text: str, voice_name: str, voice_mode: str) -> str:
-    payload = f"{voice_mode}|{voice_name}|{text}".encode("utf-8")
+def _dictionary_speak_cache_key(
+    text: str, voice_name: str, voice_mode: str, audio_encoding: str = DEFAULT_AUDIO_ENCODING
+) -> str:
+    key = f"{voice_mode}|{voice_name}|{text}"
+    if audio_encoding != DEFAULT_AUDIO_ENCODING:
+        # MP3 keys predate the encoding option; keep them stable.
+        key = f"{key}|{audio_encoding}"
+    payload = key.encode("utf-8")
     return hashlib.sha256(payload).hexdigest()[:32]
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import hmac
+
+from flask import Blueprint, Response, abort, current_app, request
+
+from services.metrics import REGISTRY
+
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    if not bool(current_app.config.get("METRICS_ENABLED", True)):
+        abort(404)
+
+    token = str(current_app.config.get("METRICS_TOKEN", ""))
+    if token:
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied.encode("utf-8"), f"Bearer {token}".encode("utf-8")):
+            return Response("Unauthorized\n", status=401, mimetype="text/plain")
+
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
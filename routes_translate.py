@@ -5,6 +5,8 @@ import time
 from flask import Blueprint, current_app, jsonify, request
 from flask_login import login_required
 
+from services.metrics import TRANSLATION_REQUESTS, TRANSLATION_SECONDS
+from services.request_timing import record_size, timed_stage
 from services.translation_grok import GrokTranslationService, TranslationServiceError, TranslationTimeoutError
 
 
@@ -31,20 +33,25 @@ def translate():
         timeout_seconds=float(current_app.config.get("TRANSLATION_TIMEOUT_SECONDS", 20.0)),
     )
 
+    record_size("input_chars", len(normalized))
     started = time.monotonic()
     try:
-        result = service.translate_to_english(normalized)
+        with timed_stage("translate_upstream"):
+            result = service.translate_to_english(normalized)
     except TranslationTimeoutError as exc:
+        _record_translation("timeout", started)
         latency = int((time.monotonic() - started) * 1000)
         current_app.logger.warning("Translation timeout after %sms for %s chars", latency, len(normalized))
         return jsonify({"error": "Translation request timed out."}), 504
     except TranslationServiceError as exc:
+        _record_translation("error", started)
         latency = int((time.monotonic() - started) * 1000)
         current_app.logger.warning("Translation failed after %sms for %s chars: %s", latency, len(normalized), exc)
         if current_app.debug or current_app.config.get("TESTING"):
             return jsonify({"error": f"Translation failed: {exc}"}), 502
         return jsonify({"error": "Translation failed."}), 502
 
+    _record_translation("ok", started)
     latency = int((time.monotonic() - started) * 1000)
     current_app.logger.info("Translation success in %sms for %s chars", latency, len(normalized))
 
@@ -58,3 +65,8 @@ def translate():
         ),
         200,
     )
+
+
+def _record_translation(outcome: str, started: float) -> None:
+    TRANSLATION_REQUESTS.inc(outcome=outcome)
+    TRANSLATION_SECONDS.observe(time.monotonic() - started, outcome=outcome)
@@ -6,8 +6,12 @@ from flask import Blueprint, current_app, jsonify, request
 from flask_login import current_user, login_required
 
 from models import log_usage
-from services.audio_policy import cleanup_audio_store
+from services.audio_backends import AudioStorageError
+from services.audio_codec import DEFAULT_AUDIO_ENCODING, AudioMergeError, extension_for, merge_audio_chunks
+from services.audio_policy import audio_backend_from_config, audio_stats_dir, cleanup_audio_store
 from services.audio_store import AudioStore
+from services.metrics import TTS_CHUNKS_PER_REQUEST, TTS_HQ_SPLIT_RETRIES, TTS_REDUCED_FALLBACKS, TTS_REQUESTS
+from services.request_timing import record_size, timed_stage
 from services.ssml_builder import SSMLBuilder
 from services.tts_google import GoogleTTSWrapper, TTSServiceError
 
@@ -41,7 +45,9 @@ def synthesize():
     speaking_rate = max(0.5, min(2.0, speaking_rate))
 
     builder = SSMLBuilder()
-    normalized = builder.normalize_text(text)
+    with timed_stage("normalize"):
+        normalized = builder.normalize_text(text)
+    record_size("input_chars", len(normalized))
     if not normalized:
         return jsonify({"error": "text is required"}), 400
 
@@ -49,14 +55,27 @@ def synthesize():
     if len(normalized) > max_input_chars:
         return jsonify({"error": f"Input exceeds max length ({max_input_chars})."}), 413
 
-    tts = GoogleTTSWrapper(timeout_seconds=float(current_app.config.get("TTS_TIMEOUT_SECONDS", 20.0)))
-    if not tts.validate_voice(voice_name, voice_mode):
+    audio_encoding = str(current_app.config.get("TTS_AUDIO_ENCODING", DEFAULT_AUDIO_ENCODING))
+    tts = GoogleTTSWrapper(
+        timeout_seconds=float(current_app.config.get("TTS_TIMEOUT_SECONDS", 20.0)),
+        audio_encoding=audio_encoding,
+    )
+    with timed_stage("voice_check"):
+        valid_voice = tts.validate_voice(voice_name, voice_mode)
+    if not valid_voice:
         return jsonify({"error": "Unsupported voice_name"}), 400
 
-    store = AudioStore(current_app.config.get("TEMP_AUDIO_DIR", "static/temp_audio"))
-    cleanup_audio_store(current_app, store)
+    store = AudioStore(
+        current_app.config.get("TEMP_AUDIO_DIR", "static/temp_audio"),
+        stats_dir=audio_stats_dir(current_app),
+        backend=audio_backend_from_config(current_app),
+    )
 
-    tokens = builder.build_tokens(normalized)
+    # Separate spans, so Server-Timing does not count the Jyutping pass twice.
+    with timed_stage("tokenize"):
+        tokens = builder.build_tokens(normalized, with_jyutping=False)
+    with timed_stage("jyutping"):
+        builder.attach_jyutping(tokens)
 
     try:
         if voice_mode == "high_quality":
@@ -80,12 +99,28 @@ def synthesize():
             return jsonify({"error": f"TTS synthesis failed: {exc}"}), 502
         return jsonify({"error": "TTS synthesis failed."}), 502
 
-    merged_audio = b"".join(synthesis["audio_chunks"])
-    stored = store.save_audio(merged_audio)
-    cleanup_audio_store(current_app, store)
-
+    TTS_REQUESTS.inc(mode=voice_mode, sync_mode=synthesis["sync_mode"])
+    try:
+        with timed_stage("audio_merge"):
+            merged_audio = merge_audio_chunks(synthesis["audio_chunks"], audio_encoding)
+    except AudioMergeError as exc:
+        current_app.logger.exception("Merging synthesized audio failed: %s", exc)
+        return jsonify({"error": "TTS synthesis failed."}), 502
+    record_size("audio_bytes", len(merged_audio))
     non_whitespace_count = sum(1 for token in tokens if not token.char.isspace())
-    log_usage(current_user.id, non_whitespace_count, voice_name=voice_name)
+    try:
+        with timed_stage("audio_write"):
+            stored = store.save_audio(merged_audio, cost=len(normalized), extension=extension_for(audio_encoding))
+    except AudioStorageError as exc:
+        current_app.logger.error("Storing synthesized audio failed: %s", exc)
+        # The synthesis was billed even though the clip cannot be served.
+        log_usage(current_user.id, non_whitespace_count, voice_name=voice_name)
+        return jsonify({"error": "Audio storage is unavailable; try again shortly."}), 502
+    with timed_stage("cap_check"):
+        cleanup_audio_store(current_app, store)
+
+    with timed_stage("log_usage"):
+        log_usage(current_user.id, non_whitespace_count, voice_name=voice_name)
 
     if voice_mode == "high_quality":
         current_app.logger.info(
@@ -96,31 +131,41 @@ def synthesize():
             synthesis.get("hq_max_depth", 0),
         )
 
-    response = {
-        "audio_url": stored.url,
-        "duration_seconds": synthesis["duration_seconds"],
-        "timepoints": synthesis["timepoints"],
-        "tokens": [
+    with timed_stage("serialize"):
+        response = jsonify(
             {
-                "token_id": token.token_id,
-                "char": token.char,
-                "raw_index": token.raw_index,
-                "jyutping": token.jyutping,
+                "audio_url": stored.url,
+                "duration_seconds": synthesis["duration_seconds"],
+                "timepoints": synthesis["timepoints"],
+                "tokens": _serialize_tokens(tokens),
+                "mark_to_token": synthesis["mark_to_token"],
+                "sync_mode": synthesis["sync_mode"],
+                "sync_supported": synthesis["sync_supported"],
+                "voice_mode": voice_mode,
+                "jyutping_available": builder.jyutping_available,
             }
-            for token in tokens
-        ],
-        "mark_to_token": synthesis["mark_to_token"],
-        "sync_mode": synthesis["sync_mode"],
-        "sync_supported": synthesis["sync_supported"],
-        "voice_mode": voice_mode,
-        "jyutping_available": builder.jyutping_available,
-    }
-    return jsonify(response), 200
+        )
+    return response, 200
+
+
+def _serialize_tokens(tokens) -> list[dict[str, object]]:
+    return [
+        {
+            "token_id": token.token_id,
+            "char": token.char,
+            "raw_index": token.raw_index,
+            "jyutping": token.jyutping,
+        }
+        for token in tokens
+    ]
 
 
 def _synthesize_with_fallback(builder, tts, tokens, voice_name, speaking_rate):
     sync_mode = "full"
-    chunks = builder.build_token_chunks(tokens, mode="full")
+    with timed_stage("chunk_plan"):
+        chunks = builder.build_token_chunks(tokens, mode="full")
+    record_size("chunks", len(chunks))
+    TTS_CHUNKS_PER_REQUEST.observe(len(chunks), mode="standard")
 
     all_audio: list[bytes] = []
     all_timepoints: list[dict[str, float]] = []
@@ -130,8 +175,10 @@ def _synthesize_with_fallback(builder, tts, tokens, voice_name, speaking_rate):
     for chunk_index, chunk_tokens in enumerate(chunks):
         end_mark = f"chunk_end_{chunk_index}"
 
-        built_full = builder.build_ssml_for_chunk(chunk_tokens, mode="full")
-        full = tts.synthesize_ssml(_inject_end_mark(built_full.ssml, end_mark), voice_name, speaking_rate)
+        with timed_stage("ssml_build"):
+            built_full = builder.build_ssml_for_chunk(chunk_tokens, mode="full")
+        with timed_stage("tts_call"):
+            full = tts.synthesize_ssml(_inject_end_mark(built_full.ssml, end_mark), voice_name, speaking_rate)
         full_user_points, full_end_seconds = _split_timepoints(full.timepoints, end_mark)
 
         active_build = built_full
@@ -141,8 +188,12 @@ def _synthesize_with_fallback(builder, tts, tokens, voice_name, speaking_rate):
 
         degraded = built_full.mark_count > 0 and len(full_user_points) < max(1, int(built_full.mark_count * 0.6))
         if degraded:
-            built_reduced = builder.build_ssml_for_chunk(chunk_tokens, mode="reduced")
-            reduced = tts.synthesize_ssml(_inject_end_mark(built_reduced.ssml, end_mark), voice_name, speaking_rate)
+            TTS_REDUCED_FALLBACKS.inc()
+            with timed_stage("tts_fallback"):
+                built_reduced = builder.build_ssml_for_chunk(chunk_tokens, mode="reduced")
+                reduced = tts.synthesize_ssml(
+                    _inject_end_mark(built_reduced.ssml, end_mark), voice_name, speaking_rate
+                )
             reduced_user_points, reduced_end_seconds = _split_timepoints(reduced.timepoints, end_mark)
             if built_reduced.mark_count > 0 and len(reduced_user_points) < max(
                 1, int(built_reduced.mark_count * 0.6)
@@ -191,7 +242,10 @@ def _synthesize_high_quality(
     max_split_depth=8,
     max_tts_calls=128,
 ):
-    chunks = builder.build_text_chunks(tokens, target_max_bytes=target_max_bytes, hard_max_bytes=hard_max_bytes)
+    with timed_stage("chunk_plan"):
+        chunks = builder.build_text_chunks(tokens, target_max_bytes=target_max_bytes, hard_max_bytes=hard_max_bytes)
+    record_size("chunks", len(chunks))
+    TTS_CHUNKS_PER_REQUEST.observe(len(chunks), mode="high_quality")
     all_audio: list[bytes] = []
     context = HQSynthesisContext()
     for chunk_text in chunks:
@@ -237,7 +291,8 @@ def _synthesize_high_quality_chunk_with_retry(
     context.max_depth_seen = max(context.max_depth_seen, depth)
     context.total_calls += 1
     try:
-        chunk = tts.synthesize_text(chunk_text, voice_name)
+        with timed_stage("tts_call"):
+            chunk = tts.synthesize_text(chunk_text, voice_name)
         return [chunk.audio_content]
     except TTSServiceError as exc:
         if not _is_sentence_too_long_error(exc):
@@ -253,6 +308,7 @@ def _synthesize_high_quality_chunk_with_retry(
             raise
 
         context.split_retries += 1
+        TTS_HQ_SPLIT_RETRIES.inc()
         return _synthesize_high_quality_chunk_with_retry(
             tts,
             left,
@@ -9,12 +9,17 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from services.dictionary_compiled import CompiledDictionary, compile_dictionary
 from services.dictionary_loader import DictionaryLoader
+from services.dictionary_manager import DictionarySources
+from services.dictionary_shards import DEFAULT_SHARD_COUNT, build_shards
 
 
 DEFAULT_OUT_DIR = Path("data/dictionaries")
 DEFAULT_CEDICT_NAME = "cc-cedict.u8"
 DEFAULT_CANTO_NAME = "cc-canto.u8"
+DEFAULT_COMPILED_NAME = "dictionary.bin"
+DEFAULT_SHARDS_NAME = "shards"
 
 
 def _copy(src: Path, dst: Path) -> None:
@@ -35,12 +40,37 @@ def _validate(path: Path, source: str, min_terms: int) -> int:
     return term_count
 
 
+def _compile(cedict: Path, canto: Path, dst: Path) -> int:
+    # Same merge order as the runtime text loader: CC-CEDICT entries first, then CC-Canto.
+    loader = DictionaryLoader()
+    merged = loader.merge(
+        loader.load_file(cedict, source="cc-cedict"),
+        loader.load_file(canto, source="cc-canto"),
+    )
+    return compile_dictionary(merged, dst)
+
+
+def _shard(sources: DictionarySources, dst: Path, shard_count: int) -> int:
+    # Sharded from the compiled artifact, so the browser sees exactly what the server serves.
+    compiled = CompiledDictionary(sources.compiled_path)
+    try:
+        manifest = build_shards(
+            ((term, compiled.get(term)) for term in compiled),
+            dst,
+            shard_count=shard_count,
+            sources=sources.content_hash(),
+        )
+    finally:
+        compiled.close()
+    return len(manifest.shards)
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(
-        description="Copy and validate dictionary source files for local dictionary mode."
+        description="Copy, validate and compile dictionary source files for local dictionary mode."
     )
-    parser.add_argument("--cedict", required=True, help="Path to CC-CEDICT source file")
-    parser.add_argument("--cccanto", required=True, help="Path to CC-Canto source file")
+    parser.add_argument("--cedict", help="Path to CC-CEDICT source file (default: the copy in --out-dir)")
+    parser.add_argument("--cccanto", help="Path to CC-Canto source file (default: the copy in --out-dir)")
     parser.add_argument(
         "--out-dir",
         default=str(DEFAULT_OUT_DIR),
@@ -52,24 +82,48 @@ def main() -> int:
         default=1000,
         help="Minimum parsed term count required per file",
     )
+    parser.add_argument(
+        "--compiled",
+        help=f"Output path of the compiled dictionary (default: <out-dir>/{DEFAULT_COMPILED_NAME})",
+    )
+
+    parser.add_argument(
+        "--shards",
+        help=f"Output directory of the static browser shards (default: <out-dir>/{DEFAULT_SHARDS_NAME})",
+    )
+    parser.add_argument(
+        "--shard-count",
+        type=int,
+        default=DEFAULT_SHARD_COUNT,
+        help="Number of browser shards (terms are bucketed by leading character)",
+    )
 
     args = parser.parse_args()
 
-    cedict_src = Path(args.cedict)
-    canto_src = Path(args.cccanto)
     out_dir = Path(args.out_dir)
 
     cedict_dst = out_dir / DEFAULT_CEDICT_NAME
     canto_dst = out_dir / DEFAULT_CANTO_NAME
+    compiled_dst = Path(args.compiled) if args.compiled else out_dir / DEFAULT_COMPILED_NAME
+    shards_dst = Path(args.shards) if args.shards else out_dir / DEFAULT_SHARDS_NAME
 
-    _copy(cedict_src, cedict_dst)
-    _copy(canto_src, canto_dst)
+    if args.cedict:
+        _copy(Path(args.cedict), cedict_dst)
+    if args.cccanto:
+        _copy(Path(args.cccanto), canto_dst)
 
     cedict_terms = _validate(cedict_dst, source="cc-cedict", min_terms=args.min_terms)
     canto_terms = _validate(canto_dst, source="cc-canto", min_terms=args.min_terms)
 
     print(f"ok: {cedict_dst} terms={cedict_terms}")
     print(f"ok: {canto_dst} terms={canto_terms}")
+
+    compiled_terms = _compile(cedict_dst, canto_dst, compiled_dst)
+    print(f"ok: {compiled_dst} terms={compiled_terms}")
+
+    sources = DictionarySources(cedict_path=cedict_dst, canto_path=canto_dst, compiled_path=compiled_dst)
+    shard_files = _shard(sources, shards_dst, args.shard_count)
+    print(f"ok: {shards_dst} shards={shard_files}")
     return 0
 
 
@@ -0,0 +1,416 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Iterator
+from urllib import error, request
+from urllib.parse import quote, urlsplit
+
+from services.audio_codec import mimetype_for_name
+
+
+@dataclass(frozen=True, slots=True)
+class ObjectInfo:
+    name: str
+    mtime: float
+    size: int
+
+
+class AudioStorageError(OSError):
+    pass
+
+
+class AudioBackend(ABC):
+    """Where `AudioStore` keeps blobs and key refs.
+
+    Names are `/`-separated paths relative to the store root. `mtime` doubles as the
+    recency clock for TTL and eviction, so `touch` must move it forward on reuse.
+    """
+
+    # Identifies the shared store: one in-process index and one stats journal per key.
+    key: str = ""
+
+    @abstractmethod
+    def stat(self, name: str) -> ObjectInfo | None:
+        ...
+
+    @abstractmethod
+    def touch(self, name: str) -> ObjectInfo | None:
+        ...
+
+    @abstractmethod
+    def write(self, name: str, content: bytes) -> ObjectInfo:
+        ...
+
+    @abstractmethod
+    def read(self, name: str) -> bytes | None:
+        ...
+
+    @abstractmethod
+    def delete(self, name: str) -> bool:
+        ...
+
+    @abstractmethod
+    def list(self) -> Iterator[ObjectInfo]:
+        ...
+
+    def generation(self) -> object:
+        """Changes when the underlying store is replaced wholesale (forces a re-scan)."""
+        return None
+
+    def local_path(self, name: str) -> Path | None:
+        """Path the web tier can serve directly, or None for remote backends."""
+        return None
+
+    def download_url(self, name: str) -> str | None:
+        """Absolute URL a browser can fetch `name` from, for backends served elsewhere."""
+        return None
+
+    @property
+    def download_max_age(self) -> int:
+        """How long a redirect to `download_url` may be cached by the browser."""
+        return 0
+
+
+class FilesystemBackend(AudioBackend):
+    """One local (or shared-volume) directory; the default backend."""
+
+    def __init__(self, root_dir: str | Path) -> None:
+        self.root = Path(root_dir)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.key = str(self.root.resolve())
+
+    def stat(self, name: str) -> ObjectInfo | None:
+        try:
+            stat = (self.root / name).stat()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return ObjectInfo(name, stat.st_mtime, stat.st_size)
+
+    def touch(self, name: str) -> ObjectInfo | None:
+        now_ts = datetime.now(UTC).timestamp()
+        try:
+            os.utime(self.root / name, (now_ts, now_ts))
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return self.stat(name)
+
+    def write(self, name: str, content: bytes) -> ObjectInfo:
+        path = self.root / name
+        path.parent.mkdir(exist_ok=True)
+        # Write-then-rename so concurrent writers and readers never see a partial file.
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, path)
+        stat = path.stat()
+        return ObjectInfo(name, stat.st_mtime, stat.st_size)
+
+    def read(self, name: str) -> bytes | None:
+        try:
+            return (self.root / name).read_bytes()
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            return None
+
+    def delete(self, name: str) -> bool:
+        try:
+            (self.root / name).unlink()
+        except FileNotFoundError:
+            return False
+        return True
+
+    def list(self) -> Iterator[ObjectInfo]:
+        # Flat files at the top level plus one level of shard directories.
+        yield from self._scan(self.root, "", depth=1)
+
+    def generation(self) -> object:
+        try:
+            stat = self.root.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_dev, stat.st_ino)
+
+    def local_path(self, name: str) -> Path | None:
+        path = self.root / name
+        return path if path.is_file() else None
+
+    def _scan(self, directory: Path, prefix: str, depth: int) -> Iterator[ObjectInfo]:
+        try:
+            scanner = os.scandir(directory)
+        except FileNotFoundError:
+            return
+        with scanner:
+            for entry in scanner:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    if entry.is_dir():
+                        if depth:
+                            yield from self._scan(Path(entry.path), f"{prefix}{entry.name}/", depth - 1)
+                        continue
+                    file_stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield ObjectInfo(prefix + entry.name, file_stat.st_mtime, file_stat.st_size)
+
+
+class S3Backend(AudioBackend):
+    """An S3-compatible bucket (AWS S3, MinIO, R2, ...) shared by every app node.
+
+    Requests use path-style addressing and Signature Version 4. Object
+    `LastModified` is the recency clock: `touch` re-copies an object onto itself,
+    at most once per `TOUCH_INTERVAL_SECONDS`, which is far below any useful TTL.
+    Browsers fetch audio from the bucket directly, through `public_base_url` or a
+    presigned GET URL.
+    """
+
+    TOUCH_INTERVAL_SECONDS = 300.0
+    LIST_PAGE_SIZE = 1000
+
+    def __init__(
+        self,
+        endpoint: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        prefix: str = "",
+        public_base_url: str = "",
+        url_ttl_seconds: int = 3600,
+        timeout_seconds: float = 10.0,
+    ) -> None:
+        if not bucket:
+            raise ValueError("S3 audio storage needs a bucket name")
+        self.endpoint = endpoint.rstrip("/")
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region or "us-east-1"
+        self.prefix = f"{prefix.strip('/')}/" if prefix.strip("/") else ""
+        self.public_base_url = public_base_url.rstrip("/")
+        self.url_ttl_seconds = max(1, min(int(url_ttl_seconds), 7 * 24 * 3600))
+        self.timeout_seconds = timeout_seconds
+        self.key = f"s3:{self.endpoint}/{self.bucket}/{self.prefix}"
+
+    def stat(self, name: str) -> ObjectInfo | None:
+        response = self._request("HEAD", self._object_path(name), missing_ok=True)
+        if response is None:
+            return None
+        headers, _body = response
+        mtime = parsedate_to_datetime(headers["Last-Modified"]).timestamp()
+        return ObjectInfo(name, mtime, int(headers.get("Content-Length") or 0))
+
+    def touch(self, name: str) -> ObjectInfo | None:
+        info = self.stat(name)
+        now_ts = time.time()
+        if info is None or now_ts - info.mtime < self.TOUCH_INTERVAL_SECONDS:
+            return info
+        copied = self._request(
+            "PUT",
+            self._object_path(name),
+            headers={
+                "x-amz-copy-source": quote(f"/{self.bucket}/{self.prefix}{name}", safe="/~"),
+                "x-amz-metadata-directive": "REPLACE",
+                "content-type": _content_type(name),
+            },
+            missing_ok=True,
+        )
+        if copied is None:
+            return None
+        return ObjectInfo(name, now_ts, info.size)
+
+    def write(self, name: str, content: bytes) -> ObjectInfo:
+        self._request(
+            "PUT",
+            self._object_path(name),
+            body=content,
+            headers={"content-type": _content_type(name)},
+        )
+        return ObjectInfo(name, time.time(), len(content))
+
+    def read(self, name: str) -> bytes | None:
+        response = self._request("GET", self._object_path(name), missing_ok=True)
+        return None if response is None else response[1]
+
+    def delete(self, name: str) -> bool:
+        # S3 deletes are idempotent and do not say whether the object existed.
+        return self._request("DELETE", self._object_path(name), missing_ok=True) is not None
+
+    def list(self) -> Iterator[ObjectInfo]:
+        token = ""
+        while True:
+            query = {"list-type": "2", "max-keys": str(self.LIST_PAGE_SIZE)}
+            if self.prefix:
+                query["prefix"] = self.prefix
+            if token:
+                query["continuation-token"] = token
+            _headers, body = self._request("GET", f"/{self.bucket}", query=query)
+            root = ET.fromstring(body)
+            for item in root.iter():
+                if _local_tag(item.tag) != "Contents":
+                    continue
+                fields = {_local_tag(child.tag): child.text or "" for child in item}
+                key = fields.get("Key", "")
+                if not key.startswith(self.prefix):
+                    continue
+                modified = datetime.fromisoformat(fields.get("LastModified", "").replace("Z", "+00:00"))
+                yield ObjectInfo(key[len(self.prefix) :], modified.timestamp(), int(fields.get("Size") or 0))
+            truncated = _child_text(root, "IsTruncated") == "true"
+            token = _child_text(root, "NextContinuationToken")
+            if not truncated or not token:
+                return
+
+    def download_url(self, name: str) -> str | None:
+        if self.public_base_url:
+            return f"{self.public_base_url}/{quote(name, safe='/~')}"
+        host, path = urlsplit(self.endpoint).netloc, self._object_path(name)
+        query = sigv4_presign_query(
+            "GET",
+            host,
+            path,
+            access_key=self.access_key,
+            secret_key=self.secret_key,
+            region=self.region,
+            expires=self.url_ttl_seconds,
+            now=datetime.now(UTC),
+        )
+        return f"{self.endpoint}{quote(path, safe='/~')}?{_canonical_query(query)}"
+
+    @property
+    def download_max_age(self) -> int:
+        # Presigned URLs expire, so the redirect must not outlive them.
+        return 365 * 24 * 3600 if self.public_base_url else self.url_ttl_seconds // 2
+
+    def _object_path(self, name: str) -> str:
+        return f"/{self.bucket}/{self.prefix}{name}"
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        query: dict[str, str] | None = None,
+        body: bytes = b"",
+        headers: dict[str, str] | None = None,
+        missing_ok: bool = False,
+    ) -> tuple[dict[str, str], bytes] | None:
+        query = query or {}
+        host = urlsplit(self.endpoint).netloc
+        signed = {key.lower(): value for key, value in (headers or {}).items()}
+        signed["host"] = host
+        signed["x-amz-content-sha256"] = hashlib.sha256(body).hexdigest()
+        signed["x-amz-date"] = datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ")
+        signed["authorization"] = sigv4_authorization(
+            method,
+            path,
+            query,
+            signed,
+            payload_hash=signed["x-amz-content-sha256"],
+            access_key=self.access_key,
+            secret_key=self.secret_key,
+            region=self.region,
+        )
+        url = f"{self.endpoint}{quote(path, safe='/~')}"
+        if query:
+            url = f"{url}?{_canonical_query(query)}"
+        outgoing = {key: value for key, value in signed.items() if key != "host"}
+        req = request.Request(url, data=body if method == "PUT" else None, headers=outgoing, method=method)
+        try:
+            with request.urlopen(req, timeout=self.timeout_seconds) as response:
+                return dict(response.headers.items()), response.read()
+        except error.HTTPError as exc:
+            if missing_ok and exc.code == 404:
+                return None
+            raise AudioStorageError(f"S3 {method} {path} failed with HTTP {exc.code}") from exc
+        except (error.URLError, TimeoutError) as exc:
+            raise AudioStorageError(f"S3 {method} {path} failed: {exc}") from exc
+
+
+def sigv4_authorization(
+    method: str,
+    path: str,
+    query: dict[str, str],
+    headers: dict[str, str],
+    payload_hash: str,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    service: str = "s3",
+) -> str:
+    """`Authorization` header value for a request; `headers` must include host and x-amz-date."""
+    headers = {key.lower(): " ".join(str(value).split()) for key, value in headers.items()}
+    amz_date = headers["x-amz-date"]
+    signed_headers = ";".join(sorted(headers))
+    canonical_headers = "".join(f"{key}:{headers[key]}\n" for key in sorted(headers))
+    canonical_request = "\n".join(
+        [method, quote(path, safe="/~"), _canonical_query(query), canonical_headers, signed_headers, payload_hash]
+    )
+    scope = f"{amz_date[:8]}/{region}/{service}/aws4_request"
+    signature = _sigv4_signature(secret_key, amz_date, scope, canonical_request)
+    return f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, SignedHeaders={signed_headers}, Signature={signature}"
+
+
+def sigv4_presign_query(
+    method: str,
+    host: str,
+    path: str,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    expires: int,
+    now: datetime,
+    service: str = "s3",
+) -> dict[str, str]:
+    """Query parameters (including the signature) for a presigned URL."""
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    scope = f"{amz_date[:8]}/{region}/{service}/aws4_request"
+    query = {
+        "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+        "X-Amz-Credential": f"{access_key}/{scope}",
+        "X-Amz-Date": amz_date,
+        "X-Amz-Expires": str(int(expires)),
+        "X-Amz-SignedHeaders": "host",
+    }
+    canonical_request = "\n".join(
+        [method, quote(path, safe="/~"), _canonical_query(query), f"host:{host}\n", "host", "UNSIGNED-PAYLOAD"]
+    )
+    query["X-Amz-Signature"] = _sigv4_signature(secret_key, amz_date, scope, canonical_request)
+    return query
+
+
+def _sigv4_signature(secret_key: str, amz_date: str, scope: str, canonical_request: str) -> str:
+    string_to_sign = "\n".join(
+        ["AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()]
+    )
+    key = f"AWS4{secret_key}".encode("utf-8")
+    for part in scope.split("/"):
+        key = hmac.new(key, part.encode("utf-8"), hashlib.sha256).digest()
+    return hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def _canonical_query(query: dict[str, str]) -> str:
+    return "&".join(
+        f"{quote(key, safe='-_.~')}={quote(value, safe='-_.~')}" for key, value in sorted(query.items())
+    )
+
+
+def _content_type(name: str) -> str:
+    return "text/plain; charset=utf-8" if name.endswith(".ref") else mimetype_for_name(name)
+
+
+def _local_tag(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child_text(element: ET.Element, name: str) -> str:
+    for child in element:
+        if _local_tag(child.tag) == name:
+            return (child.text or "").strip()
+    return ""
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import struct
+import zlib
+from dataclasses import dataclass
+
+
+# Encoding name -> (file extension, MIME type). MP3 stays the default everywhere.
+AUDIO_ENCODINGS = {
+    "mp3": (".mp3", "audio/mpeg"),
+    "ogg_opus": (".ogg", "audio/ogg"),
+}
+DEFAULT_AUDIO_ENCODING = "mp3"
+
+_OGG_CAPTURE = b"OggS"
+_OGG_HEADER = struct.Struct("<4sBBqIIIB")
+_FLAG_BOS = 0x02
+_FLAG_EOS = 0x04
+_NO_GRANULE = -1
+_OPUS_HEADER_PACKETS = 2  # OpusHead + OpusTags
+
+
+class AudioMergeError(ValueError):
+    pass
+
+
+def extension_for(encoding: str) -> str:
+    return AUDIO_ENCODINGS.get(encoding, AUDIO_ENCODINGS[DEFAULT_AUDIO_ENCODING])[0]
+
+
+def mimetype_for_name(filename: str) -> str:
+    for extension, mimetype in AUDIO_ENCODINGS.values():
+        if filename.endswith(extension):
+            return mimetype
+    return AUDIO_ENCODINGS[DEFAULT_AUDIO_ENCODING][1]
+
+
+def sniff_mimetype(content: bytes) -> str:
+    return "audio/ogg" if content.startswith(_OGG_CAPTURE) else "audio/mpeg"
+
+
+def merge_audio_chunks(chunks: list[bytes], encoding: str = DEFAULT_AUDIO_ENCODING) -> bytes:
+    """Join per-request synthesis chunks into one playable file.
+
+    MP3 frames are self-delimiting, so MP3 chunks are concatenated. Ogg Opus
+    chunks are complete logical streams and are spliced into one stream.
+    """
+    if encoding == "ogg_opus" and len(chunks) > 1:
+        return merge_ogg_opus(chunks)
+    return b"".join(chunks)
+
+
+@dataclass(slots=True)
+class OggPage:
+    flags: int
+    granule: int
+    serial: int
+    sequence: int
+    lacing: bytes
+    body: bytes
+
+    def completed_packets(self) -> int:
+        return sum(1 for value in self.lacing if value < 255)
+
+
+def parse_ogg_pages(data: bytes) -> list[OggPage]:
+    pages = []
+    offset = 0
+    while offset < len(data):
+        if len(data) - offset < _OGG_HEADER.size:
+            raise AudioMergeError("truncated Ogg page header")
+        capture, version, flags, granule, serial, sequence, _crc, segments = _OGG_HEADER.unpack_from(data, offset)
+        if capture != _OGG_CAPTURE or version != 0:
+            raise AudioMergeError("not an Ogg stream")
+        lacing_start = offset + _OGG_HEADER.size
+        lacing = data[lacing_start : lacing_start + segments]
+        body_start = lacing_start + segments
+        body_end = body_start + sum(lacing)
+        if len(lacing) != segments or body_end > len(data):
+            raise AudioMergeError("truncated Ogg page")
+        pages.append(OggPage(flags, granule, serial, sequence, lacing, data[body_start:body_end]))
+        offset = body_end
+    return pages
+
+
+def write_ogg_page(page: OggPage) -> bytes:
+    header = _OGG_HEADER.pack(
+        _OGG_CAPTURE, 0, page.flags, page.granule, page.serial, page.sequence, 0, len(page.lacing)
+    )
+    raw = header + page.lacing + page.body
+    crc = _ogg_crc(raw)
+    return raw[:22] + struct.pack("<I", crc) + raw[26:]
+
+
+def opus_packet_samples(packet: bytes) -> int:
+    """Decoded length of one Opus packet at 48 kHz, from its TOC byte (RFC 6716 3.1)."""
+    if not packet:
+        return 0
+    toc = packet[0]
+    config = toc >> 3
+    if config < 12:
+        frame_samples = (480, 960, 1920, 2880)[config % 4]
+    elif config < 16:
+        frame_samples = (480, 960)[config % 2]
+    else:
+        frame_samples = (120, 240, 480, 960)[config % 4]
+    code = toc & 0x03
+    if code == 0:
+        frames = 1
+    elif code in (1, 2):
+        frames = 2
+    else:
+        frames = packet[1] & 0x3F if len(packet) > 1 else 0
+    return frames * frame_samples
+
+
+def merge_ogg_opus(chunks: list[bytes]) -> bytes:
+    """Splice several single-stream Ogg Opus files into one logical stream.
+
+    The first chunk's header pages (OpusHead, OpusTags) are kept; later chunks'
+    headers are dropped. Every audio page is re-stamped with the first stream's
+    serial, a continuous sequence number and a granule position recomputed from the
+    packets' TOC bytes, and only the final page carries EOS. Each later chunk's
+    encoder pre-roll (a few ms) is played rather than skipped, since pre-skip only
+    applies at the start of a stream.
+    """
+    output: list[bytes] = []
+    serial = None
+    sequence = 0
+    granule = 0
+    audio_pages: list[OggPage] = []
+
+    for index, chunk in enumerate(chunks):
+        pages = parse_ogg_pages(chunk)
+        headers_done = 0
+        for page in pages:
+            if headers_done < _OPUS_HEADER_PACKETS:
+                headers_done += page.completed_packets()
+                if index == 0:
+                    if serial is None:
+                        serial = page.serial
+                        granule = _opus_pre_skip(page.body)
+                    page.serial = serial
+                    page.sequence = sequence
+                    page.flags &= ~_FLAG_EOS
+                    output.append(write_ogg_page(page))
+                    sequence += 1
+                continue
+            audio_pages.append(page)
+
+        if headers_done < _OPUS_HEADER_PACKETS:
+            raise AudioMergeError(f"chunk {index} has no Opus headers")
+
+    pending = b""
+    for position, page in enumerate(audio_pages):
+        cursor = 0
+        ended = False
+        for value in page.lacing:
+            pending += page.body[cursor : cursor + value]
+            cursor += value
+            if value < 255:
+                granule += opus_packet_samples(pending)
+                pending = b""
+                ended = True
+        page.serial = serial
+        page.sequence = sequence
+        page.granule = granule if ended else _NO_GRANULE
+        page.flags &= ~(_FLAG_BOS | _FLAG_EOS)
+        if position == len(audio_pages) - 1:
+            page.flags |= _FLAG_EOS
+        output.append(write_ogg_page(page))
+        sequence += 1
+    return b"".join(output)
+
+
+def build_ogg_opus(packets: list[bytes], serial: int = 1, pre_skip: int = 312, sample_rate: int = 48000) -> bytes:
+    """Minimal mono Ogg Opus file (one packet per page), e.g. for local stand-ins and tests."""
+    head = b"OpusHead" + struct.pack("<BBHIhB", 1, 1, pre_skip, sample_rate, 0, 0)
+    vendor = b"speak-in-canto"
+    tags = b"OpusTags" + struct.pack("<I", len(vendor)) + vendor + struct.pack("<I", 0)
+    pages = [
+        OggPage(_FLAG_BOS, 0, serial, 0, _lacing_for(head), head),
+        OggPage(0, 0, serial, 1, _lacing_for(tags), tags),
+    ]
+    granule = pre_skip
+    for index, packet in enumerate(packets):
+        granule += opus_packet_samples(packet)
+        flags = _FLAG_EOS if index == len(packets) - 1 else 0
+        pages.append(OggPage(flags, granule, serial, index + 2, _lacing_for(packet), packet))
+    return b"".join(write_ogg_page(page) for page in pages)
+
+
+def _lacing_for(packet: bytes) -> bytes:
+    full, rest = divmod(len(packet), 255)
+    return bytes([255] * full + [rest])
+
+
+def _opus_pre_skip(head: bytes) -> int:
+    if not head.startswith(b"OpusHead") or len(head) < 12:
+        raise AudioMergeError("first page is not an OpusHead packet")
+    return struct.unpack_from("<H", head, 10)[0]
+
+
+# Ogg's CRC-32 is the unreflected form of zlib's polynomial with zero init/xorout, so
+# bit-reverse the input bytes, let zlib do the work in C, and bit-reverse the result.
+_REVERSED_BITS = bytes(int(f"{value:08b}"[::-1], 2) for value in range(256))
+
+
+def _ogg_crc(data: bytes) -> int:
+    reflected = zlib.crc32(data.translate(_REVERSED_BITS), 0xFFFFFFFF) ^ 0xFFFFFFFF
+    return int(f"{reflected:032b}"[::-1], 2)
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+
+_MIB = 1024 * 1024
+EVICTION_POLICIES = ("lru", "gdsf", "greedy_dual_size")
+
+
+@dataclass(slots=True)
+class ClipStats:
+    hits: int = 0
+    # Billed characters it took to synthesize the clip (what a re-create would cost).
+    cost: float = 1.0
+
+
+class EvictionPolicy:
+    """Plain LRU: the least recently written or reused clip goes first.
+
+    Policies compare equal when they rank clips the same way, so a store can keep
+    its priority heap across calls that each build a fresh policy from config.
+    """
+
+    name = "lru"
+
+    def __eq__(self, other: object) -> bool:
+        return type(other) is type(self) and other._params() == self._params()  # type: ignore[attr-defined]
+
+    def __hash__(self) -> int:
+        return hash((type(self), self._params()))
+
+    def _params(self) -> tuple:
+        return ()
+
+    def priority(self, mtime: float, size: int, stats: ClipStats | None) -> float:
+        return mtime
+
+
+class GreedyDualSizePolicy(EvictionPolicy):
+    """GreedyDual-Size-Frequency, using wall-clock time as the inflation clock.
+
+    A clip's priority is its last access time plus `credit_seconds` for every
+    (hit x billed character) per MiB it occupies, so small, frequently replayed,
+    expensive clips outlive large one-off documents. Because the clock is the file
+    mtime rather than an in-memory counter, any worker can recompute the same
+    priorities from the directory and the stats journal.
+    """
+
+    name = "gdsf"
+
+    def __init__(self, credit_seconds: float = 1.0) -> None:
+        self.credit_seconds = max(0.0, float(credit_seconds))
+
+    def priority(self, mtime: float, size: int, stats: ClipStats | None) -> float:
+        stats = stats or ClipStats()
+        value = (1 + stats.hits) * stats.cost * _MIB / max(size, 1)
+        return mtime + self.credit_seconds * value
+
+    def _params(self) -> tuple:
+        return (self.credit_seconds,)
+
+
+def get_eviction_policy(name: str, credit_seconds: float = 1.0) -> EvictionPolicy:
+    normalized = (name or "lru").strip().lower()
+    if normalized == "lru":
+        return EvictionPolicy()
+    if normalized in EVICTION_POLICIES[1:]:
+        return GreedyDualSizePolicy(credit_seconds=credit_seconds)
+    raise ValueError(f"Unknown audio eviction policy: {name}")
+
+
+def store_file_key(audio_root: Path | str) -> str:
+    """Short stable name for files kept about one store outside its directory.
+
+    `audio_root` is a directory, or the backend key of a shared (e.g. S3) store.
+    """
+    store_key = str(audio_root.resolve()) if isinstance(audio_root, Path) else audio_root
+    return hashlib.sha1(store_key.encode("utf-8")).hexdigest()[:16]
+
+
+class AudioStatsJournal:
+    """Hit counts and synthesis costs for one audio store, shared by all workers.
+
+    Workers append one short line per put/hit/miss to `<key>.log` (O_APPEND writes of
+    a single line do not interleave); the janitor periodically folds the journal into
+    `<key>.json`, dropping clips that no longer exist. The files live outside the
+    audio directory so the static route never serves the list of clip names.
+    """
+
+    def __init__(self, stats_dir: str | Path, audio_root: Path | str) -> None:
+        self.directory = Path(stats_dir)
+        key = store_file_key(audio_root)
+        self.snapshot_path = self.directory / f"{key}.json"
+        self.journal_path = self.directory / f"{key}.log"
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def record_put(self, filename: str, cost: float) -> None:
+        self._append(f"p\t{filename}\t{float(cost):g}\n")
+
+    def record_hit(self, filename: str) -> None:
+        self._append(f"h\t{filename}\n")
+
+    def record_miss(self, filename: str) -> None:
+        self._append(f"m\t{filename}\n")
+
+    def record_ref(self, ref_name: str, filename: str) -> None:
+        self._append(f"r\t{ref_name}\t{filename}\n")
+
+    def position(self) -> tuple[int, int]:
+        """Where the journal currently ends, as `(inode, offset)`, for `changed_since`."""
+        try:
+            stat = self.journal_path.stat()
+        except FileNotFoundError:
+            return 0, 0
+        return stat.st_ino, stat.st_size
+
+    def changed_since(
+        self, position: tuple[int, int]
+    ) -> tuple[set[str], dict[str, str], tuple[int, int]]:
+        """Clips put or hit after `position`, key refs written since (ref -> clip), and
+        the position to continue from.
+
+        Only complete lines are consumed. `compact` rotates the journal, so a journal
+        with another inode is read from the start.
+        """
+        names: set[str] = set()
+        refs: dict[str, str] = {}
+        try:
+            handle = open(self.journal_path, "rb")
+        except FileNotFoundError:
+            return names, refs, (0, 0)
+        with handle:
+            inode = os.fstat(handle.fileno()).st_ino
+            offset = position[1] if position[0] == inode else 0
+            handle.seek(offset)
+            data = handle.read()
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].decode("utf-8", "replace").splitlines():
+            parts = line.split("\t")
+            if len(parts) >= 2 and parts[0] in ("p", "h"):
+                names.add(parts[1])
+            elif len(parts) == 3 and parts[0] == "r":
+                refs[parts[1]] = parts[2]
+        return names, refs, (inode, offset + end)
+
+    def load(self) -> tuple[dict[str, ClipStats], dict[str, int]]:
+        clips, totals = self._read_snapshot()
+        self._fold(self.journal_path, clips, totals)
+        return clips, totals
+
+    def compact(self, live_names: set[str]) -> tuple[dict[str, ClipStats], dict[str, int]]:
+        rotated = self.journal_path.with_name(f"{self.journal_path.name}.{os.getpid()}")
+        try:
+            os.replace(self.journal_path, rotated)
+        except FileNotFoundError:
+            rotated = None
+        clips, totals = self._read_snapshot()
+        if rotated is not None:
+            self._fold(rotated, clips, totals)
+        clips = {name: stats for name, stats in clips.items() if name in live_names}
+
+        payload = {
+            "totals": totals,
+            "clips": {name: [stats.hits, stats.cost] for name, stats in clips.items()},
+        }
+        tmp_path = self.snapshot_path.with_name(f".{self.snapshot_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp_path, self.snapshot_path)
+        if rotated is not None:
+            rotated.unlink(missing_ok=True)
+        return clips, totals
+
+    def _append(self, line: str) -> None:
+        try:
+            fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        except OSError:
+            return
+        try:
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+
+    def _read_snapshot(self) -> tuple[dict[str, ClipStats], dict[str, int]]:
+        totals = {"hits": 0, "misses": 0}
+        try:
+            payload = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}, totals
+        totals.update({key: int(payload.get("totals", {}).get(key, 0)) for key in totals})
+        clips = {
+            name: ClipStats(hits=int(hits), cost=float(cost))
+            for name, (hits, cost) in payload.get("clips", {}).items()
+        }
+        return clips, totals
+
+    def _fold(self, path: Path, clips: dict[str, ClipStats], totals: dict[str, int]) -> None:
+        try:
+            handle = open(path, encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with handle:
+            for line in handle:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) < 2:
+                    continue
+                kind, name = parts[0], parts[1]
+                if kind == "p" and len(parts) == 3:
+                    try:
+                        cost = float(parts[2])
+                    except ValueError:
+                        continue
+                    previous = clips.get(name)
+                    if previous is None:
+                        clips[name] = ClipStats(cost=cost)
+                    else:
+                        previous.cost = max(previous.cost, cost)
+                elif kind == "h":
+                    clips.setdefault(name, ClipStats()).hits += 1
+                    totals["hits"] += 1
+                elif kind == "m":
+                    totals["misses"] += 1
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class HotClip:
+    content: bytes
+    etag: str
+
+
+class HotClipCache:
+    """Bounded per-process LRU of small audio clips, keyed by cache key.
+
+    Clips are written through to the `AudioStore` by the caller; this only keeps
+    the bytes (and a strong ETag) so repeat requests skip the filesystem. Callers
+    report hits back to the store at most once per `REFRESH_INTERVAL_SECONDS` per
+    clip (see `claim_refresh`), which keeps its TTL clock and hit stats current.
+    """
+
+    REFRESH_INTERVAL_SECONDS = 60.0
+
+    def __init__(self, max_bytes: int, max_clip_bytes: int) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self.max_clip_bytes = max(0, int(max_clip_bytes))
+        self.total_bytes = 0
+        self._clips: OrderedDict[str, HotClip] = OrderedDict()
+        self._refreshed: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.max_clip_bytes > 0
+
+    def __len__(self) -> int:
+        return len(self._clips)
+
+    def get(self, key: str) -> HotClip | None:
+        with self._lock:
+            clip = self._clips.get(key)
+            if clip is not None:
+                self._clips.move_to_end(key)
+            return clip
+
+    def claim_refresh(self, key: str) -> bool:
+        """True if the caller should report a hit on `key` to the backing store now."""
+        now = time.monotonic()
+        with self._lock:
+            if key not in self._clips or now - self._refreshed.get(key, now) < self.REFRESH_INTERVAL_SECONDS:
+                return False
+            self._refreshed[key] = now
+            return True
+
+    def put(self, key: str, content: bytes) -> HotClip | None:
+        """Cache `content` if it is small enough; returns the cached clip or None."""
+        size = len(content)
+        if not self.enabled or size > self.max_clip_bytes or size > self.max_bytes:
+            return None
+        clip = HotClip(content=content, etag=hashlib.blake2b(content, digest_size=16).hexdigest())
+        with self._lock:
+            previous = self._clips.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= len(previous.content)
+            self._clips[key] = clip
+            # The caller has just read or written the clip through the store.
+            self._refreshed[key] = time.monotonic()
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                evicted_key, evicted = self._clips.popitem(last=False)
+                self._refreshed.pop(evicted_key, None)
+                self.total_bytes -= len(evicted.content)
+        return clip
@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import fcntl
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from flask import Flask
+
+from services.audio_backends import AudioBackend, AudioStorageError
+from services.audio_eviction import EvictionPolicy, store_file_key
+from services.audio_policy import audio_backend_from_config, audio_stats_dir, eviction_policy_from_config
+from services.audio_store import AudioStore
+
+
+LOCK_SUFFIX = ".janitor.lock"
+LEASE_NAME = "janitor.lease"
+
+_janitor: AudioJanitor | None = None
+_janitor_lock = threading.Lock()
+
+
+class BucketLease:
+    """A leader lease kept as an object in a shared bucket.
+
+    S3 has no locks, so the holder rewrites the lease with a fresh expiry on every
+    pass and reads it back; a node whose token did not survive the read-back lost
+    the race. Other nodes take over once the lease has expired. Two nodes can
+    overlap for at most one pass, which is harmless because deletes are idempotent.
+    """
+
+    def __init__(
+        self,
+        backend: AudioBackend,
+        ttl_seconds: float,
+        name: str = LEASE_NAME,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self.logger = logger or logging.getLogger(__name__)
+        self.token = uuid.uuid4().hex
+        self.held = False
+
+    def acquire(self) -> bool:
+        """Take or renew the lease; False while another node holds an unexpired one."""
+        now = time.time()
+        try:
+            current = self._read()
+            if current is not None and current[0] != self.token and current[1] > now:
+                self.held = False
+                return False
+            self.backend.write(self.name, f"{self.token} {now + self.ttl_seconds:.3f}\n".encode("ascii"))
+            confirmed = self._read()
+        except AudioStorageError as exc:
+            self.logger.warning("Audio janitor lease check failed: %s", exc)
+            self.held = False
+            return False
+        self.held = confirmed is not None and confirmed[0] == self.token
+        return self.held
+
+    def release(self) -> None:
+        if not self.held:
+            return
+        self.held = False
+        try:
+            current = self._read()
+            if current is not None and current[0] == self.token:
+                self.backend.delete(self.name)
+        except AudioStorageError:
+            pass  # The lease expires on its own.
+
+    def _read(self) -> tuple[str, float] | None:
+        raw = self.backend.read(self.name)
+        if raw is None:
+            return None
+        token, _, expires = raw.decode("ascii", "replace").strip().partition(" ")
+        try:
+            return token, float(expires)
+        except ValueError:
+            return None
+
+
+class AudioJanitor:
+    """Background eviction for the temp audio directory, run by exactly one process.
+
+    Every worker starts a janitor thread, but only the one holding an exclusive
+    `flock` on the lock file evicts; the others keep their own worker's index in
+    sync, retry each interval and take over when the holder exits (the kernel drops
+    the lock with the process). With a
+    shared backend the lock holder on each node must also hold a `BucketLease`, so
+    one janitor runs across all nodes.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        ttl_hours: int,
+        max_files: int,
+        max_bytes: int,
+        interval_seconds: float = 30.0,
+        lock_path: str | Path | None = None,
+        logger: logging.Logger | None = None,
+        policy: EvictionPolicy | None = None,
+        stats_dir: str | None = None,
+        backend: AudioBackend | None = None,
+        resync_seconds: float = 600.0,
+        ref_sweep_seconds: float = 3600.0,
+    ) -> None:
+        self.root = Path(root)
+        self.ttl_hours = ttl_hours
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.interval_seconds = max(1.0, float(interval_seconds))
+        self.resync_seconds = max(self.interval_seconds, float(resync_seconds))
+        self.ref_sweep_seconds = max(self.interval_seconds, float(ref_sweep_seconds))
+        self.lock_path = Path(lock_path) if lock_path else self._default_lock_path(stats_dir, backend)
+        self.logger = logger or logging.getLogger(__name__)
+        self.policy = policy
+        self.stats_dir = stats_dir
+        self.backend = backend
+        # A lease outlives a few missed passes before another node takes over.
+        self.lease = (
+            BucketLease(backend, ttl_seconds=3 * self.interval_seconds, logger=self.logger)
+            if backend is not None
+            else None
+        )
+        self.pid: int | None = None
+        self._resynced_at: float | None = None
+        self._swept_at: float | None = None
+        self._lock_handle = None
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _default_lock_path(self, stats_dir: str | None, backend: AudioBackend | None) -> Path:
+        # Never inside the audio directory: it is served publicly and the lock holds a pid.
+        name = store_file_key(backend.key if backend is not None else self.root) + LOCK_SUFFIX
+        return Path(stats_dir or tempfile.gettempdir()) / name
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_handle is not None and (self.lease is None or self.lease.held)
+
+    def start(self) -> None:
+        self.pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name="audio-janitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._release()
+
+    def run_once(self) -> dict[str, float]:
+        store = self.sync_index()
+        result: dict[str, float] = store.cleanup(
+            ttl_hours=self.ttl_hours,
+            max_files=self.max_files,
+            max_bytes=self.max_bytes,
+            policy=self.policy,
+        )
+        result["swept_refs"] = store.sweep_evicted_refs()
+        # The full sweep lists and reads every ref (billed requests on a bucket), so it
+        # only catches refs this index never learned about, e.g. written on other nodes.
+        now = time.monotonic()
+        if self._swept_at is None or now - self._swept_at >= self.ref_sweep_seconds:
+            result["swept_refs"] += store.sweep_refs()
+            self._swept_at = now
+        store.compact_stats()
+        result.update(store.cache_stats())
+        return result
+
+    def sync_index(self) -> AudioStore:
+        """Bring this process's index up to date; requests never re-scan it themselves.
+
+        The index follows the node's other workers through the stats journal; a full
+        listing (without blocking requests) only runs on the first pass, every
+        `resync_seconds`, or when the store was replaced.
+        """
+        store = AudioStore(str(self.root), stats_dir=self.stats_dir, backend=self.backend)
+        if self._resynced_at is None or not store.index_is_current(self.resync_seconds):
+            store.rebuild_index()
+            self._resynced_at = time.monotonic()
+        else:
+            store.follow_journal()
+        return store
+
+    def try_acquire(self) -> bool:
+        if self._lock_handle is None and not self._lock():
+            return False
+        # Renewed on every pass so the lease only expires when this node stops.
+        return self.lease is None or self.lease.acquire()
+
+    def _lock(self) -> bool:
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        handle = open(self.lock_path, "a+")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        handle.seek(0)
+        handle.truncate()
+        handle.write(f"{os.getpid()}\n")
+        handle.flush()
+        self._lock_handle = handle
+        return True
+
+    def _release(self) -> None:
+        if self.lease is not None:
+            self.lease.release()
+        if self._lock_handle is not None:
+            fcntl.flock(self._lock_handle, fcntl.LOCK_UN)
+            self._lock_handle.close()
+            self._lock_handle = None
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            if self.try_acquire():
+                try:
+                    result = self.run_once()
+                    if result["deleted_files"]:
+                        self.logger.info(
+                            "Audio janitor evicted %s files; %s files / %s bytes remain; hit ratio %.1f%%",
+                            result["deleted_files"],
+                            result["remaining_files"],
+                            result["remaining_bytes"],
+                            result["hit_ratio"] * 100,
+                        )
+                except Exception:  # pragma: no cover - keep the janitor alive on unexpected I/O errors
+                    self.logger.exception("Audio janitor pass failed")
+            else:
+                # Followers only keep their own worker's index current for the emergency cap check.
+                try:
+                    self.sync_index()
+                except Exception:  # pragma: no cover - keep the janitor alive on unexpected I/O errors
+                    self.logger.exception("Audio index sync failed")
+            self._stop_event.wait(self.interval_seconds)
+
+
+def janitor_from_config(app: Flask) -> AudioJanitor:
+    return AudioJanitor(
+        root=app.config.get("TEMP_AUDIO_DIR", "static/temp_audio"),
+        ttl_hours=int(app.config.get("TEMP_AUDIO_TTL_HOURS", 4)),
+        max_files=int(app.config.get("MAX_TEMP_AUDIO_FILES", 120)),
+        max_bytes=int(app.config.get("MAX_TEMP_AUDIO_BYTES", 300 * 1024 * 1024)),
+        interval_seconds=float(app.config.get("AUDIO_JANITOR_INTERVAL_SECONDS", 30)),
+        resync_seconds=float(app.config.get("AUDIO_INDEX_RESYNC_SECONDS", 600)),
+        ref_sweep_seconds=float(app.config.get("AUDIO_REF_SWEEP_SECONDS", 3600)),
+        lock_path=app.config.get("AUDIO_JANITOR_LOCK_PATH") or None,
+        logger=app.logger,
+        policy=eviction_policy_from_config(app),
+        stats_dir=audio_stats_dir(app),
+        backend=audio_backend_from_config(app),
+    )
+
+
+def init_audio_janitor(app: Flask) -> None:
+    @app.before_request
+    def _ensure_audio_janitor() -> None:
+        ensure_audio_janitor(app)
+
+
+def ensure_audio_janitor(app: Flask) -> AudioJanitor | None:
+    """Start this process's janitor thread once (and again in each forked worker)."""
+    global _janitor
+    if not app.config.get("AUDIO_JANITOR_ENABLED", True) or app.testing:
+        return None
+    janitor = _janitor
+    if janitor is not None and janitor.pid == os.getpid():
+        return janitor
+    with _janitor_lock:
+        if _janitor is None or _janitor.pid != os.getpid():
+            if _janitor is not None and _janitor._lock_handle is not None:
+                # Inherited across fork: drop our copy without unlocking the parent's lock.
+                _janitor._lock_handle.close()
+                _janitor._lock_handle = None
+            _janitor = janitor_from_config(app)
+            _janitor.start()
+        return _janitor
@@ -1,13 +1,83 @@
 from __future__ import annotations
 
+from pathlib import Path
+
 from flask import Flask
 
+from services.audio_backends import AudioBackend, AudioStorageError, S3Backend
+from services.audio_eviction import EvictionPolicy, get_eviction_policy
 from services.audio_store import AudioStore
 
 
-def cleanup_audio_store(app: Flask, store: AudioStore) -> None:
-    store.cleanup(
-        ttl_hours=int(app.config.get("TEMP_AUDIO_TTL_HOURS", 4)),
-        max_files=int(app.config.get("MAX_TEMP_AUDIO_FILES", 120)),
-        max_bytes=int(app.config.get("MAX_TEMP_AUDIO_BYTES", 300 * 1024 * 1024)),
+def audio_stats_dir(app: Flask) -> str:
+    path = Path(app.config.get("AUDIO_STATS_DIR", "instance/audio_stats"))
+    if not path.is_absolute():
+        path = Path(app.root_path) / path
+    return str(path)
+
+
+def audio_backend_from_config(app: Flask) -> AudioBackend | None:
+    """The shared storage backend, or None to use the local TEMP_AUDIO_DIR."""
+    if app.config.get("AUDIO_STORAGE_BACKEND", "filesystem") != "s3":
+        return None
+    backend = app.extensions.get("audio_backend")
+    if backend is None:
+        backend = S3Backend(
+            endpoint=str(app.config.get("AUDIO_S3_ENDPOINT", "")),
+            bucket=str(app.config.get("AUDIO_S3_BUCKET", "")),
+            access_key=str(app.config.get("AUDIO_S3_ACCESS_KEY_ID", "")),
+            secret_key=str(app.config.get("AUDIO_S3_SECRET_ACCESS_KEY", "")),
+            region=str(app.config.get("AUDIO_S3_REGION", "us-east-1")),
+            prefix=str(app.config.get("AUDIO_S3_PREFIX", "")),
+            public_base_url=str(app.config.get("AUDIO_S3_PUBLIC_BASE_URL", "")),
+            url_ttl_seconds=int(app.config.get("AUDIO_S3_URL_TTL_SECONDS", 3600)),
+            timeout_seconds=float(app.config.get("AUDIO_S3_TIMEOUT_SECONDS", 10)),
+        )
+        app.extensions["audio_backend"] = backend
+    return backend
+
+
+def eviction_policy_from_config(app: Flask) -> EvictionPolicy:
+    """The configured eviction policy; always LRU with a shared S3 bucket.
+
+    Cost-aware policies rank clips by hit statistics that each node journals
+    locally, so in S3 mode every node would evict from the shared bucket using only
+    its own hits. LRU needs no statistics: the object's `LastModified`, which every
+    node refreshes on reuse, is the shared last-use clock.
+    """
+    name = str(app.config.get("AUDIO_EVICTION_POLICY", "gdsf"))
+    if app.config.get("AUDIO_STORAGE_BACKEND", "filesystem") == "s3":
+        name = "lru"
+    return get_eviction_policy(
+        name,
+        credit_seconds=float(app.config.get("AUDIO_EVICTION_CREDIT_SECONDS", 1.0)),
     )
+
+
+def cleanup_audio_store(app: Flask, store: AudioStore) -> None:
+    """Enforce audio caps on the request path.
+
+    With the background janitor enabled this is only an O(1) check against the
+    emergency cap (the janitor does routine eviction); otherwise it cleans inline.
+    """
+    max_files = int(app.config.get("MAX_TEMP_AUDIO_FILES", 120))
+    max_bytes = int(app.config.get("MAX_TEMP_AUDIO_BYTES", 300 * 1024 * 1024))
+    if app.config.get("AUDIO_JANITOR_ENABLED", True):
+        factor = float(app.config.get("AUDIO_EMERGENCY_CAP_FACTOR", 1.5))
+        if not store.over_capacity(max_files=int(max_files * factor), max_bytes=int(max_bytes * factor)):
+            return
+        app.logger.warning("Audio store over emergency cap; evicting inline")
+
+    try:
+        # Without a janitor thread nothing else follows the other workers' saves.
+        store.follow_journal()
+        store.cleanup(
+            ttl_hours=int(app.config.get("TEMP_AUDIO_TTL_HOURS", 4)),
+            max_files=max_files,
+            max_bytes=max_bytes,
+            policy=eviction_policy_from_config(app),
+        )
+        store.sweep_evicted_refs()
+    except AudioStorageError as exc:
+        # The clip is already stored; the janitor retries eviction on its next pass.
+        app.logger.warning("Inline audio cleanup failed: %s", exc)
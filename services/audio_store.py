@@ -1,11 +1,36 @@
 from __future__ import annotations
 
-import os
-import uuid
+import hashlib
+import heapq
+import logging
+import re
+import threading
+import time
 from dataclasses import dataclass
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, datetime
 from pathlib import Path
 
+from services.audio_backends import AudioBackend, AudioStorageError, FilesystemBackend, ObjectInfo
+from services.audio_eviction import AudioStatsJournal, ClipStats, EvictionPolicy
+from services.metrics import (
+    AUDIO_STORE_DEDUPLICATED_BYTES,
+    AUDIO_STORE_EVICTED_BYTES,
+    AUDIO_STORE_EVICTED_FILES,
+    AUDIO_STORE_WRITTEN_BYTES,
+)
+
+
+# Blobs are stored as `<shard>/<content hash>.<mp3|ogg>`; `.ref` files map cache keys to blobs.
+_BLOB_NAME = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{32}\.(?:mp3|ogg)$")
+# Flat names from the pre-sharding layout, still served until they expire.
+_LEGACY_NAME = re.compile(r"^(?:tts|dict)_[A-Za-z0-9_]+\.mp3$")
+_REF_NAME = re.compile(r"^[0-9a-f]{2}/[^/]+\.ref$")
+# Everything that counts toward the caps: blobs, plus any flat audio file at the top level.
+_INDEXED_NAME = re.compile(r"^(?:[0-9a-f]{2}/)?[^/]+\.(?:mp3|ogg)$")
+AUDIO_URL_PREFIX = "/audio/"
+
+logger = logging.getLogger(__name__)
+
 
 @dataclass(slots=True)
 class StoredAudio:
@@ -14,86 +39,555 @@ class StoredAudio:
     bytes_size: int
 
 
+class _AudioIndex:
+    """In-process view of one audio backend: sizes, mtimes and an oldest-first heap.
+
+    Touches push a fresh heap entry and bump the file's version; stale heap entries are
+    skipped when popped (lazy deletion), so every operation is O(log n). Once a
+    cost-aware policy is in use, a second heap ranks entries by its priority and is
+    maintained the same way; it is only rebuilt in full when the policy or the shared
+    stats change. `resync` re-lists the backend without blocking readers.
+    """
+
+    def __init__(self, backend: AudioBackend) -> None:
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.entries: dict[str, tuple[float, int, int]] = {}
+        self.heap: list[tuple[float, int, str]] = []
+        self.total_bytes = 0
+        self.generation: object = None
+        self.built_at = 0.0
+        self.journal: AudioStatsJournal | None = None
+        self.stats: dict[str, ClipStats] = {}
+        self.totals = {"hits": 0, "misses": 0}
+        self.policy: EvictionPolicy | None = None
+        self.ranked: list[tuple[float, int, str]] = []
+        # Key refs known to point at each clip, so evicting it can drop them directly.
+        self.refs: dict[str, set[str]] = {}
+        # Refs whose clip was evicted, waiting for `AudioStore.sweep_evicted_refs`.
+        self.orphaned_refs: set[str] = set()
+        # Journal position already reflected in the index (see `AudioStore.follow_journal`).
+        self.journal_position = (0, 0)
+        self._version = 0
+        self._bulk = False
+        # While a resync is listing: files saved/reused (mtime, size) or dropped (None).
+        self._changes: dict[str, tuple[float, int] | None] | None = None
+
+    def rebuild(self) -> None:
+        # List before clearing anything, so a failed listing keeps the previous view.
+        generation = self.backend.generation()
+        # Lines journaled while listing are followed again later; re-indexing is idempotent.
+        journal_position = self.journal.position() if self.journal is not None else (0, 0)
+        # Sharded blobs plus any flat files left from the pre-sharding layout.
+        listing = [info for info in self.backend.list() if _INDEXED_NAME.match(info.name)]
+        if self.journal is not None:
+            self.stats, self.totals = self.journal.load()
+        self.entries.clear()
+        self.heap.clear()
+        self.ranked.clear()
+        self.total_bytes = 0
+        self.generation = generation
+        self.journal_position = journal_position
+        self._bulk = True
+        try:
+            for info in listing:
+                self._put(info.name, info.mtime, info.size)
+        finally:
+            self._bulk = False
+        heapq.heapify(self.heap)
+        heapq.heapify(self.ranked)
+        self.built_at = time.monotonic()
+
+    def resync(self) -> None:
+        """Re-list the backend into a fresh view and swap it in.
+
+        The listing and the journal load run without holding `lock`, so requests keep
+        using the current view meanwhile. Saves, reuses and evictions made during the
+        scan are replayed onto the fresh view before the swap.
+        """
+        with self.lock:
+            self._changes = {}
+            policy = self.policy
+        fresh = _AudioIndex(self.backend)
+        fresh.journal = self.journal
+        fresh.policy = policy
+        try:
+            fresh.rebuild()
+        except BaseException:
+            with self.lock:
+                self._changes = None
+            raise
+        with self.lock:
+            changes, self._changes = self._changes or {}, None
+            if fresh.policy != self.policy:
+                fresh.policy = self.policy
+                fresh.rerank()
+            for filename, change in changes.items():
+                if change is None:
+                    fresh.discard(filename)
+                    continue
+                if filename in self.stats:
+                    fresh.stats[filename] = self.stats[filename]
+                fresh.upsert(filename, *change)
+            for name in ("entries", "heap", "ranked", "total_bytes", "generation", "built_at", "stats", "totals"):
+                setattr(self, name, getattr(fresh, name))
+            self.journal_position = fresh.journal_position
+            self._version = fresh._version
+
+    def add_ref(self, ref_name: str, filename: str) -> None:
+        self.refs.setdefault(filename, set()).add(ref_name)
+
+    def upsert(self, filename: str, mtime: float, size: int) -> None:
+        self._drop(filename)
+        self._put(filename, mtime, size)
+        if self._changes is not None:
+            self._changes[filename] = (mtime, size)
+
+    def discard(self, filename: str, forget_stats: bool = True) -> None:
+        self._drop(filename)
+        if forget_stats:
+            self.stats.pop(filename, None)
+        if self._changes is not None:
+            self._changes[filename] = None
+
+    def peek_oldest(self) -> tuple[str, float, int] | None:
+        while self.heap:
+            mtime, version, filename = self.heap[0]
+            current = self.entries.get(filename)
+            if current is not None and current[2] == version:
+                return filename, mtime, current[1]
+            heapq.heappop(self.heap)
+        return None
+
+    def rank_by(self, policy: EvictionPolicy) -> None:
+        """Order `ranked` by `policy`; re-ranks every entry only when the policy changes."""
+        if policy != self.policy:
+            self.policy = policy
+            self.rerank()
+
+    def rerank(self) -> None:
+        """Recompute every priority, e.g. after the shared stats were reloaded."""
+        if self.policy is None:
+            return
+        self.ranked = [
+            (self.policy.priority(mtime, size, self.stats.get(name)), version, name)
+            for name, (mtime, size, version) in self.entries.items()
+        ]
+        heapq.heapify(self.ranked)
+
+    def peek_lowest(self) -> tuple[str, int] | None:
+        """The entry `policy` would evict first, as `(filename, size)`."""
+        while self.ranked:
+            _priority, version, filename = self.ranked[0]
+            current = self.entries.get(filename)
+            if current is not None and current[2] == version:
+                return filename, current[1]
+            heapq.heappop(self.ranked)
+        return None
+
+    def _put(self, filename: str, mtime: float, size: int) -> None:
+        # Callers update `stats` first, so the pushed priority includes the change.
+        self._version += 1
+        self.entries[filename] = (mtime, size, self._version)
+        self.total_bytes += size
+        self._push(self.heap, (mtime, self._version, filename))
+        if self.policy is not None:
+            priority = self.policy.priority(mtime, size, self.stats.get(filename))
+            self._push(self.ranked, (priority, self._version, filename))
+        if len(self.heap) > 2 * len(self.entries) + 64:
+            self._compact()
+
+    def _push(self, heap: list[tuple[float, int, str]], entry: tuple[float, int, str]) -> None:
+        if self._bulk:
+            heap.append(entry)
+        else:
+            heapq.heappush(heap, entry)
+
+    def _drop(self, filename: str) -> None:
+        previous = self.entries.pop(filename, None)
+        if previous is not None:
+            self.total_bytes -= previous[1]
+
+    def _compact(self) -> None:
+        self.heap = [(mtime, version, name) for name, (mtime, _size, version) in self.entries.items()]
+        heapq.heapify(self.heap)
+        self.rerank()
+
+
 class AudioStore:
-    def __init__(self, root_dir: str = "static/temp_audio") -> None:
+    # One index per backend, shared by every AudioStore in this process. It is built on
+    # first use; after that only the janitor thread re-syncs it, never a request.
+    _indexes: dict[str, _AudioIndex] = {}
+    _indexes_lock = threading.Lock()
+
+    def __init__(
+        self,
+        root_dir: str = "static/temp_audio",
+        stats_dir: str | None = None,
+        backend: AudioBackend | None = None,
+    ) -> None:
         self.root = Path(root_dir)
-        self.root.mkdir(parents=True, exist_ok=True)
+        # `root_dir` is the local cache directory unless a shared backend is given.
+        self.backend = backend or FilesystemBackend(self.root)
+        self._index_key = self.backend.key
+        # Hit counts / synthesis costs for cost-aware eviction; without a stats dir every
+        # clip looks like a never-reused, cost-1 clip.
+        self._stats_dir = stats_dir
 
-    def save_audio(self, content: bytes) -> StoredAudio:
-        timestamp = datetime.now(UTC).strftime("%Y%m%d%H%M%S")
-        filename = f"tts_{timestamp}_{uuid.uuid4().hex[:12]}.mp3"
-        path = self.root / filename
-        path.write_bytes(content)
-        return self._to_stored_audio(filename, path)
+    def save_audio(
+        self,
+        content: bytes,
+        cost: float | None = None,
+        kind: str = "tts",
+        extension: str = ".mp3",
+    ) -> StoredAudio:
+        """Store `content` under its content hash; identical bytes are stored once."""
+        digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+        filename = f"{digest[:2]}/{digest}{extension}"
+        try:
+            info = self.backend.touch(filename)
+        except AudioStorageError as exc:
+            # Cannot tell whether the blob exists; writing it again is harmless.
+            logger.warning("Audio store touch of %s failed: %s", filename, exc)
+            info = None
+        if info is None:
+            info = self.backend.write(filename, content)
+            AUDIO_STORE_WRITTEN_BYTES.inc(len(content), kind=kind)
+        else:
+            AUDIO_STORE_DEDUPLICATED_BYTES.inc(len(content), kind=kind)
+        return self._track(info, cost)
 
-    def save_audio_with_key(self, content: bytes, cache_key: str, prefix: str = "dict") -> StoredAudio:
-        filename = self._filename_for_key(cache_key, prefix)
-        path = self.root / filename
-        path.write_bytes(content)
-        return self._to_stored_audio(filename, path)
+    def save_audio_with_key(
+        self,
+        content: bytes,
+        cache_key: str,
+        prefix: str = "dict",
+        cost: float | None = None,
+        extension: str = ".mp3",
+    ) -> StoredAudio:
+        stored = self.save_audio(content, cost=cost, kind=prefix, extension=extension)
+        ref_name = self._ref_name(cache_key, prefix)
+        self.backend.write(ref_name, stored.filename.encode("utf-8"))
+        index = self._index()
+        with index.lock:
+            index.add_ref(ref_name, stored.filename)
+        if index.journal is not None:
+            index.journal.record_ref(ref_name, stored.filename)
+        return stored
 
     def get_audio_by_key(self, cache_key: str, prefix: str = "dict") -> StoredAudio | None:
-        filename = self._filename_for_key(cache_key, prefix)
-        path = self.root / filename
-        if not path.exists() or not path.is_file():
+        """The clip stored under `cache_key`, or None on a miss.
+
+        A storage failure (e.g. an unreachable bucket) is logged and treated as a miss,
+        so callers fall back to synthesizing instead of failing the request.
+        """
+        try:
+            return self._get_audio_by_key(cache_key, prefix)
+        except AudioStorageError as exc:
+            logger.warning("Audio store lookup of %s failed; treating it as a miss: %s", cache_key, exc)
             return None
 
+    def _get_audio_by_key(self, cache_key: str, prefix: str) -> StoredAudio | None:
+        ref_name = self._ref_name(cache_key, prefix)
+        raw = self.backend.read(ref_name)
+        filename = raw.decode("utf-8", "replace").strip() if raw else ""
         # Touch on reuse so cleanup keeps frequently accessed files longer.
-        now_ts = datetime.now(UTC).timestamp()
-        os.utime(path, (now_ts, now_ts))
-        return self._to_stored_audio(filename, path)
+        info = self.backend.touch(filename) if _BLOB_NAME.match(filename) else None
+        if info is None:
+            # Never stored, or the blob was evicted (possibly by another worker or node).
+            index = self._index()
+            with index.lock:
+                if filename:
+                    index.discard(filename)
+                index.totals["misses"] += 1
+            if index.journal is not None:
+                index.journal.record_miss(ref_name.rsplit("/", 1)[-1])
+            return None
+
+        index = self._index()
+        with index.lock:
+            index.add_ref(ref_name, filename)
+            index.stats.setdefault(filename, ClipStats()).hits += 1
+            index.upsert(filename, info.mtime, info.size)
+            index.totals["hits"] += 1
+        if index.journal is not None:
+            index.journal.record_hit(filename)
+        return StoredAudio(filename=filename, url=self._url_for(filename), bytes_size=info.size)
+
+    def read(self, filename: str) -> bytes | None:
+        """Bytes of a stored clip, or None if it has been evicted or cannot be read."""
+        if not _BLOB_NAME.match(filename):
+            return None
+        try:
+            return self.backend.read(filename)
+        except AudioStorageError as exc:
+            logger.warning("Audio store read of %s failed: %s", filename, exc)
+            return None
 
     def cleanup(
         self,
         ttl_hours: int = 4,
         max_files: int = 120,
         max_bytes: int = 300 * 1024 * 1024,
+        policy: EvictionPolicy | None = None,
     ) -> dict[str, int]:
-        now = datetime.now(UTC)
-        cutoff = now - timedelta(hours=ttl_hours)
+        """Drop expired clips, then evict down to the caps.
 
+        Without a policy (or with plain LRU) capacity eviction pops the oldest-first
+        heap; a cost-aware policy pops the index's priority heap, which is kept up to
+        date as clips are saved and reused, so both cost O(evicted log n). Victims are
+        picked under the index lock but checked and deleted outside it, so requests
+        are not held up by backend round-trips.
+        """
+        cutoff = datetime.now(UTC).timestamp() - ttl_hours * 3600
         deleted = 0
-        files = self._list_audio_files()
+        index = self._index()
+        while True:
+            with index.lock:
+                victims = self._pick_victims(index, cutoff, max_files, max_bytes, policy)
+            if not victims:
+                break
+            evicted, reused = self._delete_victims(index, victims)
+            deleted += evicted
+            if not reused:
+                break
+
+        with index.lock:
+            return {
+                "remaining_files": len(index.entries),
+                "remaining_bytes": index.total_bytes,
+                "deleted_files": deleted,
+            }
+
+    def _pick_victims(
+        self,
+        index: _AudioIndex,
+        cutoff: float,
+        max_files: int,
+        max_bytes: int,
+        policy: EvictionPolicy | None,
+    ) -> list[tuple[str, float, int, str]]:
+        """Take the clips to evict out of the index, as `(filename, mtime, size, reason)`."""
+        victims: list[tuple[str, float, int, str]] = []
+        lru = policy is None or type(policy) is EvictionPolicy
+
+        def over_caps() -> bool:
+            return len(index.entries) > max_files or index.total_bytes > max_bytes
+
+        # TTL pass first, then eviction down to the high watermarks.
+        while True:
+            oldest = index.peek_oldest()
+            if oldest is None:
+                break
+            filename, mtime, size = oldest
+            if mtime < cutoff:
+                reason = "ttl"
+            elif lru and over_caps():
+                reason = "capacity"
+            else:
+                break
+            index.discard(filename, forget_stats=False)
+            victims.append((filename, mtime, size, reason))
 
-        # TTL pass first
-        for path in files:
-            if datetime.fromtimestamp(path.stat().st_mtime, tz=UTC) < cutoff:
-                path.unlink(missing_ok=True)
+        if not lru:
+            index.rank_by(policy)  # type: ignore[arg-type]
+            while over_caps():
+                lowest = index.peek_lowest()
+                if lowest is None:
+                    break
+                filename, size = lowest
+                mtime = index.entries[filename][0]
+                index.discard(filename, forget_stats=False)
+                victims.append((filename, mtime, size, "capacity"))
+        return victims
+
+    def _delete_victims(self, index: _AudioIndex, victims: list[tuple[str, float, int, str]]) -> tuple[int, bool]:
+        """Delete picked clips; returns `(deleted, any reused since they were indexed)`."""
+        deleted = 0
+        reused: list[tuple[str, ObjectInfo]] = []
+        gone: list[str] = []
+        for filename, mtime, size, reason in victims:
+            # The index can lag other workers and nodes; a clip reused since is kept.
+            info = self.backend.stat(filename)
+            if info is not None and info.mtime > mtime + 1.0:
+                reused.append((filename, info))
+                continue
+            gone.append(filename)
+            if info is not None and self.backend.delete(filename):
+                self._record_eviction(size, reason=reason)
                 deleted += 1
+        with index.lock:
+            for filename, info in reused:
+                index.upsert(filename, info.mtime, info.size)
+            for filename in gone:
+                if filename not in index.entries:
+                    index.stats.pop(filename, None)
+                    index.orphaned_refs.update(index.refs.pop(filename, ()))
+        return deleted, bool(reused)
+
+    def cache_stats(self) -> dict[str, float]:
+        """Keyed-clip lookups across workers, as of the last index sync."""
+        totals = dict(self._index().totals)
+        lookups = totals["hits"] + totals["misses"]
+        totals["hit_ratio"] = totals["hits"] / lookups if lookups else 0.0
+        return totals
+
+    def compact_stats(self) -> None:
+        """Fold the shared stats journal into its snapshot, forgetting evicted clips."""
+        index = self._index()
+        if index.journal is None:
+            return
+        with index.lock:
+            live = set(index.entries)
+        stats, totals = index.journal.compact(live)
+        with index.lock:
+            index.stats, index.totals = stats, totals
+            # Compaction rotated the journal, so the new one is followed from its start.
+            # Clips journaled just before the rotation are picked up by the next resync.
+            index.journal_position = (0, 0)
+            # Other workers' hits and costs may have changed priorities.
+            index.rerank()
+
+    def over_capacity(self, max_files: int, max_bytes: int) -> bool:
+        """O(1) check of the indexed totals against the given caps."""
+        index = self._index()
+        return len(index.entries) > max_files or index.total_bytes > max_bytes
+
+    def servable_path(self, filename: str) -> tuple[Path, bool] | None:
+        """Local path for a public audio name and whether its content is immutable, or None."""
+        immutable = self._immutable(filename)
+        if immutable is None:
+            return None
+        path = self.backend.local_path(filename)
+        return (path, immutable) if path is not None else None
+
+    def download_url(self, filename: str) -> tuple[str, bool] | None:
+        """Remote URL for a public audio name (shared backends only) and its immutability."""
+        immutable = self._immutable(filename)
+        if immutable is None:
+            return None
+        url = self.backend.download_url(filename)
+        return (url, immutable) if url else None
+
+    def sweep_evicted_refs(self) -> int:
+        """Delete the known key refs of clips evicted since the last call; O(evicted)."""
+        index = self._index()
+        with index.lock:
+            orphaned, index.orphaned_refs = index.orphaned_refs, set()
+        return sum(1 for ref_name in sorted(orphaned) if self.backend.delete(ref_name))
+
+    def sweep_refs(self, min_age_seconds: float = 60.0) -> int:
+        """Delete key refs whose blob is gone; young refs may belong to an in-flight save.
+
+        Lists the whole store and reads every old ref, so it is run rarely; refs of
+        clips evicted through this index are dropped by `sweep_evicted_refs` instead.
+        """
+        removed = 0
+        cutoff = time.time() - min_age_seconds
+        listing = list(self.backend.list())
+        live = {info.name for info in listing}
+        for info in listing:
+            if not _REF_NAME.match(info.name) or info.mtime > cutoff:
+                continue
+            raw = self.backend.read(info.name)
+            if raw is None:
+                continue
+            target = raw.decode("utf-8", "replace").strip()
+            if _BLOB_NAME.match(target) and target in live:
+                continue
+            if self.backend.delete(info.name):
+                removed += 1
+        return removed
+
+    def rebuild_index(self) -> None:
+        """Re-scan the backend (e.g. after files were changed behind the store's back)."""
+        self._index().resync()
+
+    def index_is_current(self, max_age_seconds: float) -> bool:
+        """False once the index is older than `max_age_seconds` or the store was replaced."""
+        index = self._index()
+        if time.monotonic() - index.built_at >= max_age_seconds:
+            return False
+        return index.generation == self.backend.generation()
+
+    def follow_journal(self) -> int:
+        """Index clips other workers saved or reused since the last call; returns how many.
+
+        Reads the stats journal from where the index last left off, so the janitor
+        sees the rest of the node's writes without listing the whole store.
+        """
+        index = self._index()
+        if index.journal is None:
+            return 0
+        names, refs, position = index.journal.changed_since(index.journal_position)
+        updates = [(name, self.backend.stat(name)) for name in sorted(names) if _INDEXED_NAME.match(name)]
+        with index.lock:
+            for ref_name, filename in refs.items():
+                index.add_ref(ref_name, filename)
+            for name, info in updates:
+                if info is None:
+                    index.discard(name)
+                else:
+                    index.upsert(name, info.mtime, info.size)
+            index.journal_position = position
+        return len(updates)
+
+    def _index(self) -> _AudioIndex:
+        key = self._index_key
+        index = self._indexes.get(key)
+        if index is None:
+            with self._indexes_lock:
+                index = self._indexes.get(key)
+                if index is None:
+                    index = _AudioIndex(self.backend)
+                    if self._stats_dir:
+                        index.journal = AudioStatsJournal(self._stats_dir, key)
+                    with index.lock:
+                        index.rebuild()
+                    self._indexes[key] = index
+                    return index
+        if self._stats_dir and index.journal is None:
+            with index.lock:
+                if index.journal is None:
+                    # The files are already indexed; only the shared stats are missing.
+                    journal = AudioStatsJournal(self._stats_dir, key)
+                    index.journal_position = journal.position()
+                    index.stats, index.totals = journal.load()
+                    index.journal = journal
+                    index.rerank()
+        return index
+
+    def _track(self, info: ObjectInfo, cost: float | None) -> StoredAudio:
+        filename = info.name
+        index = self._index()
+        with index.lock:
+            if cost is not None:
+                # A deduplicated save keeps the blob's hit count.
+                previous = index.stats.get(filename)
+                index.stats[filename] = ClipStats(
+                    hits=previous.hits if previous else 0,
+                    cost=max(float(cost), previous.cost if previous else 0.0),
+                )
+            index.upsert(filename, info.mtime, info.size)
+        if cost is not None and index.journal is not None:
+            index.journal.record_put(filename, cost)
+        return StoredAudio(filename=filename, url=self._url_for(filename), bytes_size=info.size)
+
+    def _record_eviction(self, size: int, reason: str) -> None:
+        AUDIO_STORE_EVICTED_FILES.inc(reason=reason)
+        AUDIO_STORE_EVICTED_BYTES.inc(size, reason=reason)
+
+    def _ref_name(self, cache_key: str, prefix: str) -> str:
+        name = f"{prefix}_{cache_key}"
+        shard = hashlib.blake2b(name.encode("utf-8"), digest_size=1).hexdigest()
+        return f"{shard}/{name}.ref"
+
+    def _immutable(self, filename: str) -> bool | None:
+        if _BLOB_NAME.match(filename):
+            return True
+        if _LEGACY_NAME.match(filename):
+            return False
+        return None
 
-        files = self._list_audio_files()
-
-        # High-watermark pass by oldest-first eviction
-        while files and (len(files) > max_files or self._total_bytes(files) > max_bytes):
-            oldest = files[0]
-            oldest.unlink(missing_ok=True)
-            deleted += 1
-            files = self._list_audio_files()
-
-        return {
-            "remaining_files": len(files),
-            "remaining_bytes": self._total_bytes(files),
-            "deleted_files": deleted,
-        }
-
-    def _list_audio_files(self) -> list[Path]:
-        return sorted(
-            [p for p in self.root.glob("*.mp3") if p.is_file()],
-            key=lambda p: p.stat().st_mtime,
-        )
-
-    def _total_bytes(self, files: list[Path]) -> int:
-        total = 0
-        for path in files:
-            total += path.stat().st_size
-        return total
-
-    def _filename_for_key(self, cache_key: str, prefix: str) -> str:
-        return f"{prefix}_{cache_key}.mp3"
-
-    def _to_stored_audio(self, filename: str, path: Path) -> StoredAudio:
-        return StoredAudio(
-            filename=filename,
-            url=f"/static/temp_audio/{filename}",
-            bytes_size=path.stat().st_size,
-        )
+    def _url_for(self, filename: str) -> str:
+        return f"{AUDIO_URL_PREFIX}{filename}"
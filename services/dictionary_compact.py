@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import sys
+from array import array
+from dataclasses import dataclass, replace
+from typing import Iterable, Iterator
+
+from services.dictionary_loader import DictionaryEntry
+
+
+@dataclass(frozen=True, slots=True)
+class DictionaryMemoryReport:
+    terms: int
+    entries: int
+    total_bytes: int
+    # Part of `total_bytes` held by the lookup service's prefix index.
+    prefix_bytes: int = 0
+
+    @property
+    def bytes_per_term(self) -> float:
+        return self.total_bytes / self.terms if self.terms else 0.0
+
+    def to_dict(self) -> dict[str, float | int]:
+        return {
+            "terms": self.terms,
+            "entries": self.entries,
+            "total_bytes": self.total_bytes,
+            "prefix_bytes": self.prefix_bytes,
+            "bytes_per_term": round(self.bytes_per_term, 1),
+        }
+
+
+class CompactDictionary:
+    """Merged dictionary entries kept in flat arrays instead of per-entry objects.
+
+    Sources are interned to one byte each, and every definition and jyutping string
+    is stored once in a shared pool and referenced by index. Entry records are
+    columns of `array`s. A term's entries form a chain through `_next`, so entries
+    from several files merge without copying lists. `get(term)` rebuilds the
+    `DictionaryEntry` list on demand, which keeps it a drop-in `entries_by_term` for
+    `DictionaryLookupService`.
+    """
+
+    __slots__ = (
+        "_heads",
+        "_tails",
+        "_next",
+        "_sources",
+        "_source_names",
+        "_jyutping",
+        "_definition_starts",
+        "_definition_ids",
+        "_strings",
+        "_string_ids",
+    )
+
+    def __init__(self) -> None:
+        self._heads: dict[str, int] = {}
+        self._next = array("i")
+        self._sources = array("B")
+        self._source_names: list[str] = []
+        self._jyutping = array("I")
+        self._definition_starts = array("I", [0])
+        self._definition_ids = array("I")
+        self._strings: list[str] = [""]
+        # Only needed while loading; `freeze()` drops them.
+        self._tails: dict[str, int] | None = {}
+        self._string_ids: dict[str, int] | None = {"": 0}
+
+    @classmethod
+    def from_entries(cls, *dictionaries: dict[str, list[DictionaryEntry]]) -> CompactDictionary:
+        compact = cls()
+        for entries_by_term in dictionaries:
+            for entries in entries_by_term.values():
+                compact.extend(entries)
+        compact.freeze()
+        return compact
+
+    def extend(self, entries: Iterable[DictionaryEntry]) -> None:
+        if self._tails is None or self._string_ids is None:
+            raise RuntimeError("CompactDictionary is frozen")
+        for entry in entries:
+            entry_id = len(self._sources)
+            if entry.source not in self._source_names:
+                if len(self._source_names) >= 256:
+                    raise ValueError("Too many dictionary sources")
+                self._source_names.append(sys.intern(entry.source))
+            self._sources.append(self._source_names.index(entry.source))
+            self._jyutping.append(self._pooled(entry.jyutping))
+            self._definition_ids.extend(self._pooled(definition) for definition in entry.definitions)
+            self._definition_starts.append(len(self._definition_ids))
+            self._next.append(-1)
+
+            tail = self._tails.get(entry.term)
+            if tail is None:
+                self._heads[entry.term] = entry_id
+            else:
+                self._next[tail] = entry_id
+            self._tails[entry.term] = entry_id
+
+    def freeze(self) -> None:
+        self._tails = None
+        self._string_ids = None
+
+    def __len__(self) -> int:
+        return len(self._heads)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._heads)
+
+    def __contains__(self, term: object) -> bool:
+        return term in self._heads
+
+    @property
+    def entry_count(self) -> int:
+        return len(self._sources)
+
+    def get(self, term: str, default: list[DictionaryEntry] | None = None) -> list[DictionaryEntry] | None:
+        entry_id = self._heads.get(term, -1)
+        if entry_id < 0:
+            return default
+        strings = self._strings
+        entries: list[DictionaryEntry] = []
+        while entry_id >= 0:
+            ids = self._definition_ids[self._definition_starts[entry_id] : self._definition_starts[entry_id + 1]]
+            entries.append(
+                DictionaryEntry(
+                    term=term,
+                    definitions=tuple(strings[string_id] for string_id in ids),
+                    source=self._source_names[self._sources[entry_id]],
+                    jyutping=strings[self._jyutping[entry_id]],
+                )
+            )
+            entry_id = self._next[entry_id]
+        return entries
+
+    def memory_report(self) -> DictionaryMemoryReport:
+        heads = self._heads
+        total = sys.getsizeof(heads) + sum(map(sys.getsizeof, heads)) + sum(map(sys.getsizeof, heads.values()))
+        total += sys.getsizeof(self._strings) + sum(map(sys.getsizeof, self._strings))
+        total += sys.getsizeof(self._source_names) + sum(map(sys.getsizeof, self._source_names))
+        for column in (self._next, self._sources, self._jyutping, self._definition_starts, self._definition_ids):
+            total += sys.getsizeof(column)
+        return DictionaryMemoryReport(terms=len(heads), entries=self.entry_count, total_bytes=total)
+
+    def _pooled(self, value: str) -> int:
+        string_id = self._string_ids.get(value)  # type: ignore[union-attr]
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings.append(value)
+            self._string_ids[value] = string_id  # type: ignore[index]
+        return string_id
+
+
+def dictionary_memory_report(
+    entries_by_term: dict[str, list[DictionaryEntry]] | CompactDictionary,
+    prefix_bytes: int = 0,
+) -> DictionaryMemoryReport:
+    """Deep size of a dictionary representation, counting shared objects once.
+
+    `prefix_bytes` is the size of the lookup service's prefix index, which is added
+    to the total so the report covers everything a parsed dictionary keeps.
+    """
+    if isinstance(entries_by_term, CompactDictionary):
+        report = entries_by_term.memory_report()
+    else:
+        entries = sum(len(term_entries) for term_entries in entries_by_term.values())
+        report = DictionaryMemoryReport(
+            terms=len(entries_by_term), entries=entries, total_bytes=_deep_sizeof(entries_by_term)
+        )
+    return replace(report, total_bytes=report.total_bytes + prefix_bytes, prefix_bytes=prefix_bytes)
+
+
+def _deep_sizeof(root: object) -> int:
+    seen: set[int] = set()
+    stack = [root]
+    total = 0
+    while stack:
+        value = stack.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        total += sys.getsizeof(value)
+        if isinstance(value, dict):
+            stack.extend(value.keys())
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            stack.extend(value)
+        elif not isinstance(value, (str, bytes, int, float, array)):
+            for slot in getattr(type(value), "__slots__", ()):
+                if hasattr(value, slot):
+                    stack.append(getattr(value, slot))
+    return total
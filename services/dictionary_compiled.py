@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Iterator
+
+from services.dictionary_loader import DictionaryEntry
+
+
+_MAGIC = b"CANTODCT"
+_VERSION = 1
+# magic, version, term count, entry count, max term length, then the byte offsets of
+# the five sections: term offsets, term bytes, entry starts, entry offsets, payload.
+_HEADER = struct.Struct("<8sIIII5Q")
+_FIELD_SEP = "\x1f"
+_POSITION_MEMO_SIZE = 16_384
+
+
+class CompiledDictionaryError(ValueError):
+    pass
+
+
+def compile_dictionary(entries_by_term: dict[str, list[DictionaryEntry]], path: str | Path) -> int:
+    """Write `entries_by_term` as a memory-mappable artifact; returns the term count.
+
+    Terms are sorted by their UTF-8 bytes (the same order as code points), so a
+    reader can binary-search the term table in place. Each entry is packed as
+    `source \\x1f jyutping \\x1f definition \\x1f ...`.
+    """
+    terms = sorted((term.encode("utf-8"), term) for term, entries in entries_by_term.items() if entries)
+
+    term_offsets = array("I", [0])
+    entry_starts = array("I", [0])
+    entry_offsets = array("I", [0])
+    term_blob = bytearray()
+    payload = bytearray()
+    for encoded, term in terms:
+        term_blob += encoded
+        term_offsets.append(len(term_blob))
+        for entry in entries_by_term[term]:
+            fields = (entry.source, entry.jyutping, *entry.definitions)
+            if any(_FIELD_SEP in field for field in fields):
+                raise CompiledDictionaryError(f"Entry for {term!r} contains a reserved separator")
+            payload += _FIELD_SEP.join(fields).encode("utf-8")
+            entry_offsets.append(len(payload))
+        entry_starts.append(len(entry_offsets) - 1)
+    if len(term_blob) >= 2**32 or len(payload) >= 2**32:
+        raise CompiledDictionaryError("Dictionary is too large for 32-bit offsets")
+
+    sections = [term_offsets, term_blob, entry_starts, entry_offsets, payload]
+    for table in (term_offsets, entry_starts, entry_offsets):
+        if sys.byteorder != "little":
+            table.byteswap()
+
+    offsets: list[int] = []
+    position = _HEADER.size
+    for section in sections:
+        position = _align(position)
+        offsets.append(position)
+        position += len(section) * getattr(section, "itemsize", 1)
+
+    header = _HEADER.pack(
+        _MAGIC,
+        _VERSION,
+        len(terms),
+        len(entry_offsets) - 1,
+        max((len(term) for _encoded, term in terms), default=0),
+        *offsets,
+    )
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    with temp.open("wb") as handle:
+        handle.write(header)
+        for offset, section in zip(offsets, sections):
+            handle.write(b"\x00" * (offset - handle.tell()))
+            handle.write(section)
+    # Workers that already mapped the old file keep reading it; new loads see the new one.
+    os.replace(temp, target)
+    return len(terms)
+
+
+def open_compiled(
+    path: str | Path, sources: tuple[Path, ...] = (), logger: logging.Logger | None = None
+) -> CompiledDictionary | None:
+    """Map `path` unless it is missing or older than any of the text `sources` that exist."""
+    logger = logger or logging.getLogger(__name__)
+    target = Path(path)
+    try:
+        compiled_mtime = target.stat().st_mtime_ns
+    except OSError:
+        logger.info("No compiled dictionary at %s; parsing the text files", target)
+        return None
+    for source in sources:
+        try:
+            if source.stat().st_mtime_ns > compiled_mtime:
+                # Every worker now parses the text files instead of sharing one mapping.
+                logger.warning(
+                    "Compiled dictionary %s is older than %s; parsing the text files instead. "
+                    "Re-run scripts/prepare_dictionary_data.py to recompile it.",
+                    target,
+                    source,
+                )
+                return None
+        except OSError:
+            continue
+    return CompiledDictionary(target)
+
+
+class CompiledDictionary:
+    """A compiled dictionary read in place from a read-only shared mapping.
+
+    Nothing is parsed up front: opening costs one `mmap` call, and the pages are
+    the kernel's page cache, shared by every worker that maps the same file.
+    Lookups binary-search the sorted term table and decode only the entries they
+    return. Exposes the two things `DictionaryLookupService` needs: `get(term)`
+    and `prefixes` (supports `in` for proper term prefixes).
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with self.path.open("rb") as handle:
+            try:
+                self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as exc:  # empty file
+                raise CompiledDictionaryError(f"Compiled dictionary is empty: {self.path}") from exc
+
+        if len(self._map) < _HEADER.size:
+            raise CompiledDictionaryError(f"Compiled dictionary is truncated: {self.path}")
+        magic, version, term_count, entry_count, max_term_length, *offsets = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise CompiledDictionaryError(f"Not a version {_VERSION} compiled dictionary: {self.path}")
+
+        view = memoryview(self._map)
+        self._term_offsets = _uint32_table(view, offsets[0], term_count + 1)
+        self._entry_starts = _uint32_table(view, offsets[2], term_count + 1)
+        self._entry_offsets = _uint32_table(view, offsets[3], entry_count + 1)
+        self._terms_at = offsets[1]
+        self._payload_at = offsets[4]
+        if self._payload_at + self._entry_offsets[entry_count] > len(self._map):
+            raise CompiledDictionaryError(f"Compiled dictionary is truncated: {self.path}")
+
+        self.term_count = term_count
+        self.entry_count = entry_count
+        self.max_term_length = max_term_length
+        self.prefixes = _PrefixView(self)
+        # Searches repeat (get(term) then `term in prefixes`, common characters); a small,
+        # per-worker memo of search results avoids re-walking the mapped table.
+        self._positions: dict[bytes, int] = {}
+
+    def __len__(self) -> int:
+        return self.term_count
+
+    def __iter__(self) -> Iterator[str]:
+        """Terms in sorted (UTF-8 byte) order."""
+        for position in range(self.term_count):
+            yield self.term_at(position)
+
+    def get(self, term: str, default: list[DictionaryEntry] | None = None) -> list[DictionaryEntry] | None:
+        key = term.encode("utf-8")
+        position = self._lower_bound(key)
+        if position >= self.term_count or self._term_bytes(position) != key:
+            return default
+        entries: list[DictionaryEntry] = []
+        base = self._payload_at
+        for entry_id in range(self._entry_starts[position], self._entry_starts[position + 1]):
+            raw = self._map[base + self._entry_offsets[entry_id] : base + self._entry_offsets[entry_id + 1]]
+            source, jyutping, *definitions = raw.decode("utf-8").split(_FIELD_SEP)
+            entries.append(DictionaryEntry(term=term, definitions=tuple(definitions), source=source, jyutping=jyutping))
+        return entries
+
+    def term_at(self, position: int) -> str:
+        return self._term_bytes(position).decode("utf-8")
+
+    def prefix_range(self, prefix: str) -> tuple[int, int]:
+        """Positions `[low, high)` of the terms that start with `prefix`."""
+        key = prefix.encode("utf-8")
+        # No UTF-8 sequence contains 0xff, so `key + b"\xff"` sorts after every extension of `key`.
+        return self._lower_bound(key), self._lower_bound(key + b"\xff")
+
+    def is_proper_prefix(self, text: str) -> bool:
+        key = text.encode("utf-8")
+        position = self._lower_bound(key)
+        if position < self.term_count and self._term_bytes(position) == key:
+            position += 1
+        # Every term that starts with `key` sorts directly after it.
+        return position < self.term_count and self._term_bytes(position).startswith(key)
+
+    def close(self) -> None:
+        for table in (self._term_offsets, self._entry_starts, self._entry_offsets):
+            if isinstance(table, memoryview):
+                table.release()
+        self._map.close()
+
+    def _term_bytes(self, position: int) -> bytes:
+        base = self._terms_at
+        return self._map[base + self._term_offsets[position] : base + self._term_offsets[position + 1]]
+
+    def _lower_bound(self, key: bytes) -> int:
+        position = self._positions.get(key)
+        if position is not None:
+            return position
+        low, high = 0, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._term_bytes(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if len(self._positions) >= _POSITION_MEMO_SIZE:
+            self._positions.clear()
+        self._positions[key] = low
+        return low
+
+
+class _PrefixView:
+    __slots__ = ("_dictionary",)
+
+    def __init__(self, dictionary: CompiledDictionary) -> None:
+        self._dictionary = dictionary
+
+    def __contains__(self, text: object) -> bool:
+        return isinstance(text, str) and self._dictionary.is_proper_prefix(text)
+
+
+def _align(position: int) -> int:
+    return (position + 7) & ~7
+
+
+def _uint32_table(view: memoryview, offset: int, count: int) -> memoryview | array:
+    raw = view[offset : offset + 4 * count]
+    if len(raw) != 4 * count:
+        raise CompiledDictionaryError("Compiled dictionary is truncated")
+    if sys.byteorder == "little":
+        return raw.cast("I")
+    # Big-endian hosts pay for a private copy of the offset tables; the text stays mapped.
+    table = array("I", raw.tobytes())
+    table.byteswap()
+    return table
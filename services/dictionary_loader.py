@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
 import re
+from typing import Iterator
 
 
 _LINE_RE = re.compile(
@@ -20,19 +21,22 @@ class DictionaryEntry:
 
 class DictionaryLoader:
     def load_file(self, path: str | Path, source: str) -> dict[str, list[DictionaryEntry]]:
+        by_term: dict[str, list[DictionaryEntry]] = {}
+        for entry in self.iter_file(path, source):
+            by_term.setdefault(entry.term, []).append(entry)
+        return by_term
+
+    def iter_file(self, path: str | Path, source: str) -> Iterator[DictionaryEntry]:
+        """Parsed entries in file order, without building a per-term dict."""
         raw_path = Path(path)
         if not raw_path.exists():
             raise FileNotFoundError(f"Dictionary file not found: {raw_path}")
 
-        by_term: dict[str, list[DictionaryEntry]] = {}
         with raw_path.open("r", encoding="utf-8") as handle:
             for line in handle:
                 entry = self._parse_line(line, source)
-                if entry is None:
-                    continue
-                by_term.setdefault(entry.term, []).append(entry)
-
-        return by_term
+                if entry is not None:
+                    yield entry
 
     def merge(self, *dictionaries: dict[str, list[DictionaryEntry]]) -> dict[str, list[DictionaryEntry]]:
         merged: dict[str, list[DictionaryEntry]] = {}
@@ -1,10 +1,17 @@
 from __future__ import annotations
 
+import sys
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
 from dataclasses import dataclass
 
+from services.dictionary_compiled import CompiledDictionary
 from services.dictionary_loader import DictionaryEntry
 
 
+_PREFIX_MEMO_SIZE = 16_384
+
+
 @dataclass(slots=True)
 class DictionaryCandidate:
     term: str
@@ -21,17 +28,139 @@ class DictionaryLookupResult:
     alternatives: tuple[DictionaryCandidate, ...]
 
 
+@dataclass(slots=True)
+class DictionarySegmentation:
+    """Every index's lookup result: `runs` are (start, end, candidate ids), best first."""
+
+    candidates: tuple[DictionaryCandidate, ...]
+    runs: tuple[tuple[int, int, tuple[int, ...]], ...]
+
+    def result_at(self, index: int) -> DictionaryLookupResult:
+        position = bisect_right(self.runs, index, key=lambda run: run[0]) - 1
+        if position < 0 or index >= self.runs[position][1]:
+            return DictionaryLookupResult(best=None, alternatives=())
+        best, *alternatives = (self.candidates[candidate_id] for candidate_id in self.runs[position][2])
+        return DictionaryLookupResult(best=best, alternatives=tuple(alternatives))
+
+
+class SortedTermPrefixes:
+    """Proper term prefixes, answered from the terms in code point order.
+
+    Every term that starts with `text` sorts directly after `text` itself, so `in`
+    is one binary search, as in `CompiledDictionary.is_proper_prefix`. The list
+    holds the dictionary's own term strings, so it costs one pointer per term where
+    a set of every proper prefix costs a new string and a hash slot per prefix.
+    """
+
+    __slots__ = ("terms", "_answers")
+
+    def __init__(self, terms: Iterable[str]) -> None:
+        self.terms = sorted(terms)
+        # Walks start with the same common characters over and over; remember recent answers.
+        self._answers: dict[str, bool] = {}
+
+    def __contains__(self, text: object) -> bool:
+        if not isinstance(text, str):
+            return False
+        answer = self._answers.get(text)
+        if answer is not None:
+            return answer
+        terms = self.terms
+        position = bisect_left(terms, text)
+        if position < len(terms) and terms[position] == text:
+            position += 1
+        answer = position < len(terms) and terms[position].startswith(text)
+        if len(self._answers) >= _PREFIX_MEMO_SIZE:
+            self._answers.clear()
+        self._answers[text] = answer
+        return answer
+
+    @property
+    def memory_bytes(self) -> int:
+        # Term strings belong to the dictionary; the memo is bounded and not counted.
+        return sys.getsizeof(self.terms)
+
+
 class DictionaryLookupService:
+    """Finds dictionary terms covering a tapped character.
+
+    The index answers whether a string is a proper prefix of some term. Only the
+    `max_term_length` starts before the tap can produce a covering term, and from
+    each start the walk stops at the first substring that is neither a term nor a
+    prefix, so a lookup costs O(max_term_length^2) probes however long the document
+    is.
+    """
+
     def __init__(self, entries_by_term: dict[str, list[DictionaryEntry]]) -> None:
         self.entries_by_term = entries_by_term
-        lengths = {len(term) for term in entries_by_term.keys() if term}
-        self.lengths_desc = sorted(lengths, reverse=True)
+        self.max_term_length = max((len(term) for term in entries_by_term), default=0)
+        self.prefixes = SortedTermPrefixes(entries_by_term)
+
+    @classmethod
+    def from_compiled(cls, compiled: CompiledDictionary) -> DictionaryLookupService:
+        """Look terms up in a compiled dictionary in place: no dicts, no prefix set."""
+        service = cls.__new__(cls)
+        service.entries_by_term = compiled
+        service.max_term_length = compiled.max_term_length
+        service.prefixes = compiled.prefixes
+        return service
+
+    def entries_for(self, term: str) -> list[DictionaryEntry]:
+        return list(self.entries_by_term.get(term) or ())
 
     def lookup_at(self, text: str, index: int, max_alternatives: int = 3) -> DictionaryLookupResult:
         if not text or index < 0 or index >= len(text):
             return DictionaryLookupResult(best=None, alternatives=())
 
         candidates = self._candidates_for_index(text, index)
+        return self._rank(candidates, index, max_alternatives)
+
+    def segment(self, text: str, max_alternatives: int = 3) -> DictionarySegmentation:
+        """Resolve every index of `text` in one pass, as `lookup_at` would.
+
+        Term occurrences are found once per start and shared by all the indexes they
+        cover; consecutive indexes with the same ranked candidates form one run.
+        """
+        matches_by_start = [self._matches_from(text, start, start + 1) for start in range(len(text))]
+        candidates: list[DictionaryCandidate] = []
+        candidate_ids: dict[int, int] = {}
+        occurrences: list[list[DictionaryCandidate]] = []
+        for start, matches in enumerate(matches_by_start):
+            found: list[DictionaryCandidate] = []
+            for term, entries in reversed(matches):
+                found.extend(self._to_candidates(term, start, entries, set()))
+            for candidate in found:
+                candidate_ids[id(candidate)] = len(candidates)
+                candidates.append(candidate)
+            occurrences.append(found)
+
+        runs: list[tuple[int, int, tuple[int, ...]]] = []
+        for index in range(len(text)):
+            covering = [
+                candidate
+                for start in range(index, max(-1, index - self.max_term_length), -1)
+                for candidate in occurrences[start]
+                if candidate.end > index
+            ]
+            result = self._rank(covering, index, max_alternatives)
+            if result.best is None:
+                continue
+            ids = tuple(candidate_ids[id(candidate)] for candidate in (result.best, *result.alternatives))
+            if runs and runs[-1][1] == index and runs[-1][2] == ids:
+                runs[-1] = (runs[-1][0], index + 1, ids)
+            else:
+                runs.append((index, index + 1, ids))
+
+        used = sorted({candidate_id for _start, _end, ids in runs for candidate_id in ids})
+        renumber = {old: new for new, old in enumerate(used)}
+        return DictionarySegmentation(
+            candidates=tuple(candidates[old] for old in used),
+            runs=tuple((start, end, tuple(renumber[old] for old in ids)) for start, end, ids in runs),
+        )
+
+    def _rank(
+        self, candidates: list[DictionaryCandidate], index: int, max_alternatives: int
+    ) -> DictionaryLookupResult:
         if not candidates:
             return DictionaryLookupResult(best=None, alternatives=())
 
@@ -52,38 +181,54 @@ class DictionaryLookupService:
         found: list[DictionaryCandidate] = []
         seen: set[tuple[str, int, int, str]] = set()
 
-        for start in range(index, -1, -1):
-            max_span = len(text) - start
-            for length in self.lengths_desc:
-                if length > max_span:
-                    continue
-                end = start + length
-                if not (start <= index < end):
-                    continue
-
-                term = text[start:end]
-                entries = self.entries_by_term.get(term)
-                if not entries:
-                    continue
-
-                for entry in entries:
-                    key = (term, start, end, entry.source)
-                    if key in seen:
-                        continue
-                    seen.add(key)
-                    found.append(
-                        DictionaryCandidate(
-                            term=term,
-                            start=start,
-                            end=end,
-                            definitions=entry.definitions,
-                            source=entry.source,
-                            jyutping=entry.jyutping,
-                        )
-                    )
+        for start in range(index, max(-1, index - self.max_term_length), -1):
+            # Longest first, matching the previous ordering of equal-score candidates.
+            for term, entries in reversed(self._matches_from(text, start, index + 1)):
+                found.extend(self._to_candidates(term, start, entries, seen))
 
         return found
 
+    def _matches_from(self, text: str, start: int, min_end: int) -> list[tuple[str, list[DictionaryEntry]]]:
+        """Terms at `start` that reach at least `min_end`, shortest first."""
+        matches: list[tuple[str, list[DictionaryEntry]]] = []
+        # Nothing reaches `min_end` unless text[start:min_end] is a term or a prefix of one.
+        end = min_end
+        term = text[start:end]
+        while True:
+            entries = self.entries_by_term.get(term)
+            if entries:
+                matches.append((term, entries))
+            if term not in self.prefixes or end >= len(text):
+                return matches
+            end += 1
+            term = text[start:end]
+
+    def _to_candidates(
+        self,
+        term: str,
+        start: int,
+        entries: list[DictionaryEntry],
+        seen: set[tuple[str, int, int, str]],
+    ) -> list[DictionaryCandidate]:
+        end = start + len(term)
+        candidates: list[DictionaryCandidate] = []
+        for entry in entries:
+            key = (term, start, end, entry.source)
+            if key in seen:
+                continue
+            seen.add(key)
+            candidates.append(
+                DictionaryCandidate(
+                    term=term,
+                    start=start,
+                    end=end,
+                    definitions=entry.definitions,
+                    source=entry.source,
+                    jyutping=entry.jyutping,
+                )
+            )
+        return candidates
+
     def _score(self, candidate: DictionaryCandidate, index: int) -> tuple[int, float, int, str]:
         length = candidate.end - candidate.start
         midpoint = (candidate.start + candidate.end - 1) / 2.0
@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+
+from flask import Flask
+
+from services.dictionary_compact import CompactDictionary, dictionary_memory_report
+from services.dictionary_compiled import CompiledDictionary, CompiledDictionaryError, open_compiled
+from services.dictionary_loader import DictionaryLoader
+from services.dictionary_lookup import DictionaryLookupService, SortedTermPrefixes
+from services.dictionary_search import DictionaryPrefixIndex, DictionaryReverseIndex, build_search_indexes
+from services.metrics import DICTIONARY_MEMORY_BYTES
+
+
+class DictionaryUnavailableError(Exception):
+    pass
+
+
+class DictionaryWarmingError(DictionaryUnavailableError):
+    """No dictionary has finished loading yet; the caller should retry shortly."""
+
+
+@dataclass(frozen=True, slots=True)
+class DictionarySources:
+    cedict_path: Path
+    canto_path: Path
+    compiled_path: Path | None = None
+
+    def fingerprint(self) -> tuple[tuple[int, int] | None, ...]:
+        """`(mtime_ns, size)` of each source, `None` for missing ones."""
+        stamps: list[tuple[int, int] | None] = []
+        for path in (self.cedict_path, self.canto_path, self.compiled_path):
+            try:
+                stat = path.stat() if path is not None else None
+            except OSError:
+                stat = None
+            stamps.append((stat.st_mtime_ns, stat.st_size) if stat is not None else None)
+        return tuple(stamps)
+
+    def content_hash(self) -> str:
+        """Hash of the bytes of every existing source; the same in every worker for the same files."""
+        digest = hashlib.blake2b(digest_size=8)
+        for path in (self.cedict_path, self.canto_path, self.compiled_path):
+            if path is None:
+                continue
+            try:
+                with path.open("rb") as handle:
+                    for chunk in iter(lambda: handle.read(1 << 20), b""):
+                        digest.update(chunk)
+            except OSError:
+                continue
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
+class LoadedDictionary:
+    service: DictionaryLookupService
+    term_count: int
+    generation: int
+    # `/search` indexes by mode: "prefix", "jyutping" and "english".
+    search_indexes: dict[str, DictionaryPrefixIndex | DictionaryReverseIndex]
+    # Heap bytes held by the parsed form; 0 for a mapped compiled file (shared page cache).
+    memory_bytes: int = 0
+    # Content hash of the source files; unlike `generation`, it agrees across workers.
+    version: str = ""
+
+    def close(self) -> None:
+        """Unmap a compiled dictionary; parsed ones are simply left to the garbage collector."""
+        entries = self.service.entries_by_term
+        if isinstance(entries, CompiledDictionary):
+            entries.close()
+
+
+def build_dictionary_service(
+    sources: DictionarySources, logger: logging.Logger | None = None
+) -> tuple[DictionaryLookupService, int, int]:
+    """Build a lookup service from `sources`; returns `(service, term_count, memory_bytes)`.
+
+    Prefers the compiled artifact when it is newer than both text files, otherwise
+    streams the text files into a `CompactDictionary`.
+    """
+    logger = logger or logging.getLogger(__name__)
+    if sources.compiled_path is not None:
+        try:
+            compiled = open_compiled(sources.compiled_path, (sources.cedict_path, sources.canto_path), logger)
+        except (OSError, CompiledDictionaryError) as exc:
+            logger.warning("Ignoring compiled dictionary %s: %s", sources.compiled_path, exc)
+            compiled = None
+        if compiled is not None:
+            return DictionaryLookupService.from_compiled(compiled), len(compiled), 0
+
+    missing = [str(path) for path in (sources.cedict_path, sources.canto_path) if not path.exists()]
+    if missing:
+        raise DictionaryUnavailableError(f"Dictionary files missing: {', '.join(missing)}")
+
+    # Stream both files straight into the compact form; no per-entry objects are kept.
+    loader = DictionaryLoader()
+    merged = CompactDictionary()
+    merged.extend(loader.iter_file(sources.cedict_path, source="cc-cedict"))
+    merged.extend(loader.iter_file(sources.canto_path, source="cc-canto"))
+    merged.freeze()
+    service = DictionaryLookupService(merged)
+    report = dictionary_memory_report(merged, prefix_bytes=service.prefixes.memory_bytes)
+    logger.info("Loaded dictionary: %s", report.to_dict())
+    return service, len(merged), report.total_bytes
+
+
+_managers: weakref.WeakSet[DictionaryManager] = weakref.WeakSet()
+
+
+class DictionaryManager:
+    """Owns a process's dictionary service: builds it off the request path and hot-swaps it.
+
+    `load()` starts a build on a background thread; until the first one finishes,
+    `current()` raises `DictionaryWarmingError` instead of blocking the request.
+    `watch()` polls the source files every `reload_interval_seconds` and rebuilds
+    when they change. A rebuild never blocks readers: the previous dictionary keeps
+    serving until the new one is complete, then a single attribute assignment swaps
+    it in, and a failed rebuild keeps the previous one. A swapped-out compiled
+    dictionary is unmapped `RETIRE_GRACE_SECONDS` later, once requests that started
+    with it have finished. With `background=False` everything happens inline on the
+    calling thread instead.
+    """
+
+    # A swapped-out dictionary may still be in use by requests that started with it.
+    RETIRE_GRACE_SECONDS = 60.0
+
+    def __init__(
+        self,
+        sources: DictionarySources,
+        reload_interval_seconds: float = 30.0,
+        background: bool = True,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        self.sources = sources
+        self.reload_interval_seconds = float(reload_interval_seconds)
+        self.background = background
+        self.logger = logger or logging.getLogger(__name__)
+        self._loaded: LoadedDictionary | None = None
+        self._error: DictionaryUnavailableError | None = None
+        self._attempted: tuple | None = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._builder: threading.Thread | None = None
+        self._rebuild_requested = False
+        self._stop_event = threading.Event()
+        self._watcher: threading.Thread | None = None
+        self._watcher_pid: int | None = None
+        _managers.add(self)
+
+    @property
+    def loaded(self) -> LoadedDictionary | None:
+        return self._loaded
+
+    @property
+    def is_building(self) -> bool:
+        builder = self._builder
+        return builder is not None and builder.is_alive()
+
+    def current(self) -> LoadedDictionary:
+        """The dictionary to serve now; raises instead of waiting for a build."""
+        loaded = self._loaded
+        if loaded is not None:
+            return loaded
+        if not self.background:
+            # Concurrent first requests wait for one build instead of each starting their own.
+            with self._lock:
+                if self._loaded is None:
+                    self._build(self.sources)
+            if self._loaded is not None:
+                return self._loaded
+            raise self._error or DictionaryUnavailableError("Dictionary failed to load.")
+        if self.is_building:
+            raise DictionaryWarmingError("Dictionary is still loading; try again shortly.")
+        if self._error is None or self.sources.fingerprint() != self._attempted:
+            # Never loaded, or the files changed since the last failed attempt.
+            self.load()
+            raise DictionaryWarmingError("Dictionary is still loading; try again shortly.")
+        raise self._error
+
+    def wait(self, timeout: float | None = None) -> LoadedDictionary:
+        """Block until a dictionary is loaded (or the first build fails)."""
+        self.load()
+        self._ready.wait(timeout)
+        loaded = self._loaded
+        if loaded is not None:
+            return loaded
+        raise self._error or DictionaryWarmingError("Dictionary is still loading.")
+
+    def load(self) -> None:
+        """Start a build unless one is loaded or running already."""
+        if self._loaded is None and not self.is_building:
+            self.reload()
+
+    def reload(self, sources: DictionarySources | None = None) -> None:
+        """Rebuild from `sources` (default: the current ones) and swap it in when done."""
+        with self._lock:
+            if sources is not None:
+                self.sources = sources
+            if not self.background:
+                self._build(self.sources)
+                return
+            if self._builder is not None and self._builder.is_alive():
+                # The running build may have read the old files; go again when it finishes.
+                self._rebuild_requested = True
+                return
+            self._builder = threading.Thread(target=self._run_builds, name="dictionary-loader", daemon=True)
+            self._builder.start()
+
+    def check_for_changes(self) -> bool:
+        """Rebuild if any source changed since the last build; returns whether it did."""
+        if self.sources.fingerprint() == self._attempted:
+            return False
+        self.logger.info("Dictionary sources changed; rebuilding in the background")
+        self.reload()
+        return True
+
+    def watch(self) -> None:
+        """Start this process's file watcher (threads do not survive fork)."""
+        if self.reload_interval_seconds <= 0 or not self.background:
+            return
+        if self._watcher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+            self._stop_event.clear()
+            self._watcher = threading.Thread(target=self._watch, name="dictionary-watcher", daemon=True)
+            self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        for thread in (self._watcher, self._builder):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout=5)
+        self._watcher_pid = None
+
+    def _run_builds(self) -> None:
+        while True:
+            with self._lock:
+                self._rebuild_requested = False
+                sources = self.sources
+            self._build(sources)
+            with self._lock:
+                if not self._rebuild_requested or self._stop_event.is_set():
+                    return
+
+    def _build(self, sources: DictionarySources) -> None:
+        fingerprint = sources.fingerprint()
+        try:
+            service, term_count, memory_bytes = build_dictionary_service(sources, self.logger)
+            # Sorted and inverted here, off the request path, like the service itself.
+            prefixes = service.prefixes
+            search_indexes = build_search_indexes(
+                service.entries_by_term, prefixes.terms if isinstance(prefixes, SortedTermPrefixes) else None
+            )
+            self.logger.info(
+                "Built dictionary search indexes: %s",
+                {
+                    mode: {"tokens": len(index), "postings": index.posting_count, "bytes": index.memory_bytes}
+                    for mode, index in search_indexes.items()
+                    if isinstance(index, DictionaryReverseIndex)
+                },
+            )
+            version = sources.content_hash()
+        except DictionaryUnavailableError as exc:
+            self._attempted = fingerprint
+            self._error = exc
+            if self._loaded is not None:
+                self.logger.warning("Dictionary rebuild failed; keeping the previous one: %s", exc)
+        except Exception as exc:  # keep serving the previous dictionary on a bad file
+            self._attempted = fingerprint
+            self._error = DictionaryUnavailableError(f"Dictionary failed to load: {exc}")
+            self.logger.exception("Dictionary build failed")
+        else:
+            previous = self._loaded
+            self._generation += 1
+            self._attempted = fingerprint
+            self._error = None
+            self._loaded = LoadedDictionary(
+                service=service,
+                term_count=term_count,
+                generation=self._generation,
+                search_indexes=search_indexes,
+                memory_bytes=memory_bytes,
+                version=version,
+            )
+            DICTIONARY_MEMORY_BYTES.inc(memory_bytes - (previous.memory_bytes if previous else 0))
+            if previous is not None:
+                self._retire(previous)
+        finally:
+            self._ready.set()
+
+    def _retire(self, previous: LoadedDictionary) -> None:
+        if not isinstance(previous.service.entries_by_term, CompiledDictionary):
+            return
+        if self.RETIRE_GRACE_SECONDS <= 0:
+            previous.close()
+            return
+        timer = threading.Timer(self.RETIRE_GRACE_SECONDS, previous.close)
+        timer.daemon = True
+        timer.start()
+
+    def _watch(self) -> None:
+        while not self._stop_event.wait(self.reload_interval_seconds):
+            try:
+                self.check_for_changes()
+            except Exception:  # pragma: no cover - keep the watcher alive on unexpected I/O errors
+                self.logger.exception("Dictionary watcher pass failed")
+
+    def _after_fork_in_child(self) -> None:
+        # Only the forking thread survives: locks may be held by threads that are gone.
+        self._lock = threading.Lock()
+        self._builder = None
+        self._watcher = None
+        self._watcher_pid = None
+
+
+def _after_fork_in_child() -> None:
+    for manager in list(_managers):
+        manager._after_fork_in_child()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def dictionary_sources_from_config(app: Flask) -> DictionarySources:
+    def resolve(path_value: str) -> Path:
+        path = Path(path_value)
+        return path if path.is_absolute() else Path(app.root_path) / path
+
+    compiled = str(app.config.get("DICTIONARY_COMPILED_PATH", ""))
+    return DictionarySources(
+        cedict_path=resolve(str(app.config.get("DICTIONARY_CC_CEDICT_PATH", ""))),
+        canto_path=resolve(str(app.config.get("DICTIONARY_CC_CANTO_PATH", ""))),
+        compiled_path=resolve(compiled) if compiled else None,
+    )
+
+
+def get_dictionary_manager(app: Flask) -> DictionaryManager:
+    """`app`'s manager; a config change to the source paths rebuilds in the background."""
+    sources = dictionary_sources_from_config(app)
+    ext = app.extensions.setdefault("dictionary", {})
+    manager: DictionaryManager | None = ext.get("manager")
+    if manager is None:
+        manager = DictionaryManager(
+            sources,
+            reload_interval_seconds=float(app.config.get("DICTIONARY_RELOAD_INTERVAL_SECONDS", 30)),
+            background=bool(app.config.get("DICTIONARY_BACKGROUND_LOAD", True)),
+            logger=app.logger,
+        )
+        ext["manager"] = manager
+    elif manager.sources != sources:
+        manager.reload(sources)
+    return manager
+
+
+def init_dictionary_manager(app: Flask) -> None:
+    """Start loading the dictionary on the first request rather than in the first lookup.
+
+    Not in `create_app` itself: every `flask` CLI command creates the app too. A
+    preloading gunicorn master builds it before forking instead (`services/preload.py`).
+    """
+    if not app.config.get("DICTIONARY_ENABLED", True) or not app.config.get("DICTIONARY_BACKGROUND_LOAD", True):
+        return
+
+    @app.before_request
+    def _load_dictionary() -> None:
+        get_dictionary_manager(app).load()
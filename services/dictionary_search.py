@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import re
+import sys
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+from services.dictionary_compiled import CompiledDictionary
+from services.dictionary_loader import DictionaryEntry
+
+
+_PAGE_CACHE_SIZE = 1024
+# Full hit lists of recent multi-token queries, so paging does not intersect again.
+_INTERSECTION_CACHE_SIZE = 64
+
+SEARCH_MODES = ("prefix", "jyutping", "english")
+
+_JYUTPING_SYLLABLE = re.compile(r"[a-z]+[1-6]?")
+_ENGLISH_WORD = re.compile(r"[a-z]+")
+# CC-CEDICT cross-references and measure words carry pinyin: "see 廣東|广东[Guang3 dong1]".
+_PINYIN_READING = re.compile(r"\[[^\]]*\]")
+_ENGLISH_STOPWORDS = frozenset(
+    {"a", "an", "and", "as", "at", "be", "by", "cl", "for", "from", "in", "is", "it", "of", "on", "or",
+     "sb", "see", "sth", "the", "to", "with"}
+)
+
+
+@dataclass(frozen=True, slots=True)
+class SearchMatch:
+    term: str
+    jyutping: str
+    definitions: tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class SearchPage:
+    query: str
+    total: int
+    offset: int
+    matches: tuple[SearchMatch, ...]
+
+    @property
+    def next_offset(self) -> int | None:
+        end = self.offset + len(self.matches)
+        return end if end < self.total else None
+
+
+class _PageCache:
+    """Small thread-safe LRU of search pages keyed by `(query, offset, limit)`."""
+
+    def __init__(self, size: int = _PAGE_CACHE_SIZE) -> None:
+        self._size = size
+        self._pages: OrderedDict[tuple[str, int, int], SearchPage] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[str, int, int]) -> SearchPage | None:
+        with self._lock:
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+            return page
+
+    def put(self, key: tuple[str, int, int], page: SearchPage) -> None:
+        with self._lock:
+            self._pages[key] = page
+            if len(self._pages) > self._size:
+                self._pages.popitem(last=False)
+
+
+class DictionaryPrefixIndex:
+    """Terms in code point order, for prefix (autocomplete) search.
+
+    Every term starting with a prefix sits in one contiguous run of the sorted
+    terms, found with two binary searches, so a page costs O(log n + limit) however
+    many terms match. A compiled dictionary is already sorted (UTF-8 byte order is
+    code point order) and is searched in place; other dictionaries use a sorted list
+    of their terms, normally the lookup service's own (`SortedTermPrefixes.terms`),
+    so it is built once. Recent pages are kept in a small LRU
+    because autocomplete repeats prefixes (backspace, several users typing the
+    same common character).
+    """
+
+    def __init__(
+        self,
+        entries_by_term: Mapping[str, list[DictionaryEntry]] | CompiledDictionary,
+        sorted_terms: list[str] | None = None,
+    ) -> None:
+        self._entries = entries_by_term
+        self._compiled = entries_by_term if isinstance(entries_by_term, CompiledDictionary) else None
+        self._terms: list[str] | None = None
+        if self._compiled is None:
+            self._terms = sorted_terms if sorted_terms is not None else sorted(entries_by_term)
+        self._pages = _PageCache()
+
+    def __len__(self) -> int:
+        return len(self._compiled) if self._compiled is not None else len(self._terms)  # type: ignore[arg-type]
+
+    def search(self, prefix: str, limit: int = 10, offset: int = 0) -> SearchPage:
+        """Terms starting with `prefix`, in code point order, `limit` at a time from `offset`."""
+        limit = max(0, int(limit))
+        offset = max(0, int(offset))
+        key = (prefix, offset, limit)
+        page = self._pages.get(key)
+        if page is not None:
+            return page
+
+        low, high = self._prefix_range(prefix)
+        matches = tuple(
+            self.match(self.term_at(position))
+            for position in range(min(low + offset, high), min(low + offset + limit, high))
+        )
+        page = SearchPage(query=prefix, total=high - low, offset=offset, matches=matches)
+        self._pages.put(key, page)
+        return page
+
+    def _prefix_range(self, prefix: str) -> tuple[int, int]:
+        if self._compiled is not None:
+            return self._compiled.prefix_range(prefix)
+        terms = self._terms
+        if not prefix:
+            return 0, len(terms)  # type: ignore[arg-type]
+        low = bisect_left(terms, prefix)  # type: ignore[arg-type]
+        last = ord(prefix[-1])
+        if last == sys.maxunicode:
+            high = len(terms)  # type: ignore[arg-type]
+            while high > low and not terms[high - 1].startswith(prefix):  # type: ignore[index]
+                high -= 1
+            return low, high
+        # Every term with the prefix sorts before the prefix with its last character bumped.
+        return low, bisect_left(terms, prefix[:-1] + chr(last + 1), low)  # type: ignore[arg-type]
+
+    def term_at(self, position: int) -> str:
+        if self._compiled is not None:
+            return self._compiled.term_at(position)
+        return self._terms[position]  # type: ignore[index]
+
+    def entries(self, term: str) -> list[DictionaryEntry]:
+        return self._entries.get(term) or []
+
+    def match(self, term: str) -> SearchMatch:
+        entries = self.entries(term)
+        jyutping = next((entry.jyutping for entry in entries if entry.jyutping), "")
+        return SearchMatch(term=term, jyutping=jyutping, definitions=entries[0].definitions if entries else ())
+
+
+class DictionaryReverseIndex(ABC):
+    """Inverted index from search tokens to terms, for reverse lookup.
+
+    Built once per dictionary, off the request path, over the term positions of a
+    `DictionaryPrefixIndex`. Postings are stored flat rather than as a list per token:
+    one `array('I')` of term positions in which each token's run is presorted by rank
+    (token score, then term length, then code point order), and `_starts[slot]` to
+    `_starts[slot + 1]` bounds a token's run. A one-token query is a slice of its run.
+    With several tokens, the rarest token's run is walked in order and terms posted
+    under every other token are kept, so results follow that token's ranking.
+    Subclasses decide what the tokens of an entry and of a query are.
+    """
+
+    def __init__(self, terms: DictionaryPrefixIndex) -> None:
+        self._terms = terms
+        runs: dict[str, list[int]] = {}
+        for position in range(len(terms)):
+            term = terms.term_at(position)
+            rank = min(len(term), 0xFF) << 32 | position
+            for token, score in self.index_tokens(terms.entries(term)).items():
+                runs.setdefault(token, []).append(score << 40 | rank)
+
+        self._slots: dict[str, int] = {}
+        self._starts = array("I", [0])
+        self._postings = array("I")
+        for token in sorted(runs):
+            keys = runs.pop(token)
+            keys.sort()
+            self._slots[token] = len(self._slots)
+            self._postings.extend(key & 0xFFFFFFFF for key in keys)
+            self._starts.append(len(self._postings))
+        self._hits: OrderedDict[tuple[tuple[int, int], ...], array] = OrderedDict()
+        self._lock = threading.Lock()
+        self._pages = _PageCache()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @property
+    def posting_count(self) -> int:
+        return len(self._postings)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Heap bytes of the postings and token table (not the page caches)."""
+        arrays = self._postings.itemsize * len(self._postings) + self._starts.itemsize * len(self._starts)
+        return arrays + sys.getsizeof(self._slots) + sum(sys.getsizeof(token) for token in self._slots)
+
+    @abstractmethod
+    def index_tokens(self, entries: list[DictionaryEntry]) -> dict[str, int]:
+        """Tokens a term is posted under, each with its best (lowest) score."""
+
+    @abstractmethod
+    def query_tokens(self, query: str) -> list[str]:
+        """Tokens every result must be posted under."""
+
+    def search(self, query: str, limit: int = 10, offset: int = 0) -> SearchPage:
+        """Terms posted under every token of `query`, best ranked first, `limit` at a time from `offset`."""
+        limit = max(0, int(limit))
+        offset = max(0, int(offset))
+        key = (query, offset, limit)
+        page = self._pages.get(key)
+        if page is not None:
+            return page
+
+        bounds = [self._bounds(token) for token in dict.fromkeys(self.query_tokens(query))]
+        if not bounds:
+            total, positions = 0, array("I")
+        elif len(bounds) == 1:
+            start, end = bounds[0]
+            total = end - start
+            positions = self._postings[min(start + offset, end) : min(start + offset + limit, end)]
+        else:
+            hits = self._intersection(tuple(sorted(bounds, key=lambda run: run[1] - run[0])))
+            total, positions = len(hits), hits[offset : offset + limit]
+        matches = tuple(self._terms.match(self._terms.term_at(position)) for position in positions)
+        page = SearchPage(query=query, total=total, offset=offset, matches=matches)
+        self._pages.put(key, page)
+        return page
+
+    def _bounds(self, token: str) -> tuple[int, int]:
+        slot = self._slots.get(token)
+        if slot is None:
+            return 0, 0
+        return self._starts[slot], self._starts[slot + 1]
+
+    def _intersection(self, runs: tuple[tuple[int, int], ...]) -> array:
+        """Positions in every run, in the rank order of the first (rarest); cached across pages."""
+        with self._lock:
+            hits = self._hits.get(runs)
+            if hits is not None:
+                self._hits.move_to_end(runs)
+                return hits
+        start, end = runs[0]
+        rarest = self._postings[start:end]
+        common = frozenset(rarest).intersection(*(self._postings[low:high] for low, high in runs[1:]))
+        hits = array("I", (position for position in rarest if position in common))
+        with self._lock:
+            self._hits[runs] = hits
+            if len(self._hits) > _INTERSECTION_CACHE_SIZE:
+                self._hits.popitem(last=False)
+        return hits
+
+
+class JyutpingReverseIndex(DictionaryReverseIndex):
+    """Jyutping syllables to terms.
+
+    Every syllable is posted twice, with its tone ("gwong2") and without ("gwong"),
+    so each query syllable may give its tone or leave it out. A term read as the
+    syllable alone ranks first, then terms whose reading starts with it.
+    """
+
+    def index_tokens(self, entries: list[DictionaryEntry]) -> dict[str, int]:
+        scores: dict[str, int] = {}
+        for entry in entries:
+            syllables = _JYUTPING_SYLLABLE.findall(entry.jyutping.lower())
+            for place, syllable in enumerate(syllables):
+                score = 0 if len(syllables) == 1 else 1 if place == 0 else 2
+                for token in (syllable, syllable.rstrip("123456")):
+                    if score < scores.get(token, 3):
+                        scores[token] = score
+        return scores
+
+    def query_tokens(self, query: str) -> list[str]:
+        return _JYUTPING_SYLLABLE.findall(query.lower())
+
+
+class EnglishReverseIndex(DictionaryReverseIndex):
+    """Words of the English definitions to terms.
+
+    A term whose definition is the word itself ("to go" for "go") ranks first, then
+    terms with the word in their first definition, then the rest. Stopwords and
+    CC-CEDICT's bracketed pinyin are not indexed.
+    """
+
+    def index_tokens(self, entries: list[DictionaryEntry]) -> dict[str, int]:
+        scores: dict[str, int] = {}
+        first = True
+        for entry in entries:
+            for definition in entry.definitions:
+                words = _english_words(definition)
+                for word in words:
+                    score = 0 if len(words) == 1 else 1 if first else 2
+                    if score < scores.get(word, 3):
+                        scores[word] = score
+                first = False
+        return scores
+
+    def query_tokens(self, query: str) -> list[str]:
+        return _english_words(query)
+
+
+def _english_words(text: str) -> list[str]:
+    words = _ENGLISH_WORD.findall(_PINYIN_READING.sub(" ", text.lower()))
+    return list(dict.fromkeys(word for word in words if word not in _ENGLISH_STOPWORDS))
+
+
+def build_search_indexes(
+    entries_by_term: Mapping[str, list[DictionaryEntry]] | CompiledDictionary,
+    sorted_terms: list[str] | None = None,
+) -> dict[str, DictionaryPrefixIndex | DictionaryReverseIndex]:
+    """Every index behind `/search`, keyed by mode (see `SEARCH_MODES`)."""
+    prefix = DictionaryPrefixIndex(entries_by_term, sorted_terms)
+    return {"prefix": prefix, "jyutping": JyutpingReverseIndex(prefix), "english": EnglishReverseIndex(prefix)}
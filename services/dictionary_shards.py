@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+from services.dictionary_loader import DictionaryEntry
+
+
+MANIFEST_NAME = "manifest.json"
+DEFAULT_SHARD_COUNT = 256
+SHARD_NAME = re.compile(r"^shard-\d{3}\.[0-9a-f]{16}\.json\.gz$")
+
+
+@dataclass(frozen=True, slots=True)
+class ShardManifest:
+    version: str
+    shard_count: int
+    max_term_length: int
+    shards: tuple[str, ...]
+    # `DictionarySources.content_hash()` of the files the shards were built from.
+    sources: str = ""
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "sources": self.sources,
+            "shard_count": self.shard_count,
+            "max_term_length": self.max_term_length,
+            "shards": list(self.shards),
+        }
+
+
+def shard_for(term: str, shard_count: int) -> int:
+    """Bucket of `term`: its leading code point modulo the shard count (mirrored in the browser)."""
+    return ord(term[0]) % shard_count
+
+
+def build_shards(
+    terms: Iterable[tuple[str, list[DictionaryEntry]]],
+    out_dir: str | Path,
+    shard_count: int = DEFAULT_SHARD_COUNT,
+    sources: str = "",
+) -> ShardManifest:
+    """Write gzipped JSON shards of `(term, entries)` pairs plus a manifest into `out_dir`.
+
+    All terms with the same leading character land in one shard, so a browser that
+    wants every term starting at a position fetches exactly one file. Shard names
+    carry a hash of their bytes and can be cached forever; only `manifest.json`
+    changes between builds. Each shard is `{"terms": {term: [[source, jyutping,
+    [definitions...]], ...]}}`, entries in the server's merge order. `sources` is the
+    content hash of the dictionary files; the server only serves the manifest while it
+    matches the loaded dictionary's `version`.
+    """
+    if shard_count < 1 or shard_count > 999:
+        raise ValueError("shard_count must be between 1 and 999")
+    buckets: list[dict[str, list]] = [{} for _ in range(shard_count)]
+    max_term_length = 0
+    for term, entries in terms:
+        if not term or not entries:
+            continue
+        buckets[shard_for(term, shard_count)][term] = [
+            [entry.source, entry.jyutping, list(entry.definitions)] for entry in entries
+        ]
+        max_term_length = max(max_term_length, len(term))
+
+    target = Path(out_dir)
+    target.mkdir(parents=True, exist_ok=True)
+    names: list[str] = []
+    version = hashlib.sha256()
+    for bucket, by_term in enumerate(buckets):
+        raw = json.dumps({"terms": by_term}, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+        # mtime=0 keeps the bytes, and so the name, identical across rebuilds of the same data.
+        payload = gzip.compress(raw.encode("utf-8"), compresslevel=9, mtime=0)
+        digest = hashlib.sha256(payload).hexdigest()[:16]
+        name = f"shard-{bucket:03d}.{digest}.json.gz"
+        if not (target / name).exists():
+            _write_atomic(target / name, payload)
+        names.append(name)
+        version.update(digest.encode("ascii"))
+
+    manifest = ShardManifest(
+        version=version.hexdigest()[:16],
+        shard_count=shard_count,
+        max_term_length=max_term_length,
+        shards=tuple(names),
+        sources=sources,
+    )
+    _write_atomic(target / MANIFEST_NAME, json.dumps(manifest.to_dict(), indent=2).encode("utf-8"))
+
+    # Browsers still holding the previous manifest fall back to the server for a missing shard.
+    current = set(names)
+    for path in target.iterdir():
+        if SHARD_NAME.match(path.name) and path.name not in current:
+            path.unlink()
+    return manifest
+
+
+def _write_atomic(path: Path, payload: bytes) -> None:
+    temp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temp.write_bytes(payload)
+    os.replace(temp, path)
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable
+
+from services.dictionary_lookup import DictionarySegmentation
+
+
+def document_id_for(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass(slots=True)
+class RegisteredDocument:
+    document_id: str
+    text: str
+    last_used: float
+    # Keyed by whatever produced it (dictionary service, alternatives limit).
+    _segmentation: tuple[object, DictionarySegmentation] | None = field(default=None, repr=False)
+
+    def segmentation(self, key: object, build: Callable[[str], DictionarySegmentation]) -> DictionarySegmentation:
+        cached = self._segmentation
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        segmentation = build(self.text)
+        self._segmentation = (key, segmentation)
+        return segmentation
+
+    def cached_segmentation(self, key: object) -> DictionarySegmentation | None:
+        cached = self._segmentation
+        return cached[1] if cached is not None and cached[0] == key else None
+
+
+class DocumentRegistry:
+    """Short-lived, per-user registry of normalized reader texts, keyed by content hash.
+
+    Clients register a passage once and then send `(document_id, index)`; a miss
+    (expired, evicted, or registered with another worker) asks them to re-register.
+    Each user gets their own LRU of at most `max_documents`, so one busy reader
+    cannot push everyone else's documents out. Users idle for longer than the TTL
+    are dropped as a whole.
+    """
+
+    def __init__(self, max_documents: int, ttl_seconds: float) -> None:
+        self.max_documents = max(0, int(max_documents))
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+        # Users in order of last activity; each user's documents least recently used first.
+        self._users: OrderedDict[int, OrderedDict[str, RegisteredDocument]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_documents > 0 and self.ttl_seconds > 0
+
+    def __len__(self) -> int:
+        return sum(len(documents) for documents in self._users.values())
+
+    def register(self, user_id: int, text: str) -> RegisteredDocument:
+        document_id = document_id_for(text)
+        now = time.monotonic()
+        with self._lock:
+            self._expire_idle_users(now)
+            documents = self._users.get(user_id)
+            document = documents.get(document_id) if documents is not None else None
+            if document is None:
+                document = RegisteredDocument(document_id=document_id, text=text, last_used=now)
+                if not self.enabled:
+                    return document
+                if documents is None:
+                    documents = self._users[user_id] = OrderedDict()
+                documents[document_id] = document
+            else:
+                document.last_used = now
+            self._touch(user_id, documents, document_id)
+            self._evict(documents, now)
+        return document
+
+    def get(self, user_id: int, document_id: str) -> RegisteredDocument | None:
+        now = time.monotonic()
+        with self._lock:
+            documents = self._users.get(user_id)
+            document = documents.get(document_id) if documents is not None else None
+            if document is None:
+                return None
+            if now - document.last_used > self.ttl_seconds:
+                del documents[document_id]
+                if not documents:
+                    del self._users[user_id]
+                return None
+            document.last_used = now
+            self._touch(user_id, documents, document_id)
+            return document
+
+    def _touch(self, user_id: int, documents: OrderedDict[str, RegisteredDocument], document_id: str) -> None:
+        documents.move_to_end(document_id)
+        self._users.move_to_end(user_id)
+
+    def _evict(self, documents: OrderedDict[str, RegisteredDocument], now: float) -> None:
+        while documents:
+            oldest = next(iter(documents.values()))
+            if len(documents) <= self.max_documents and now - oldest.last_used <= self.ttl_seconds:
+                return
+            documents.popitem(last=False)
+
+    def _expire_idle_users(self, now: float) -> None:
+        # A user's most recent document is last, so the first fresh one ends the sweep.
+        while self._users:
+            user_id, documents = next(iter(self._users.items()))
+            if documents and now - next(reversed(documents.values())).last_used <= self.ttl_seconds:
+                return
+            del self._users[user_id]
@@ -0,0 +1,443 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterable
+
+from flask import Flask, g
+
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+_ARCHIVE_FILE = "archive.json"
+_LOCK_FILE = "archive.lock"
+
+
+class MetricsRegistry:
+    """Process-local metric values, periodically snapshotted to `<dir>/<pid>.json`.
+
+    Every gunicorn worker writes its own snapshot; `render()` merges all of them so a
+    scrape hitting any one worker sees totals for the whole server. Snapshots left by
+    dead workers are folded into a shared archive so counters never go backwards.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = {}
+        self._directory: Path | None = None
+        self._flush_seconds = 1.0
+        self._pid = os.getpid()
+        self._counters: dict[tuple[str, tuple[str, ...]], float] = {}
+        self._gauges: dict[tuple[str, tuple[str, ...]], float] = {}
+        self._histograms: dict[tuple[str, tuple[str, ...]], list] = {}
+        self._dirty = False
+        self._flusher: threading.Thread | None = None
+
+    def configure(self, directory: str | Path | None, flush_seconds: float = 1.0) -> None:
+        with self._lock:
+            self._directory = Path(directory) if directory else None
+            self._flush_seconds = max(0.05, float(flush_seconds))
+            if self._directory is not None:
+                self._directory.mkdir(parents=True, exist_ok=True)
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(self, name, help_text, tuple(labelnames)))
+
+    def gauge(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(self, name, help_text, tuple(labelnames)))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(self, name, help_text, tuple(labelnames), tuple(sorted(buckets))))
+
+    def _after_fork_in_child(self) -> None:
+        # The flusher may have held the lock at fork time; the child gets a fresh one.
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+            self._dirty = False
+
+    # -- updates ---------------------------------------------------------------
+
+    def _add_counter(self, key: tuple[str, tuple[str, ...]], amount: float) -> None:
+        with self._lock:
+            self._check_pid()
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+            self._mark_dirty()
+
+    def _add_gauge(self, key: tuple[str, tuple[str, ...]], amount: float) -> None:
+        with self._lock:
+            self._check_pid()
+            self._gauges[key] = self._gauges.get(key, 0.0) + amount
+            self._mark_dirty()
+
+    def _observe(self, key: tuple[str, tuple[str, ...]], buckets: tuple[float, ...], value: float) -> None:
+        with self._lock:
+            self._check_pid()
+            entry = self._histograms.get(key)
+            if entry is None:
+                entry = [[0] * (len(buckets) + 1), 0.0, 0]
+                self._histograms[key] = entry
+            for idx, bound in enumerate(buckets):
+                if value <= bound:
+                    entry[0][idx] += 1
+                    break
+            else:
+                entry[0][-1] += 1
+            entry[1] += value
+            entry[2] += 1
+            self._mark_dirty()
+
+    def _check_pid(self) -> None:
+        # Values recorded before a fork belong to the parent; a child starts from zero.
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+            self._flusher = None
+
+    def _mark_dirty(self) -> None:
+        self._dirty = True
+        if self._directory is not None and self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flusher", daemon=True)
+            self._flusher.start()
+
+    # -- snapshots -------------------------------------------------------------
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._directory is None or self._pid != os.getpid():
+                return
+            snapshot = self._snapshot()
+            self._dirty = False
+            directory = self._directory
+        _write_json_atomic(directory / f"{snapshot['pid']}.json", snapshot)
+
+    def _flush_loop(self) -> None:
+        owner = os.getpid()
+        while os.getpid() == owner:
+            time.sleep(self._flush_seconds)
+            if self._dirty:
+                try:
+                    self.flush()
+                except OSError:
+                    pass
+
+    def _snapshot(self) -> dict:
+        return {
+            "pid": self._pid,
+            "counters": [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+            "gauges": [[name, list(labels), value] for (name, labels), value in self._gauges.items()],
+            "histograms": [
+                [name, list(labels), list(entry[0]), entry[1], entry[2]]
+                for (name, labels), entry in self._histograms.items()
+            ],
+        }
+
+    def collect(self) -> dict:
+        """Merged values from every live worker snapshot, the archive and this process."""
+        with self._lock:
+            self._check_pid()
+            local = self._snapshot()
+            directory = self._directory
+
+        merged = _MergedValues()
+        if directory is None:
+            merged.add(local, include_gauges=True)
+            return merged.as_dict()
+
+        self.flush()
+        _archive_dead_snapshots(directory)
+        archive = _read_json(directory / _ARCHIVE_FILE)
+        if archive:
+            merged.add(archive, include_gauges=False)
+        for path in sorted(directory.glob("*.json")):
+            if path.name == _ARCHIVE_FILE:
+                continue
+            snapshot = _read_json(path)
+            if snapshot:
+                merged.add(snapshot, include_gauges=True)
+        return merged.as_dict()
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        values = self.collect()
+        lines: list[str] = []
+        for name in sorted(self._metrics):
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.help_text}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            if metric.kind == "histogram":
+                for labels, (bucket_counts, total, count) in sorted(values["histograms"].get(name, {}).items()):
+                    labelnames = metric.labelnames
+                    cumulative = 0
+                    for bound, bucket_count in zip(metric.buckets, bucket_counts):
+                        cumulative += bucket_count
+                        le = _format_value(bound)
+                        lines.append(f"{name}_bucket{_labels(labelnames + ('le',), labels + (le,))} {cumulative}")
+                    lines.append(f"{name}_bucket{_labels(labelnames + ('le',), labels + ('+Inf',))} {count}")
+                    lines.append(f"{name}_sum{_labels(labelnames, labels)} {_format_value(total)}")
+                    lines.append(f"{name}_count{_labels(labelnames, labels)} {count}")
+            elif metric.kind == "gauge":
+                for (labels, pid), value in sorted(values["gauges"].get(name, {}).items()):
+                    series_labels = _labels(metric.labelnames + ("pid",), labels + (str(pid),))
+                    lines.append(f"{name}{series_labels} {_format_value(value)}")
+            else:
+                for labels, value in sorted(values["counters"].get(name, {}).items()):
+                    lines.append(f"{name}{_labels(metric.labelnames, labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, registry: MetricsRegistry, name: str, help_text: str, labelnames: tuple[str, ...]) -> None:
+        self.registry = registry
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+
+    def _key(self, labels: dict[str, object]) -> tuple[str, tuple[str, ...]]:
+        return self.name, tuple(str(labels.get(label, "")) for label in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self.registry._add_counter(self._key(labels), float(amount))
+
+
+class Gauge(_Metric):
+    """Per-process gauge; exported with a `pid` label for every live worker."""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        self.registry._add_gauge(self._key(labels), float(amount))
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        self.registry._add_gauge(self._key(labels), -float(amount))
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...],
+        buckets: tuple[float, ...],
+    ) -> None:
+        super().__init__(registry, name, help_text, labelnames)
+        self.buckets = buckets
+
+    def observe(self, value: float, **labels: object) -> None:
+        self.registry._observe(self._key(labels), self.buckets, float(value))
+
+
+class _MergedValues:
+    def __init__(self) -> None:
+        self.counters: dict[str, dict[tuple[str, ...], float]] = {}
+        self.gauges: dict[str, dict[tuple[tuple[str, ...], int], float]] = {}
+        self.histograms: dict[str, dict[tuple[str, ...], list]] = {}
+
+    def add(self, snapshot: dict, include_gauges: bool) -> None:
+        for name, labels, value in snapshot.get("counters", []):
+            series = self.counters.setdefault(name, {})
+            series[tuple(labels)] = series.get(tuple(labels), 0.0) + value
+        if include_gauges:
+            pid = int(snapshot.get("pid", 0))
+            for name, labels, value in snapshot.get("gauges", []):
+                self.gauges.setdefault(name, {})[(tuple(labels), pid)] = value
+        for name, labels, buckets, total, count in snapshot.get("histograms", []):
+            series = self.histograms.setdefault(name, {})
+            entry = series.get(tuple(labels))
+            if entry is None or len(entry[0]) != len(buckets):
+                series[tuple(labels)] = [list(buckets), total, count]
+            else:
+                entry[0] = [a + b for a, b in zip(entry[0], buckets)]
+                entry[1] += total
+                entry[2] += count
+
+    def as_dict(self) -> dict:
+        return {"counters": self.counters, "gauges": self.gauges, "histograms": self.histograms}
+
+    def as_snapshot(self) -> dict:
+        return {
+            "pid": 0,
+            "counters": [
+                [name, list(labels), value] for name, series in self.counters.items() for labels, value in series.items()
+            ],
+            "gauges": [],
+            "histograms": [
+                [name, list(labels), entry[0], entry[1], entry[2]]
+                for name, series in self.histograms.items()
+                for labels, entry in series.items()
+            ],
+        }
+
+
+def _archive_dead_snapshots(directory: Path) -> None:
+    dead = [path for path in directory.glob("*.json") if path.stem.isdigit() and not _pid_alive(int(path.stem))]
+    if not dead:
+        return
+    with open(directory / _LOCK_FILE, "a+") as lock_handle:
+        fcntl.flock(lock_handle, fcntl.LOCK_EX)
+        try:
+            merged = _MergedValues()
+            archive = _read_json(directory / _ARCHIVE_FILE)
+            if archive:
+                merged.add(archive, include_gauges=False)
+            folded: list[Path] = []
+            for path in dead:
+                snapshot = _read_json(path)
+                if snapshot is None:
+                    continue
+                merged.add(snapshot, include_gauges=False)
+                folded.append(path)
+            if folded:
+                _write_json_atomic(directory / _ARCHIVE_FILE, merged.as_snapshot())
+                for path in folded:
+                    path.unlink(missing_ok=True)
+        finally:
+            fcntl.flock(lock_handle, fcntl.LOCK_UN)
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_json(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json_atomic(path: Path, payload: dict) -> None:
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+REGISTRY = MetricsRegistry()
+os.register_at_fork(after_in_child=REGISTRY._after_fork_in_child)
+
+TTS_UPSTREAM_CALLS = REGISTRY.counter(
+    "canto_tts_upstream_calls_total", "Upstream Google TTS calls.", ("mode", "voice", "outcome")
+)
+TTS_UPSTREAM_SECONDS = REGISTRY.histogram(
+    "canto_tts_upstream_seconds", "Upstream Google TTS call latency in seconds.", ("mode",)
+)
+TTS_REQUESTS = REGISTRY.counter(
+    "canto_tts_requests_total", "Completed /api/tts/synthesize requests by sync mode.", ("mode", "sync_mode")
+)
+TTS_CHUNKS_PER_REQUEST = REGISTRY.histogram(
+    "canto_tts_chunks_per_request", "Planned TTS chunks per synthesize request.", ("mode",), buckets=COUNT_BUCKETS
+)
+TTS_REDUCED_FALLBACKS = REGISTRY.counter(
+    "canto_tts_reduced_fallbacks_total", "Standard chunks re-synthesized with reduced mark density."
+)
+TTS_HQ_SPLIT_RETRIES = REGISTRY.counter(
+    "canto_tts_hq_split_retries_total", "High Quality chunks split and retried after sentence-length errors."
+)
+AUDIO_STORE_WRITTEN_BYTES = REGISTRY.counter(
+    "canto_audio_store_written_bytes_total", "Bytes written to the temp audio store.", ("kind",)
+)
+AUDIO_STORE_DEDUPLICATED_BYTES = REGISTRY.counter(
+    "canto_audio_store_deduplicated_bytes_total", "Audio bytes not rewritten because identical content was already stored.", ("kind",)
+)
+AUDIO_STORE_EVICTED_BYTES = REGISTRY.counter(
+    "canto_audio_store_evicted_bytes_total", "Bytes removed from the temp audio store by cleanup.", ("reason",)
+)
+AUDIO_STORE_EVICTED_FILES = REGISTRY.counter(
+    "canto_audio_store_evicted_files_total", "Files removed from the temp audio store by cleanup.", ("reason",)
+)
+DICTIONARY_CACHE = REGISTRY.counter(
+    "canto_dictionary_cache_total", "Dictionary cache lookups.", ("cache", "result")
+)
+DICTIONARY_LOOKUP_SECONDS = REGISTRY.histogram(
+    "canto_dictionary_lookup_seconds", "Dictionary lookup_at latency in seconds."
+)
+DICTIONARY_MEMORY_BYTES = REGISTRY.gauge(
+    "canto_dictionary_memory_bytes", "Deep size of the parsed dictionary held by a worker (0 when memory-mapped)."
+)
+TRANSLATION_REQUESTS = REGISTRY.counter(
+    "canto_translation_requests_total", "Translation requests by outcome.", ("outcome",)
+)
+TRANSLATION_SECONDS = REGISTRY.histogram(
+    "canto_translation_seconds", "Upstream translation latency in seconds.", ("outcome",)
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge("canto_http_in_flight_requests", "Requests currently being handled by a worker.")
+
+
+def init_metrics(app: Flask) -> None:
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+
+    directory = Path(app.config.get("METRICS_DIR", "instance/metrics"))
+    if not directory.is_absolute():
+        directory = Path(app.root_path) / directory
+    REGISTRY.configure(directory, flush_seconds=float(app.config.get("METRICS_FLUSH_SECONDS", 1.0)))
+
+    @app.before_request
+    def _track_in_flight() -> None:
+        HTTP_IN_FLIGHT.inc()
+        g._metrics_in_flight = True
+
+    @app.teardown_request
+    def _untrack_in_flight(_exc: BaseException | None) -> None:
+        if g.pop("_metrics_in_flight", False):
+            HTTP_IN_FLIGHT.dec()
@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import shutil
+import threading
+import time
+import tracemalloc
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+
+from flask import Flask, g, request
+
+
+_CONTROL_FILE = "control.json"
+_REQUESTS_LOG = "requests.jsonl"
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+
+@dataclass(slots=True)
+class ProfilingSession:
+    session_id: str
+    endpoint: str
+    max_requests: int
+    expires_at: float
+    sample_rate: float
+    trace_memory: bool
+    started_at: float
+    stopped: bool = False
+    stop_reason: str = ""
+
+    def is_active(self, now: float | None = None) -> bool:
+        return not self.stopped and (now or time.time()) < self.expires_at
+
+    def matches(self, endpoint: str | None) -> bool:
+        return not self.endpoint or self.endpoint == endpoint
+
+
+@dataclass(slots=True)
+class RequestProfile:
+    session: ProfilingSession
+    profiler: cProfile.Profile
+    path: Path
+    slot: int
+    started: float
+
+
+class ProfilingController:
+    """Admin-driven sampled profiling shared by every worker through files in `directory`.
+
+    The admin writes `control.json`; each worker re-reads it at most every
+    `poll_seconds`, so an idle controller costs one clock comparison per request.
+    Request slots are claimed with exclusive file creation, which caps a session at
+    `max_requests` profiles across all workers without any cross-process lock.
+    """
+
+    def __init__(self, directory: str | Path, poll_seconds: float = 2.0, tracemalloc_frames: int = 10) -> None:
+        self.directory = Path(directory)
+        self.poll_seconds = max(0.0, float(poll_seconds))
+        self.tracemalloc_frames = max(1, int(tracemalloc_frames))
+        self._lock = threading.Lock()
+        self._profile_slot = threading.Lock()
+        self._pid = os.getpid()
+        self._next_poll = 0.0
+        self._control_mtime: float | None = None
+        self._session: ProfilingSession | None = None
+        self._next_slot = 0
+        self._memory_session_id: str | None = None
+        self._memory_baseline: tracemalloc.Snapshot | None = None
+
+    # -- admin side ------------------------------------------------------------
+
+    def start(
+        self,
+        endpoint: str,
+        max_requests: int,
+        duration_seconds: float,
+        sample_rate: float = 1.0,
+        trace_memory: bool = False,
+        keep_sessions: int = 10,
+    ) -> ProfilingSession:
+        now = time.time()
+        session = ProfilingSession(
+            session_id=f"{datetime.now(UTC):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}",
+            endpoint=endpoint,
+            max_requests=max(1, int(max_requests)),
+            expires_at=now + max(1.0, float(duration_seconds)),
+            sample_rate=min(1.0, max(0.0, float(sample_rate))),
+            trace_memory=bool(trace_memory),
+            started_at=now,
+        )
+        (self.directory / session.session_id).mkdir(parents=True, exist_ok=True)
+        self._write_control(session)
+        self._prune_sessions(keep_sessions)
+        self._next_poll = 0.0
+        return session
+
+    def stop(self, reason: str = "stopped by admin") -> ProfilingSession | None:
+        session = self._read_control()
+        if session is None or session.stopped:
+            return session
+        session.stopped = True
+        session.stop_reason = reason
+        self._write_control(session)
+        self._next_poll = 0.0
+        return session
+
+    def active_session(self) -> ProfilingSession | None:
+        session = self._read_control()
+        if session is not None and session.is_active():
+            return session
+        return None
+
+    def list_sessions(self) -> list[dict]:
+        if not self.directory.exists():
+            return []
+        sessions = []
+        for session_dir in sorted((p for p in self.directory.iterdir() if p.is_dir()), reverse=True):
+            files = sorted(
+                path.name
+                for path in session_dir.iterdir()
+                if path.is_file() and path.suffix in (".prof", ".txt", ".snapshot") and path.stat().st_size > 0
+            )
+            sessions.append(
+                {
+                    "session_id": session_dir.name,
+                    "files": files,
+                    "requests": self.request_log(session_dir.name),
+                    "profile_count": sum(1 for name in files if name.endswith(".prof")),
+                }
+            )
+        return sessions
+
+    def request_log(self, session_id: str) -> list[dict]:
+        path = self.session_file(session_id, _REQUESTS_LOG)
+        if path is None:
+            return []
+        entries = []
+        for line in path.read_text(encoding="utf-8").splitlines():
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        return entries
+
+    def session_file(self, session_id: str, filename: str) -> Path | None:
+        if not _SAFE_NAME.match(session_id) or not _SAFE_NAME.match(filename):
+            return None
+        path = self.directory / session_id / filename
+        if not path.is_file():
+            return None
+        return path
+
+    def combined_report(self, session_id: str, sort: str = "cumulative", limit: int = 60) -> str | None:
+        """pstats text for every request profile of a session, merged."""
+        profiles = [
+            self.directory / session_id / name
+            for entry in self.list_sessions()
+            if entry["session_id"] == session_id
+            for name in entry["files"]
+            if name.endswith(".prof")
+        ]
+        if not profiles:
+            return None
+        stream = io.StringIO()
+        stats = pstats.Stats(str(profiles[0]), stream=stream)
+        for path in profiles[1:]:
+            stats.add(str(path))
+        stats.sort_stats(sort).print_stats(limit)
+        return f"{len(profiles)} request profile(s) from session {session_id}\n\n{stream.getvalue()}"
+
+    # -- request side ----------------------------------------------------------
+
+    def begin_request(self, endpoint: str | None) -> RequestProfile | None:
+        session = self._poll()
+        if session is None or not session.matches(endpoint):
+            return None
+        if session.sample_rate < 1.0 and random.random() >= session.sample_rate:
+            return None
+        # One profiled request per worker at a time keeps thread stacks from interleaving.
+        if not self._profile_slot.acquire(blocking=False):
+            return None
+        claimed = self._claim_slot(session)
+        if claimed is None:
+            self._profile_slot.release()
+            return None
+        slot, path = claimed
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return RequestProfile(session=session, profiler=profiler, path=path, slot=slot, started=time.perf_counter())
+
+    def end_request(self, profile: RequestProfile, status: int | None) -> None:
+        try:
+            profile.profiler.disable()
+            elapsed_ms = (time.perf_counter() - profile.started) * 1000
+            tmp_path = profile.path.with_name(f".{profile.path.name}.tmp")
+            profile.profiler.dump_stats(str(tmp_path))
+            os.replace(tmp_path, profile.path)
+            entry = {
+                "file": profile.path.name,
+                "endpoint": request.endpoint,
+                "path": request.path,
+                "method": request.method,
+                "status": status,
+                "ms": round(elapsed_ms, 2),
+                "pid": os.getpid(),
+                "at": datetime.now(UTC).isoformat(timespec="seconds"),
+            }
+            with open(profile.path.parent / _REQUESTS_LOG, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(entry) + "\n")
+        finally:
+            self._profile_slot.release()
+
+        if profile.slot == profile.session.max_requests - 1:
+            self.stop(reason="request budget reached")
+
+    # -- internals -------------------------------------------------------------
+
+    def _poll(self) -> ProfilingSession | None:
+        now = time.monotonic()
+        if now < self._next_poll:
+            session = self._session
+            return session if session is not None and session.is_active() else None
+
+        with self._lock:
+            if os.getpid() != self._pid:
+                # Forked worker: tracemalloc state and slot hints belong to the parent.
+                self._pid = os.getpid()
+                self._memory_session_id = None
+                self._memory_baseline = None
+                self._control_mtime = None
+            self._next_poll = now + self.poll_seconds
+            try:
+                mtime = (self.directory / _CONTROL_FILE).stat().st_mtime
+            except OSError:
+                mtime = None
+            if mtime != self._control_mtime:
+                self._control_mtime = mtime
+                previous = self._session
+                self._session = self._read_control() if mtime is not None else None
+                if self._session is None or previous is None or previous.session_id != self._session.session_id:
+                    self._next_slot = 0
+            session = self._session
+            active = session is not None and session.is_active()
+            self._sync_memory_tracking(session if active else None)
+        return session if active else None
+
+    def _sync_memory_tracking(self, session: ProfilingSession | None) -> None:
+        wanted = session.session_id if session is not None and session.trace_memory else None
+        if wanted == self._memory_session_id:
+            return
+        if self._memory_session_id is not None:
+            self._write_memory_report(self._memory_session_id)
+        if wanted is not None:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.tracemalloc_frames)
+            self._memory_baseline = tracemalloc.take_snapshot()
+        self._memory_session_id = wanted
+
+    def _write_memory_report(self, session_id: str) -> None:
+        baseline = self._memory_baseline
+        self._memory_baseline = None
+        if not tracemalloc.is_tracing():
+            return
+        final = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        session_dir = self.directory / session_id
+        if baseline is None or not session_dir.is_dir():
+            return
+
+        pid = os.getpid()
+        final.dump(str(session_dir / f"memory-{pid}.snapshot"))
+        growth = final.compare_to(baseline, "lineno")
+        lines = [f"tracemalloc growth for pid {pid} (top 50 by size delta)", ""]
+        lines.extend(str(stat) for stat in growth[:50])
+        (session_dir / f"memory-{pid}.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    def _claim_slot(self, session: ProfilingSession) -> tuple[int, Path] | None:
+        session_dir = self.directory / session.session_id
+        while self._next_slot < session.max_requests:
+            slot = self._next_slot
+            self._next_slot += 1
+            path = session_dir / f"request-{slot:04d}.prof"
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                continue
+            except OSError:
+                return None
+            os.close(fd)
+            return slot, path
+        return None
+
+    def _read_control(self) -> ProfilingSession | None:
+        try:
+            payload = json.loads((self.directory / _CONTROL_FILE).read_text(encoding="utf-8"))
+            return ProfilingSession(**payload)
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _write_control(self, session: ProfilingSession) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / _CONTROL_FILE
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(asdict(session)), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def _prune_sessions(self, keep: int) -> None:
+        session_dirs = sorted(p for p in self.directory.iterdir() if p.is_dir())
+        for stale in session_dirs[: max(0, len(session_dirs) - max(1, keep))]:
+            shutil.rmtree(stale, ignore_errors=True)
+
+
+def get_profiling_controller(app: Flask) -> ProfilingController | None:
+    return app.extensions.get("profiling")
+
+
+def init_profiling(app: Flask) -> None:
+    if not app.config.get("PROFILING_ENABLED", True):
+        return
+
+    directory = Path(app.config.get("PROFILING_DIR", "instance/profiles"))
+    if not directory.is_absolute():
+        directory = Path(app.root_path) / directory
+    controller = ProfilingController(
+        directory,
+        poll_seconds=float(app.config.get("PROFILING_POLL_SECONDS", 2.0)),
+        tracemalloc_frames=int(app.config.get("PROFILING_TRACEMALLOC_FRAMES", 10)),
+    )
+    app.extensions["profiling"] = controller
+
+    @app.before_request
+    def _maybe_start_profile() -> None:
+        profile = controller.begin_request(request.endpoint)
+        if profile is not None:
+            g._request_profile = profile
+
+    @app.after_request
+    def _record_profile_status(response):
+        if "_request_profile" in g:
+            g._request_profile_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_profile(_exc: BaseException | None) -> None:
+        profile = g.pop("_request_profile", None)
+        if profile is not None:
+            controller.end_request(profile, g.pop("_request_profile_status", None))
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import json
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from flask import Flask, Response, current_app, g, has_request_context, request
+
+
+class RequestTimer:
+    """Per-request stage spans; repeated stages (e.g. one per upstream call) accumulate."""
+
+    __slots__ = ("started", "stages", "sizes")
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.stages: dict[str, list[float]] = {}
+        self.sizes: dict[str, int] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        entry = self.stages.get(name)
+        if entry is None:
+            self.stages[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self, total_ms: float) -> str:
+        parts = []
+        for name, (seconds, count) in self.stages.items():
+            part = f"{name};dur={seconds * 1000:.1f}"
+            if count > 1:
+                part += f';desc="{int(count)}x"'
+            parts.append(part)
+        parts.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(parts)
+
+    def to_dict(self) -> dict[str, dict[str, float]]:
+        return {
+            name: {"ms": round(seconds * 1000, 2), "count": int(count)}
+            for name, (seconds, count) in self.stages.items()
+        }
+
+
+def current_timer() -> RequestTimer | None:
+    if not has_request_context():
+        return None
+    return g.get("_request_timer")
+
+
+@contextmanager
+def timed_stage(name: str) -> Iterator[None]:
+    """Time a block as a named stage of the current request (no-op outside one)."""
+    timer = current_timer()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+
+def record_size(name: str, value: int) -> None:
+    """Attach a payload size (chars, bytes, chunk count...) to the current request's timing record."""
+    timer = current_timer()
+    if timer is not None:
+        timer.sizes[name] = int(value)
+
+
+def init_request_timing(app: Flask) -> None:
+    @app.before_request
+    def _start_request_timer() -> None:
+        if app.config.get("REQUEST_TIMING_ENABLED", True):
+            g._request_timer = RequestTimer()
+
+    @app.after_request
+    def _finish_request_timer(response: Response) -> Response:
+        timer = current_timer()
+        if timer is None:
+            return response
+
+        total_ms = timer.elapsed_ms()
+        response.headers["Server-Timing"] = timer.server_timing(total_ms)
+
+        slow_ms = float(current_app.config.get("SLOW_REQUEST_MS", 2000))
+        slow = slow_ms > 0 and total_ms >= slow_ms
+        if not timer.stages and not slow:
+            return response
+
+        record = {
+            "event": "request_timing",
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "total_ms": round(total_ms, 2),
+            "stages": timer.to_dict(),
+            "sizes": dict(timer.sizes),
+        }
+        if slow:
+            record["slow"] = True
+            record["sizes"]["request_bytes"] = int(request.content_length or 0)
+            record["sizes"]["response_bytes"] = int(response.content_length or 0)
+            current_app.logger.warning("%s", json.dumps(record, ensure_ascii=False, sort_keys=True))
+        else:
+            current_app.logger.info("%s", json.dumps(record, ensure_ascii=False, sort_keys=True))
+        return response
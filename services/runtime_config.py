@@ -11,6 +11,28 @@ def apply_runtime_config(config: dict, flask_env: str) -> None:
     config["TEMP_AUDIO_TTL_HOURS"] = int(os.getenv("TEMP_AUDIO_TTL_HOURS", "4"))
     config["MAX_TEMP_AUDIO_FILES"] = int(os.getenv("MAX_TEMP_AUDIO_FILES", "120"))
     config["MAX_TEMP_AUDIO_BYTES"] = int(os.getenv("MAX_TEMP_AUDIO_BYTES", str(300 * 1024 * 1024)))
+    config["AUDIO_DELIVERY_MODE"] = os.getenv("AUDIO_DELIVERY_MODE", "direct").strip().lower()
+    config["AUDIO_ACCEL_PREFIX"] = os.getenv("AUDIO_ACCEL_PREFIX", "/_audio_files/")
+    config["AUDIO_JANITOR_ENABLED"] = env_bool("AUDIO_JANITOR_ENABLED", True)
+    config["AUDIO_JANITOR_INTERVAL_SECONDS"] = float(os.getenv("AUDIO_JANITOR_INTERVAL_SECONDS", "30"))
+    config["AUDIO_INDEX_RESYNC_SECONDS"] = float(os.getenv("AUDIO_INDEX_RESYNC_SECONDS", "600"))
+    config["AUDIO_REF_SWEEP_SECONDS"] = float(os.getenv("AUDIO_REF_SWEEP_SECONDS", "3600"))
+    config["AUDIO_JANITOR_LOCK_PATH"] = os.getenv("AUDIO_JANITOR_LOCK_PATH", "")
+    config["AUDIO_EMERGENCY_CAP_FACTOR"] = float(os.getenv("AUDIO_EMERGENCY_CAP_FACTOR", "1.5"))
+    config["AUDIO_EVICTION_POLICY"] = os.getenv("AUDIO_EVICTION_POLICY", "gdsf").strip().lower()
+    config["AUDIO_EVICTION_CREDIT_SECONDS"] = float(os.getenv("AUDIO_EVICTION_CREDIT_SECONDS", "1.0"))
+    config["AUDIO_STATS_DIR"] = os.getenv("AUDIO_STATS_DIR", "instance/audio_stats")
+    config["AUDIO_STORAGE_BACKEND"] = os.getenv("AUDIO_STORAGE_BACKEND", "filesystem").strip().lower()
+    config["AUDIO_S3_ENDPOINT"] = os.getenv("AUDIO_S3_ENDPOINT", "https://s3.amazonaws.com")
+    config["AUDIO_S3_BUCKET"] = os.getenv("AUDIO_S3_BUCKET", "")
+    config["AUDIO_S3_REGION"] = os.getenv("AUDIO_S3_REGION", "us-east-1")
+    config["AUDIO_S3_PREFIX"] = os.getenv("AUDIO_S3_PREFIX", "audio/")
+    config["AUDIO_S3_ACCESS_KEY_ID"] = os.getenv("AUDIO_S3_ACCESS_KEY_ID", "")
+    config["AUDIO_S3_SECRET_ACCESS_KEY"] = os.getenv("AUDIO_S3_SECRET_ACCESS_KEY", "")
+    config["AUDIO_S3_PUBLIC_BASE_URL"] = os.getenv("AUDIO_S3_PUBLIC_BASE_URL", "")
+    config["AUDIO_S3_URL_TTL_SECONDS"] = int(os.getenv("AUDIO_S3_URL_TTL_SECONDS", "3600"))
+    config["AUDIO_S3_TIMEOUT_SECONDS"] = float(os.getenv("AUDIO_S3_TIMEOUT_SECONDS", "10"))
+    config["TTS_AUDIO_ENCODING"] = os.getenv("TTS_AUDIO_ENCODING", "mp3").strip().lower()
     config["TTS_TIMEOUT_SECONDS"] = float(os.getenv("TTS_TIMEOUT_SECONDS", "20"))
     config["HQ_TEXT_TARGET_MAX_BYTES"] = int(os.getenv("HQ_TEXT_TARGET_MAX_BYTES", "350"))
     config["HQ_TEXT_HARD_MAX_BYTES"] = int(os.getenv("HQ_TEXT_HARD_MAX_BYTES", "700"))
@@ -24,19 +46,43 @@ def apply_runtime_config(config: dict, flask_env: str) -> None:
     config["MONTHLY_QUOTA_CHARS"] = int(os.getenv("MONTHLY_QUOTA_CHARS", "1000000"))
     config["SESSION_LIFETIME_HOURS"] = int(os.getenv("SESSION_LIFETIME_HOURS", "12"))
     config["REMEMBER_COOKIE_DAYS"] = int(os.getenv("REMEMBER_COOKIE_DAYS", "30"))
-    config["SESSION_REFRESH_EACH_REQUEST"] = _env_bool("SESSION_REFRESH_EACH_REQUEST", True)
-    config["COOKIE_SECURE"] = _env_bool("COOKIE_SECURE", flask_env != "development")
+    config["SESSION_REFRESH_EACH_REQUEST"] = env_bool("SESSION_REFRESH_EACH_REQUEST", True)
+    config["COOKIE_SECURE"] = env_bool("COOKIE_SECURE", flask_env != "development")
     config["COOKIE_SAMESITE"] = os.getenv("COOKIE_SAMESITE", "Lax")
-    config["DICTIONARY_ENABLED"] = _env_bool("DICTIONARY_ENABLED", True)
+    config["DICTIONARY_ENABLED"] = env_bool("DICTIONARY_ENABLED", True)
     config["DICTIONARY_CC_CEDICT_PATH"] = os.getenv(
         "DICTIONARY_CC_CEDICT_PATH", "data/dictionaries/cc-cedict.u8"
     )
     config["DICTIONARY_CC_CANTO_PATH"] = os.getenv(
         "DICTIONARY_CC_CANTO_PATH", "data/dictionaries/cc-canto.u8"
     )
+    config["DICTIONARY_COMPILED_PATH"] = os.getenv(
+        "DICTIONARY_COMPILED_PATH", "data/dictionaries/dictionary.bin"
+    )
+    config["DICTIONARY_SHARDS_DIR"] = os.getenv("DICTIONARY_SHARDS_DIR", "data/dictionaries/shards")
+    config["DICTIONARY_BACKGROUND_LOAD"] = env_bool("DICTIONARY_BACKGROUND_LOAD", True)
+    config["DICTIONARY_RELOAD_INTERVAL_SECONDS"] = float(os.getenv("DICTIONARY_RELOAD_INTERVAL_SECONDS", "30"))
     config["MAX_DICTIONARY_INPUT_CHARS"] = int(os.getenv("MAX_DICTIONARY_INPUT_CHARS", "12000"))
     config["MAX_DICTIONARY_ALTERNATIVES"] = int(os.getenv("MAX_DICTIONARY_ALTERNATIVES", "3"))
+    config["MAX_DICTIONARY_SEARCH_RESULTS"] = int(os.getenv("MAX_DICTIONARY_SEARCH_RESULTS", "50"))
     config["MAX_DICTIONARY_TERM_CHARS"] = int(os.getenv("MAX_DICTIONARY_TERM_CHARS", "64"))
+    config["DICTIONARY_DOCUMENT_REGISTRY_SIZE"] = int(os.getenv("DICTIONARY_DOCUMENT_REGISTRY_SIZE", "32"))
+    config["DICTIONARY_DOCUMENT_TTL_SECONDS"] = float(os.getenv("DICTIONARY_DOCUMENT_TTL_SECONDS", "1800"))
+    config["DICTIONARY_AUDIO_HOT_CACHE_BYTES"] = int(os.getenv("DICTIONARY_AUDIO_HOT_CACHE_BYTES", str(8 * 1024 * 1024)))
+    config["DICTIONARY_AUDIO_HOT_CLIP_MAX_BYTES"] = int(os.getenv("DICTIONARY_AUDIO_HOT_CLIP_MAX_BYTES", str(256 * 1024)))
+    config["REQUEST_TIMING_ENABLED"] = env_bool("REQUEST_TIMING_ENABLED", True)
+    config["SLOW_REQUEST_MS"] = int(os.getenv("SLOW_REQUEST_MS", "2000"))
+    config["METRICS_ENABLED"] = env_bool("METRICS_ENABLED", True)
+    config["METRICS_DIR"] = os.getenv("METRICS_DIR", "instance/metrics")
+    config["METRICS_TOKEN"] = os.getenv("METRICS_TOKEN", "")
+    config["METRICS_FLUSH_SECONDS"] = float(os.getenv("METRICS_FLUSH_SECONDS", "1"))
+    config["PROFILING_ENABLED"] = env_bool("PROFILING_ENABLED", True)
+    config["PROFILING_DIR"] = os.getenv("PROFILING_DIR", "instance/profiles")
+    config["PROFILING_POLL_SECONDS"] = float(os.getenv("PROFILING_POLL_SECONDS", "2"))
+    config["PROFILING_MAX_REQUESTS"] = int(os.getenv("PROFILING_MAX_REQUESTS", "200"))
+    config["PROFILING_MAX_SECONDS"] = int(os.getenv("PROFILING_MAX_SECONDS", "3600"))
+    config["PROFILING_KEEP_SESSIONS"] = int(os.getenv("PROFILING_KEEP_SESSIONS", "10"))
+    config["PROFILING_TRACEMALLOC_FRAMES"] = int(os.getenv("PROFILING_TRACEMALLOC_FRAMES", "10"))
     config["PERMANENT_SESSION_LIFETIME"] = timedelta(hours=config["SESSION_LIFETIME_HOURS"])
     config["REMEMBER_COOKIE_DURATION"] = timedelta(days=config["REMEMBER_COOKIE_DAYS"])
     config["SESSION_COOKIE_HTTPONLY"] = True
@@ -47,7 +93,8 @@ def apply_runtime_config(config: dict, flask_env: str) -> None:
     config["REMEMBER_COOKIE_SAMESITE"] = config["COOKIE_SAMESITE"]
 
 
-def _env_bool(name: str, default: bool) -> bool:
+def env_bool(name: str, default: bool) -> bool:
+    """`name` from the environment as a flag: `1`, `true`, `yes` or `on`; `default` when unset."""
     raw = os.getenv(name)
     if raw is None:
         return default
@@ -37,11 +37,12 @@ class SSMLBuilder:
     def normalize_text(self, text: str) -> str:
         return text.replace("\r\n", "\n").replace("\r", "\n").strip()
 
-    def build_tokens(self, text: str) -> list[Token]:
+    def build_tokens(self, text: str, with_jyutping: bool = True) -> list[Token]:
         tokens: list[Token] = []
         for idx, char in enumerate(text):
             tokens.append(Token(token_id=idx, char=char, raw_index=idx, jyutping=""))
-        self._attach_jyutping(tokens)
+        if with_jyutping:
+            self.attach_jyutping(tokens)
         return tokens
 
     def build_token_chunks(
@@ -213,7 +214,7 @@ class SSMLBuilder:
 
         raise ValueError(f"Unknown sync mode: {mode}")
 
-    def _attach_jyutping(self, tokens: list[Token]) -> None:
+    def attach_jyutping(self, tokens: list[Token]) -> None:
         if pc is None:
             return
 
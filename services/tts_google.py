@@ -3,12 +3,15 @@ from __future__ import annotations
 import json
 import os
 from dataclasses import dataclass
-from time import time
+from time import perf_counter, time
 
 from google.api_core import exceptions as gexceptions
+from google.auth.credentials import AnonymousCredentials
 from google.cloud import texttospeech_v1beta1 as texttospeech
 from google.oauth2 import service_account
 
+from services.metrics import TTS_UPSTREAM_CALLS, TTS_UPSTREAM_SECONDS
+
 
 class TTSServiceError(Exception):
     pass
@@ -30,12 +33,20 @@ class GoogleTTSWrapper:
         "yue-HK-Standard-C",
         "yue-HK-Standard-D",
     }
+    # Keys match services.audio_codec.AUDIO_ENCODINGS.
+    AUDIO_ENCODINGS = {
+        "mp3": texttospeech.AudioEncoding.MP3,
+        "ogg_opus": texttospeech.AudioEncoding.OGG_OPUS,
+    }
     _VOICE_CACHE_TTL_SECONDS = 300
     _voice_catalog_cache: dict[str, list[dict[str, str]]] | None = None
     _voice_catalog_cache_at: float = 0.0
 
-    def __init__(self, timeout_seconds: float = 20.0) -> None:
+    def __init__(self, timeout_seconds: float = 20.0, audio_encoding: str = "mp3") -> None:
+        if audio_encoding not in self.AUDIO_ENCODINGS:
+            raise ValueError(f"Unsupported audio encoding: {audio_encoding}")
         self.timeout_seconds = timeout_seconds
+        self.audio_encoding = audio_encoding
         self._client: texttospeech.TextToSpeechClient | None = None
 
     @classmethod
@@ -49,7 +60,12 @@ class GoogleTTSWrapper:
 
         try:
             client = cls()._get_client()
-            voices = client.list_voices(language_code="yue-HK").voices
+            try:
+                voices = client.list_voices(language_code="yue-HK").voices
+            finally:
+                # A throwaway client: close its channel rather than leave it (and its
+                # threads) behind, which also keeps a preloading master safe to fork.
+                client.transport.close()
             for voice in voices:
                 name = voice.name
                 if not name.startswith("yue-HK-Chirp3-HD-"):
@@ -78,7 +94,7 @@ class GoogleTTSWrapper:
 
         input_text = texttospeech.SynthesisInput(ssml=ssml)
         audio_config = texttospeech.AudioConfig(
-            audio_encoding=texttospeech.AudioEncoding.MP3,
+            audio_encoding=self.AUDIO_ENCODINGS[self.audio_encoding],
             speaking_rate=speaking_rate,
         )
 
@@ -90,11 +106,14 @@ class GoogleTTSWrapper:
                 "enable_time_pointing": [texttospeech.SynthesizeSpeechRequest.TimepointType.SSML_MARK],
             }
 
+        started = perf_counter()
+        outcome = "error"
         try:
             response = self._get_client().synthesize_speech(
                 request=_request_for(voice_name),
                 timeout=self.timeout_seconds,
             )
+            outcome = "ok"
         except gexceptions.InvalidArgument as exc:
             # Some regions/projects do not expose every documented voice. Retry once with fallback.
             if voice_name != self.DEFAULT_FALLBACK_VOICE and "does not exist" in str(exc).lower():
@@ -102,10 +121,13 @@ class GoogleTTSWrapper:
                     request=_request_for(self.DEFAULT_FALLBACK_VOICE),
                     timeout=self.timeout_seconds,
                 )
+                outcome = "voice_fallback"
             else:
                 raise TTSServiceError(str(exc)) from exc
         except Exception as exc:  # pragma: no cover - external SDK behavior
             raise TTSServiceError(str(exc)) from exc
+        finally:
+            self._record_call(self.MODE_STANDARD, voice_name, outcome, started)
 
         points = []
         for point in response.timepoints:
@@ -117,24 +139,43 @@ class GoogleTTSWrapper:
         if not self.validate_voice(voice_name, self.MODE_HIGH_QUALITY):
             raise TTSServiceError("Unsupported high quality voice")
 
+        started = perf_counter()
+        outcome = "error"
         try:
             response = self._get_client().synthesize_speech(
                 request={
                     "input": texttospeech.SynthesisInput(text=text),
                     "voice": texttospeech.VoiceSelectionParams(language_code="yue-HK", name=voice_name),
-                    "audio_config": texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.MP3),
+                    "audio_config": texttospeech.AudioConfig(audio_encoding=self.AUDIO_ENCODINGS[self.audio_encoding]),
                 },
                 timeout=self.timeout_seconds,
             )
+            outcome = "ok"
         except Exception as exc:  # pragma: no cover - external SDK behavior
             raise TTSServiceError(str(exc)) from exc
+        finally:
+            self._record_call(self.MODE_HIGH_QUALITY, voice_name, outcome, started)
 
         return SynthesisChunk(audio_content=response.audio_content, timepoints=[])
 
+    def _record_call(self, mode: str, voice_name: str, outcome: str, started: float) -> None:
+        TTS_UPSTREAM_CALLS.inc(mode=mode, voice=voice_name, outcome=outcome)
+        TTS_UPSTREAM_SECONDS.observe(perf_counter() - started, mode=mode)
+
     def _get_client(self) -> texttospeech.TextToSpeechClient:
         if self._client is not None:
             return self._client
 
+        api_endpoint = os.getenv("TTS_API_ENDPOINT", "").strip()
+        if api_endpoint:
+            # Local stand-in (load tests, offline dev): plain REST, no Google credentials.
+            self._client = texttospeech.TextToSpeechClient(
+                transport="rest",
+                credentials=AnonymousCredentials(),
+                client_options={"api_endpoint": api_endpoint},
+            )
+            return self._client
+
         json_value = os.getenv("GCP_SERVICE_ACCOUNT_JSON", "").strip()
         if json_value:
             info = json.loads(json_value)
@@ -68,6 +68,7 @@ import { createVoiceController } from "./reader/voice.js";
       voiceMode: voiceController.getCurrentVoiceMode(),
       speed: currentSpeed,
     }),
+    maxAlternatives: Number(config.maxDictionaryAlternatives ?? 3),
   });
 
   const syncController = createSyncController({
@@ -119,8 +120,9 @@ import { createVoiceController } from "./reader/voice.js";
     downloadBtn.hidden = false;
     downloadBtn.href = audioUrl;
     downloadBtn.setAttribute("aria-disabled", "false");
-    downloadBtn.setAttribute("download", `speak-in-canto-${safeVoice}-${stamp}.mp3`);
-    downloadBtn.textContent = `Download MP3 (${voiceLabel})`;
+    const extension = String(audioUrl).endsWith(".ogg") ? "ogg" : "mp3";
+    downloadBtn.setAttribute("download", `speak-in-canto-${safeVoice}-${stamp}.${extension}`);
+    downloadBtn.textContent = `Download ${extension === "ogg" ? "Opus" : "MP3"} (${voiceLabel})`;
   }
 
   function setSpeed(value) {
@@ -141,6 +143,7 @@ import { createVoiceController } from "./reader/voice.js";
       syncController.setActiveToken(null);
       syncController.stopSyncLoop();
       dictionaryController.setStatus("Tap a word or phrase in Reader.");
+      dictionaryController.prefetch();
       return;
     }
 
@@ -217,6 +220,7 @@ import { createVoiceController } from "./reader/voice.js";
 
       currentRenderedText = (data.tokens || []).map((token) => token.char || "").join("");
       dictionaryController.clearView();
+      if (currentReaderMode === "dictionary") dictionaryController.prefetch();
       syncController.buildTimeIndex(data.timepoints || [], data.mark_to_token || {});
       syncEnabled = Boolean(data.sync_supported);
       setDownloadState(data.audio_url, voiceController.getVoiceLabelById(requestVoiceMode, requestVoiceId));
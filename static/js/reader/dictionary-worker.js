@@ -0,0 +1,142 @@
+// Dictionary lookups answered in the browser from the static shards built by
+// scripts/prepare_dictionary_data.py. Shards are fetched on demand (one per leading
+// character bucket) and kept for the life of the page; their names are content
+// hashes, so repeat visits come from the HTTP cache. Ranking mirrors
+// DictionaryLookupService (services/dictionary_lookup.py) so results match /lookup.
+
+const SHARD_BASE = "/api/dictionary/shards/";
+
+let manifestPromise = null;
+const shards = new Map();
+
+function fetchJson(url) {
+  return fetch(url).then((response) => {
+    if (!response.ok) throw new Error(`Dictionary shard request failed (${response.status}).`);
+    return response.json();
+  });
+}
+
+function loadManifest() {
+  if (!manifestPromise) {
+    manifestPromise = fetchJson(`${SHARD_BASE}manifest.json`);
+  }
+  return manifestPromise;
+}
+
+function indexShard(terms) {
+  // Same index as the server: entries by term plus every proper prefix of every term.
+  const entries = new Map(Object.entries(terms));
+  const prefixes = new Set();
+  for (const term of entries.keys()) {
+    const chars = Array.from(term);
+    for (let length = chars.length - 1; length > 0; length -= 1) {
+      const prefix = chars.slice(0, length).join("");
+      if (prefixes.has(prefix)) break;
+      prefixes.add(prefix);
+    }
+  }
+  return { entries, prefixes };
+}
+
+function loadShard(manifest, char) {
+  // Must match services/dictionary_shards.shard_for.
+  const bucket = char.codePointAt(0) % manifest.shard_count;
+  let shard = shards.get(bucket);
+  if (!shard) {
+    shard = fetchJson(`${SHARD_BASE}${manifest.shards[bucket]}`).then((data) => indexShard(data.terms || {}));
+    shards.set(bucket, shard);
+    shard.catch(() => shards.delete(bucket));
+  }
+  return shard;
+}
+
+function normalize(text) {
+  // As routes_dictionary._document_from_payload normalizes the text it indexes into.
+  return String(text || "").replace(/\r\n/g, "\n").replace(/\r/g, "\n").trim();
+}
+
+function matchesFrom(shard, chars, start, minEnd) {
+  // Terms at `start` that reach at least `minEnd`, shortest first.
+  const matches = [];
+  let end = minEnd;
+  let term = chars.slice(start, end).join("");
+  for (;;) {
+    const entries = shard.entries.get(term);
+    if (entries && entries.length) matches.push([term, entries]);
+    if (!shard.prefixes.has(term) || end >= chars.length) return matches;
+    end += 1;
+    term = chars.slice(start, end).join("");
+  }
+}
+
+function score(candidate, index) {
+  const length = candidate.end - candidate.start;
+  const midpoint = (candidate.start + candidate.end - 1) / 2;
+  // Prefer longer phrase matches, then click-centered matches, then earlier span.
+  return [-length, Math.abs(midpoint - index), candidate.start, candidate.source];
+}
+
+function compareScores(left, right) {
+  for (let i = 0; i < left.length; i += 1) {
+    if (left[i] < right[i]) return -1;
+    if (left[i] > right[i]) return 1;
+  }
+  return 0;
+}
+
+function rank(candidates, index, maxAlternatives) {
+  if (!candidates.length) return { best: null, alternatives: [] };
+  // Array.prototype.sort is stable, like Python's sorted.
+  const ranked = candidates
+    .map((candidate) => ({ candidate, key: score(candidate, index) }))
+    .sort((left, right) => compareScores(left.key, right.key))
+    .map(({ candidate }) => candidate);
+  const [best, ...rest] = ranked;
+  const alternatives = [];
+  for (const candidate of rest) {
+    if (candidate.term === best.term && candidate.start === best.start && candidate.end === best.end) continue;
+    alternatives.push(candidate);
+    if (alternatives.length >= Math.max(0, maxAlternatives)) break;
+  }
+  return { best, alternatives };
+}
+
+async function lookupAt(text, index, maxAlternatives) {
+  const manifest = await loadManifest();
+  const chars = Array.from(normalize(text));
+  if (!chars.length || index < 0 || index >= chars.length) return { best: null, alternatives: [] };
+
+  const starts = [];
+  for (let start = index; start > Math.max(-1, index - manifest.max_term_length); start -= 1) starts.push(start);
+  const startShards = await Promise.all(starts.map((start) => loadShard(manifest, chars[start])));
+
+  const found = [];
+  const seen = new Set();
+  starts.forEach((start, position) => {
+    // Longest first, matching the server's ordering of equal-score candidates.
+    for (const [term, entries] of matchesFrom(startShards[position], chars, start, index + 1).reverse()) {
+      const end = start + Array.from(term).length;
+      for (const [source, jyutping, definitions] of entries) {
+        const key = `${term}\u0000${start}\u0000${end}\u0000${source}`;
+        if (seen.has(key)) continue;
+        seen.add(key);
+        found.push({ term, start, end, definitions, source, jyutping });
+      }
+    }
+  });
+  return rank(found, index, maxAlternatives);
+}
+
+self.addEventListener("message", async (event) => {
+  const { id, type, text, index, maxAlternatives } = event.data || {};
+  try {
+    if (type === "prefetch") {
+      const manifest = await loadManifest();
+      self.postMessage({ id, result: { version: manifest.version } });
+    } else {
+      self.postMessage({ id, result: await lookupAt(text, Number(index), Number(maxAlternatives ?? 3)) });
+    }
+  } catch (err) {
+    self.postMessage({ id, error: err && err.message ? err.message : "Dictionary shard lookup failed." });
+  }
+});
@@ -8,8 +8,57 @@ export function createDictionaryController({
   tokenView,
   getRenderedText,
   getVoiceSettings,
+  maxAlternatives = 3,
 }) {
   let dictionaryAudio = null;
+  // Term clip URLs under /api/dictionary/audio/ are immutable, so repeat taps skip the speak call.
+  const spokenClipUrls = new Map();
+  // One /segment call per rendered text resolves every index; later taps never hit the server.
+  let segmentation = null;
+  // Registrations of rendered texts (promises of a server-side document id, or null when the
+  // server keeps none), so fallback calls send only the id.
+  const documentIds = new Map();
+  // Static shards answer taps in a worker without any API call; null once they prove unavailable.
+  let shardLookup = createShardLookup();
+
+  function createShardLookup() {
+    if (typeof Worker === "undefined") return null;
+    let worker;
+    try {
+      worker = new Worker(new URL("./dictionary-worker.js", import.meta.url), { type: "module" });
+    } catch (_err) {
+      return null;
+    }
+    const pending = new Map();
+    let nextId = 0;
+    worker.addEventListener("message", ({ data }) => {
+      const request = pending.get(data.id);
+      if (!request) return;
+      pending.delete(data.id);
+      if (data.error) request.reject(new Error(data.error));
+      else request.resolve(data.result);
+    });
+    worker.addEventListener("error", () => {
+      pending.forEach((request) => request.reject(new Error("Dictionary worker failed.")));
+      pending.clear();
+    });
+    const call = (message) =>
+      new Promise((resolve, reject) => {
+        nextId += 1;
+        pending.set(nextId, { resolve, reject });
+        worker.postMessage({ ...message, id: nextId });
+      });
+    return {
+      ready: () => call({ type: "prefetch" }),
+      lookup: (text, index) => call({ type: "lookup", text, index, maxAlternatives }),
+      terminate: () => worker.terminate(),
+    };
+  }
+
+  function disableShards() {
+    if (shardLookup) shardLookup.terminate();
+    shardLookup = null;
+  }
 
   function clearView() {
     if (!dictionaryPopover) return;
@@ -93,30 +142,151 @@ export function createDictionaryController({
     }
   }
 
+  async function requestClipUrl(term, voice) {
+    const response = await fetch("/api/dictionary/speak", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        text: term,
+        voice_name: voice.voiceName,
+        voice_mode: voice.voiceMode,
+      }),
+    });
+    const data = await response.json();
+    if (!response.ok || !data.audio_url) return null;
+    return data.audio_url;
+  }
+
+  function playClip(audioUrl, speed) {
+    if (!dictionaryAudio) dictionaryAudio = new Audio();
+    dictionaryAudio.src = audioUrl;
+    dictionaryAudio.playbackRate = speed;
+    const p = dictionaryAudio.play();
+    return p && typeof p.then === "function" ? p : Promise.resolve();
+  }
+
   async function speakTerm(term) {
     const voice = getVoiceSettings();
     if (!term || !voice.voiceName) return;
+    const clipKey = `${voice.voiceMode}|${voice.voiceName}|${term}`;
     try {
-      const response = await fetch("/api/dictionary/speak", {
+      const remembered = spokenClipUrls.get(clipKey);
+      if (remembered) {
+        try {
+          await playClip(remembered, voice.speed);
+          return;
+        } catch (err) {
+          // Autoplay refusals and interrupted plays are not stale URLs.
+          if (err && (err.name === "NotAllowedError" || err.name === "AbortError")) return;
+          // The clip is gone (evicted, or the worker that held it restarted): ask again.
+          spokenClipUrls.delete(clipKey);
+        }
+      }
+
+      const audioUrl = await requestClipUrl(term, voice);
+      if (!audioUrl) return;
+      if (audioUrl.startsWith("/api/dictionary/audio/")) spokenClipUrls.set(clipKey, audioUrl);
+      await playClip(audioUrl, voice.speed).catch(() => {});
+    } catch (_err) {
+      // Best effort only.
+    }
+  }
+
+  function registerDocument(text) {
+    if (!documentIds.has(text)) {
+      if (documentIds.size >= 8) documentIds.clear();
+      const promise = fetch("/api/dictionary/documents", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({
-          text: term,
-          voice_name: voice.voiceName,
-          voice_mode: voice.voiceMode,
-        }),
+        body: JSON.stringify({ text }),
+      })
+        .then(async (response) => {
+          const data = await response.json();
+          return response.ok && data.registered && data.document_id ? data.document_id : null;
+        })
+        .catch(() => null);
+      documentIds.set(text, promise);
+    }
+    return documentIds.get(text);
+  }
+
+  async function postDocument(url, text, fields) {
+    // Send the registered document's id rather than the whole text; re-send the text once if the
+    // server has forgotten it (expired, evicted, or another worker), which registers it again.
+    const documentId = await registerDocument(text);
+    const post = (body) =>
+      fetch(url, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(body),
       });
-      const data = await response.json();
-      if (!response.ok || !data.audio_url) return;
-
-      if (!dictionaryAudio) dictionaryAudio = new Audio();
-      dictionaryAudio.src = data.audio_url;
-      dictionaryAudio.playbackRate = voice.speed;
-      const p = dictionaryAudio.play();
-      if (p && typeof p.catch === "function") p.catch(() => {});
-    } catch (_err) {
-      // Best effort only.
+    let response = await post(documentId ? { document_id: documentId, ...fields } : { text, ...fields });
+    let data = await response.json();
+    if (documentId && response.status === 404 && data.code === "unknown_document") {
+      response = await post({ text, ...fields });
+      data = await response.json();
     }
+    if (!response.ok) throw new Error(data.error || "Dictionary lookup failed.");
+    return data;
+  }
+
+  function loadSegmentation(text) {
+    if (!segmentation || segmentation.text !== text) {
+      const promise = postDocument("/api/dictionary/segment", text, {});
+      segmentation = { text, promise, data: null };
+      const current = segmentation;
+      promise.then(
+        (data) => {
+          current.data = data;
+        },
+        () => {
+          if (segmentation === current) segmentation = null;
+        },
+      );
+    }
+    return segmentation.promise;
+  }
+
+  function resolveLocally(data, index) {
+    const candidateFor = (spanId) => {
+      const [entryId, start, end] = data.spans[spanId];
+      return { ...data.entries[entryId], start, end };
+    };
+    let low = 0;
+    let high = data.runs.length - 1;
+    while (low <= high) {
+      const mid = (low + high) >> 1;
+      const [start, end, spanIds] = data.runs[mid];
+      if (index < start) {
+        high = mid - 1;
+      } else if (index >= end) {
+        low = mid + 1;
+      } else {
+        const [best, ...alternatives] = spanIds.map(candidateFor);
+        return { best, alternatives };
+      }
+    }
+    return { best: null, alternatives: [] };
+  }
+
+  function prefetch() {
+    const renderedText = getRenderedText();
+    if (!renderedText) return;
+    // Register on render so every server fallback (segment, lookup) can send just the id.
+    registerDocument(renderedText);
+    if (!shardLookup) {
+      loadSegmentation(renderedText).catch(() => {});
+      return;
+    }
+    // With shards there is nothing to fetch per text; without them, segment up front as before.
+    shardLookup.ready().catch(() => {
+      disableShards();
+      loadSegmentation(renderedText).catch(() => {});
+    });
+  }
+
+  function fetchLookup(text, tokenId) {
+    return postDocument("/api/dictionary/lookup", text, { index: tokenId });
   }
 
   async function lookupAtIndex(tokenId, anchorEl) {
@@ -127,41 +297,49 @@ export function createDictionaryController({
       return;
     }
 
-    try {
+    let data;
+    const ready = segmentation && segmentation.text === renderedText ? segmentation.data : null;
+    if (ready) {
+      data = resolveLocally(ready, tokenId);
+    } else if (shardLookup) {
+      try {
+        data = await shardLookup.lookup(renderedText, tokenId);
+      } catch (_shardErr) {
+        disableShards();
+      }
+    }
+    if (!data) {
       setStatus("Looking up...");
       placePopover(anchorEl);
-      const response = await fetch("/api/dictionary/lookup", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ text: renderedText, index: tokenId }),
-      });
-      const data = await response.json();
-      if (!response.ok) {
-        setStatus(data.error || "Dictionary lookup failed.");
-        placePopover(anchorEl);
-        return;
+      try {
+        data = resolveLocally(await loadSegmentation(renderedText), tokenId);
+      } catch (_segmentErr) {
+        try {
+          data = await fetchLookup(renderedText, tokenId);
+        } catch (err) {
+          setStatus(err instanceof TypeError ? "Network or server error." : err.message);
+          placePopover(anchorEl);
+          return;
+        }
       }
+    }
 
-      dictionaryPopover.hidden = false;
-      setStatus("");
-      placePopover(anchorEl);
-
-      if (!data.best) {
-        if (dictionaryTerm) dictionaryTerm.textContent = "No definition found";
-        if (dictionaryDefinitions) dictionaryDefinitions.innerHTML = "";
-        renderAlternatives([]);
-        highlightSpan(null);
-        return;
-      }
+    dictionaryPopover.hidden = false;
+    setStatus("");
+    placePopover(anchorEl);
 
-      renderCandidate(data.best);
-      renderAlternatives(data.alternatives || []);
-      highlightSpan({ start: Number(data.best.start), end: Number(data.best.end) });
-      await speakTerm(data.best.term);
-    } catch (_err) {
-      setStatus("Network or server error.");
-      placePopover(anchorEl);
+    if (!data.best) {
+      if (dictionaryTerm) dictionaryTerm.textContent = "No definition found";
+      if (dictionaryDefinitions) dictionaryDefinitions.innerHTML = "";
+      renderAlternatives([]);
+      highlightSpan(null);
+      return;
     }
+
+    renderCandidate(data.best);
+    renderAlternatives(data.alternatives || []);
+    highlightSpan({ start: Number(data.best.start), end: Number(data.best.end) });
+    await speakTerm(data.best.term);
   }
 
   function handleDocumentClick(event) {
@@ -182,6 +360,7 @@ export function createDictionaryController({
   return {
     clearView,
     setStatus,
+    prefetch,
     lookupAtIndex,
     handleDocumentClick,
     handleResize,
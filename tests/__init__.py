@@ -0,0 +1,20 @@
+"""Test package setup.
+
+Apps created by the tests would otherwise write per-process metrics files and
+audio stats journals under the repo's `instance/`. Point them at a scratch
+directory for the whole run; individual tests may still override them.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import shutil
+import tempfile
+
+
+_SCRATCH = tempfile.mkdtemp(prefix="canto-tests-")
+atexit.register(shutil.rmtree, _SCRATCH, ignore_errors=True)
+
+for _key, _name in (("METRICS_DIR", "metrics"), ("AUDIO_STATS_DIR", "audio_stats")):
+    os.environ.setdefault(_key, os.path.join(_SCRATCH, _name))
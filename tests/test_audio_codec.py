@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import unittest
+from unittest.mock import MagicMock
+
+from services.audio_codec import (
+    AudioMergeError,
+    build_ogg_opus,
+    merge_audio_chunks,
+    opus_packet_samples,
+    parse_ogg_pages,
+    write_ogg_page,
+)
+from services.tts_google import GoogleTTSWrapper
+
+# TOC 0xF8: CELT fullband, 20 ms, one frame -> 960 samples at 48 kHz.
+_FRAME_20MS = bytes([0xF8]) + b"\x00" * 40
+
+
+class OggOpusMergeTests(unittest.TestCase):
+    def test_packet_durations_from_toc(self):
+        self.assertEqual(opus_packet_samples(_FRAME_20MS), 960)
+        self.assertEqual(opus_packet_samples(bytes([0x01])), 960)  # SILK 10 ms, two frames
+        self.assertEqual(opus_packet_samples(bytes([0x03, 0x03])), 1440)  # SILK 10 ms, three frames
+        self.assertEqual(opus_packet_samples(bytes([0x78])), 960)  # Hybrid 20 ms
+
+    def test_merged_chunks_form_one_valid_stream(self):
+        first = build_ogg_opus([_FRAME_20MS] * 3, serial=11, pre_skip=312)
+        second = build_ogg_opus([_FRAME_20MS] * 2 + [b"\xf8" + b"\x01" * 600], serial=22, pre_skip=312)
+
+        merged = merge_audio_chunks([first, second], "ogg_opus")
+        pages = parse_ogg_pages(merged)
+
+        self.assertEqual({page.serial for page in pages}, {11})
+        self.assertEqual([page.sequence for page in pages], list(range(len(pages))))
+        self.assertEqual([bool(page.flags & 0x02) for page in pages], [True] + [False] * (len(pages) - 1))
+        self.assertEqual([bool(page.flags & 0x04) for page in pages], [False] * (len(pages) - 1) + [True])
+        self.assertEqual(sum(page.body.startswith(b"OpusHead") for page in pages), 1)
+        self.assertEqual(sum(page.body.startswith(b"OpusTags") for page in pages), 1)
+
+        audio_granules = [page.granule for page in pages[2:]]
+        self.assertEqual(audio_granules, sorted(audio_granules))
+        self.assertEqual(audio_granules[-1], 312 + 6 * 960)
+        # Checksums are recomputed: re-serializing every page reproduces the merged bytes.
+        self.assertEqual(b"".join(write_ogg_page(page) for page in pages), merged)
+
+    def test_mp3_and_single_chunks_are_joined_unchanged(self):
+        self.assertEqual(merge_audio_chunks([b"ID3a", b"ID3b"], "mp3"), b"ID3aID3b")
+        single = build_ogg_opus([_FRAME_20MS])
+        self.assertEqual(merge_audio_chunks([single], "ogg_opus"), single)
+
+    def test_rejects_non_ogg_chunks(self):
+        with self.assertRaises(AudioMergeError):
+            merge_audio_chunks([build_ogg_opus([_FRAME_20MS]), b"ID3 not ogg"], "ogg_opus")
+
+
+class TTSEncodingTests(unittest.TestCase):
+    def test_wrapper_requests_configured_encoding(self):
+        client = MagicMock()
+        client.synthesize_speech.return_value = MagicMock(audio_content=b"OggS", timepoints=[])
+        wrapper = GoogleTTSWrapper(audio_encoding="ogg_opus")
+        wrapper._client = client
+
+        wrapper.synthesize_ssml("<speak>hi</speak>", "yue-HK-Standard-A", 1.0)
+
+        request = client.synthesize_speech.call_args.kwargs["request"]
+        self.assertEqual(request["audio_config"].audio_encoding, GoogleTTSWrapper.AUDIO_ENCODINGS["ogg_opus"])
+        with self.assertRaises(ValueError):
+            GoogleTTSWrapper(audio_encoding="wav")
+
+
+if __name__ == "__main__":
+    unittest.main()
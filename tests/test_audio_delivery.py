@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from app import create_app
+from services.audio_store import AudioStore
+
+
+class AudioDeliveryTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.audio_dir = Path(self.tmp_dir.name) / "temp_audio"
+        os.environ["FLASK_ENV"] = "development"
+        os.environ["SECRET_KEY"] = "test-secret"
+        os.environ["TEMP_AUDIO_DIR"] = str(self.audio_dir)
+
+        self.app = create_app()
+        self.app.config["TESTING"] = True
+        self.client = self.app.test_client()
+        self.content = bytes(range(256)) * 40
+        self.stored = AudioStore(str(self.audio_dir)).save_audio(self.content)
+
+    def tearDown(self) -> None:
+        os.environ.pop("TEMP_AUDIO_DIR", None)
+        self.tmp_dir.cleanup()
+
+    def test_direct_mode_serves_ranges_and_conditionals(self):
+        full = self.client.get(self.stored.url)
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(full.data, self.content)
+        self.assertEqual(full.mimetype, "audio/mpeg")
+        self.assertEqual(full.headers["Accept-Ranges"], "bytes")
+        self.assertIn("immutable", full.headers["Cache-Control"])
+        self.assertIn("max-age=31536000", full.headers["Cache-Control"])
+
+        partial = self.client.get(self.stored.url, headers={"Range": "bytes=1000-1999"})
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.data, self.content[1000:2000])
+        self.assertEqual(partial.headers["Content-Range"], f"bytes 1000-1999/{len(self.content)}")
+
+        unchanged = self.client.get(self.stored.url, headers={"If-None-Match": full.headers["ETag"]})
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertEqual(unchanged.data, b"")
+
+    def test_proxy_modes_hand_off_the_file(self):
+        self.app.config["AUDIO_DELIVERY_MODE"] = "x-accel"
+        accel = self.client.get(self.stored.url)
+        self.assertEqual(accel.headers["X-Accel-Redirect"], f"/_audio_files/{self.stored.filename}")
+        self.assertEqual(accel.data, b"")
+        self.assertIn("immutable", accel.headers["Cache-Control"])
+
+        self.app.config["AUDIO_DELIVERY_MODE"] = "x-sendfile"
+        sendfile = self.client.get(self.stored.url)
+        self.assertEqual(sendfile.headers["X-Sendfile"], str((self.audio_dir / self.stored.filename).resolve()))
+        self.assertEqual(sendfile.data, b"")
+
+    def test_only_audio_names_are_served(self):
+        (self.audio_dir / "dict_legacy.mp3").write_bytes(b"old")
+        legacy = self.client.get("/audio/dict_legacy.mp3")
+        self.assertEqual(legacy.data, b"old")
+        self.assertIn("no-cache", legacy.headers["Cache-Control"])
+
+        for name in ("../app.py", "ab/..%2F..%2Fapp.py", "notes.txt", "00/" + "0" * 32 + ".mp3"):
+            self.assertEqual(self.client.get(f"/audio/{name}").status_code, 404, name)
+
+
+if __name__ == "__main__":
+    unittest.main()
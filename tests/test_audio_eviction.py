@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from unittest.mock import patch
+
+from app import create_app
+from services.audio_eviction import AudioStatsJournal, EvictionPolicy, GreedyDualSizePolicy, get_eviction_policy
+from services.audio_hot_cache import HotClipCache
+from services.audio_store import AudioStore
+
+
+class AudioEvictionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = Path(tempfile.mkdtemp(prefix="canto-eviction-"))
+        self.root = self.tmp / "audio"
+        self.stats_dir = str(self.tmp / "stats")
+
+    def tearDown(self) -> None:
+        AudioStore._indexes.pop(str(self.root.resolve()), None)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _age(self, filename: str, seconds: float) -> None:
+        stamp = time.time() - seconds
+        os.utime(self.root / filename, (stamp, stamp))
+
+    def test_policy_lookup(self):
+        self.assertIs(type(get_eviction_policy("lru")), EvictionPolicy)
+        self.assertIsInstance(get_eviction_policy("GDSF", credit_seconds=5), GreedyDualSizePolicy)
+        with self.assertRaises(ValueError):
+            get_eviction_policy("random")
+
+    def test_greedy_dual_size_keeps_popular_clip_over_large_one_off(self):
+        store = AudioStore(str(self.root), stats_dir=self.stats_dir)
+        clip = store.save_audio_with_key(b"d" * 2_000, cache_key="popular", cost=2)
+        for _ in range(50):
+            store.get_audio_by_key("popular")
+        document = store.save_audio(b"t" * 200_000, cost=500)
+        # The clip was last played well before the document was written.
+        self._age(clip.filename, 600)
+        store.rebuild_index()
+
+        # Plain LRU would drop the clip, since it is the older of the two.
+        result = store.cleanup(max_files=1, max_bytes=10**9, policy=GreedyDualSizePolicy())
+
+        self.assertEqual(result["deleted_files"], 1)
+        self.assertTrue((self.root / clip.filename).exists())
+        self.assertFalse((self.root / document.filename).exists())
+
+    def test_cost_aware_eviction_keeps_its_priority_heap_between_calls(self):
+        store = AudioStore(str(self.root), stats_dir=self.stats_dir)
+        for n in range(50):
+            store.save_audio(f"clip {n}".encode(), cost=1)
+        popular = store.save_audio_with_key(b"p" * 10, cache_key="popular", cost=5)
+        store.cleanup(max_files=100, max_bytes=10**9, policy=GreedyDualSizePolicy())
+
+        calls = []
+        original = GreedyDualSizePolicy.priority
+
+        def counting(policy, *args):
+            calls.append(args)
+            return original(policy, *args)
+
+        with patch.object(GreedyDualSizePolicy, "priority", counting):
+            store.get_audio_by_key("popular")
+            newest = store.save_audio(b"newest", cost=1)
+            result = store.cleanup(max_files=50, max_bytes=10**9, policy=GreedyDualSizePolicy())
+
+        # Only the touched and the new clip were re-ranked; the store was not re-scanned.
+        self.assertEqual(len(calls), 2)
+        self.assertEqual((result["deleted_files"], result["remaining_files"]), (2, 50))
+        self.assertTrue((self.root / popular.filename).exists())
+        self.assertTrue((self.root / newest.filename).exists())
+
+    def test_unknown_policy_is_rejected_at_startup(self):
+        with patch.dict(os.environ, {"FLASK_ENV": "development", "AUDIO_EVICTION_POLICY": "lfu"}):
+            with self.assertRaises(RuntimeError):
+                create_app()
+
+    def test_stats_are_shared_through_the_journal_and_compacted(self):
+        worker = AudioStore(str(self.root), stats_dir=self.stats_dir)
+        kept = worker.save_audio_with_key(b"a" * 100, cache_key="kept", cost=3)
+        gone = worker.save_audio_with_key(b"b" * 100, cache_key="gone", cost=4)
+        worker.get_audio_by_key("kept")
+        worker.get_audio_by_key("kept")
+        worker.get_audio_by_key("never")
+        (self.root / gone.filename).unlink()
+
+        # A fresh process (the janitor) only sees the directory and the journal.
+        AudioStore._indexes.pop(str(self.root.resolve()), None)
+        janitor_view = AudioStore(str(self.root), stats_dir=self.stats_dir)
+        janitor_view.compact_stats()
+
+        stats = janitor_view.cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+        self.assertAlmostEqual(stats["hit_ratio"], 2 / 3)
+
+        journal = AudioStatsJournal(self.stats_dir, self.root)
+        self.assertFalse(journal.journal_path.exists())
+        snapshot = json.loads(journal.snapshot_path.read_text(encoding="utf-8"))
+        self.assertEqual(snapshot["clips"], {kept.filename: [2, 3.0]})
+        self.assertFalse(any(self.root.glob(".*")))  # nothing listable next to the clips
+
+
+class HotClipCacheTests(unittest.TestCase):
+    def test_evicts_least_recently_used_clips_past_byte_budget(self):
+        cache = HotClipCache(max_bytes=10, max_clip_bytes=4)
+        cache.put("a", b"aaaa")
+        cache.put("b", b"bbbb")
+        self.assertIsNotNone(cache.get("a"))
+        cache.put("c", b"cccc")
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a").content, b"aaaa")
+        self.assertEqual(cache.total_bytes, 8)
+        self.assertIsNone(cache.put("big", b"x" * 5))
+        self.assertFalse(HotClipCache(max_bytes=0, max_clip_bytes=4).enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
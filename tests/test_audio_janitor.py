@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from app import create_app
+from unittest.mock import patch
+
+from services.audio_backends import FilesystemBackend
+from services.audio_eviction import AudioStatsJournal
+from services.audio_janitor import AudioJanitor
+from services.audio_policy import cleanup_audio_store
+from services.audio_store import AudioStore
+
+
+class AudioJanitorTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = Path(tempfile.mkdtemp(prefix="canto-audio-"))
+        os.environ["FLASK_ENV"] = "development"
+        os.environ["SECRET_KEY"] = "test-secret"
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _write_clips(self, count: int, age_seconds: float = 0.0, prefix: str = "tts") -> None:
+        now = time.time()
+        for idx in range(count):
+            path = self.root / f"{prefix}_{idx:04d}.mp3"
+            path.write_bytes(b"x" * 10)
+            stamp = now - age_seconds - (count - idx)
+            os.utime(path, (stamp, stamp))
+
+    def _janitor(self, **overrides) -> AudioJanitor:
+        options = {"root": self.root, "ttl_hours": 4, "max_files": 3, "max_bytes": 10_000}
+        options.update(overrides)
+        return AudioJanitor(**options)
+
+    def test_only_one_janitor_holds_the_lock(self):
+        first = self._janitor()
+        second = self._janitor()
+        try:
+            self.assertTrue(first.try_acquire())
+            self.assertFalse(second.try_acquire())
+            first.stop()
+            self.assertTrue(second.try_acquire())
+        finally:
+            first.stop()
+            second.stop()
+            first.lock_path.unlink(missing_ok=True)
+
+    def test_lock_file_stays_out_of_the_served_audio_directory(self):
+        stats_dir = self.root.parent / f"{self.root.name}-stats"
+        janitor = self._janitor(stats_dir=str(stats_dir))
+        try:
+            self.assertTrue(janitor.try_acquire())
+            self.assertEqual(janitor.lock_path.parent, stats_dir)
+            self.assertEqual(list(self.root.glob("*.lock")), [])
+        finally:
+            janitor.stop()
+            janitor.lock_path.unlink(missing_ok=True)
+            stats_dir.rmdir()
+
+    def test_run_once_sees_files_written_by_other_processes(self):
+        AudioStore(str(self.root)).rebuild_index()
+        self._write_clips(6)
+
+        result = self._janitor().run_once()
+
+        self.assertEqual(result["deleted_files"], 3)
+        self.assertEqual(sorted(p.name for p in self.root.glob("*.mp3")), ["tts_0003.mp3", "tts_0004.mp3", "tts_0005.mp3"])
+
+    def test_later_passes_follow_the_journal_instead_of_listing(self):
+        stats_dir = self.root.parent / f"{self.root.name}-stats"
+        self.addCleanup(shutil.rmtree, stats_dir, True)
+        janitor = self._janitor(stats_dir=str(stats_dir))
+        janitor.run_once()
+
+        # Another worker's save: the blob plus its journal line.
+        store = AudioStore(str(self.root), stats_dir=str(stats_dir))
+        other = self.root / "ab" / ("ab" + "0" * 30 + ".mp3")
+        other.parent.mkdir()
+        other.write_bytes(b"x" * 10)
+        AudioStatsJournal(stats_dir, store.backend.key).record_put("ab/" + other.name, 3)
+
+        with patch.object(FilesystemBackend, "list", side_effect=AssertionError("listed")):
+            result = janitor.run_once()
+        self.assertEqual(result["remaining_files"], 1)
+
+    def test_passes_delete_only_the_refs_of_evicted_clips(self):
+        janitor = self._janitor(max_files=1)
+        janitor.run_once()
+        store = AudioStore(str(self.root))
+        old = store.save_audio_with_key(b"old clip", cache_key="old")
+        old_path = self.root / old.filename
+        os.utime(old_path, (time.time() - 60, time.time() - 60))
+        store.save_audio_with_key(b"new clip", cache_key="new")
+
+        with patch.object(FilesystemBackend, "list", side_effect=AssertionError("listed")):
+            result = janitor.run_once()
+
+        self.assertEqual(result["deleted_files"], 1)
+        self.assertEqual(result["swept_refs"], 1)
+        self.assertIsNone(store.get_audio_by_key("old"))
+        self.assertIsNotNone(store.get_audio_by_key("new"))
+        self.assertEqual(len(list(self.root.rglob("*.ref"))), 1)
+
+    def test_requests_never_rescan_a_stale_index(self):
+        store = AudioStore(str(self.root))
+        stored = store.save_audio_with_key(b"clip", cache_key="term")
+        AudioStore._indexes[store.backend.key].built_at -= 24 * 3600
+
+        with patch.object(FilesystemBackend, "list", side_effect=AssertionError("listed")):
+            store.save_audio(b"other clip")
+            self.assertEqual(store.get_audio_by_key("term").filename, stored.filename)
+            self.assertFalse(store.over_capacity(max_files=10, max_bytes=10_000))
+
+        # The janitor thread of a worker that is not the leader re-syncs it instead.
+        follower = self._janitor()
+        self.assertFalse(store.index_is_current(600))
+        follower.sync_index()
+        self.assertTrue(store.index_is_current(600))
+
+    def test_resync_lists_without_holding_the_index_lock(self):
+        store = AudioStore(str(self.root))
+        store.rebuild_index()
+        index = AudioStore._indexes[store.backend.key]
+        self._write_clips(2)
+        listing = FilesystemBackend.list
+        saved = []
+
+        def list_while_saving(backend):
+            self.assertFalse(index.lock.locked())
+            # A request saving during the scan must survive the swap.
+            saved.append(store.save_audio(b"saved during the scan"))
+            yield from listing(backend)
+
+        with patch.object(FilesystemBackend, "list", list_while_saving):
+            store.rebuild_index()
+
+        self.assertEqual(len(index.entries), 3)
+        self.assertIn(saved[0].filename, index.entries)
+
+    def test_cleanup_keeps_clips_reused_since_they_were_indexed(self):
+        self._write_clips(2, age_seconds=10 * 3600)
+        store = AudioStore(str(self.root))
+        store.rebuild_index()
+        # Reused by another node after this index was built.
+        os.utime(self.root / "tts_0001.mp3")
+
+        result = store.cleanup(ttl_hours=4, max_files=10, max_bytes=10_000)
+
+        self.assertEqual((result["deleted_files"], result["remaining_files"]), (1, 1))
+        self.assertEqual([p.name for p in self.root.glob("*.mp3")], ["tts_0001.mp3"])
+
+    def test_request_path_only_cleans_past_emergency_cap(self):
+        app = create_app()
+        app.config.update(
+            TEMP_AUDIO_DIR=str(self.root),
+            MAX_TEMP_AUDIO_FILES=4,
+            MAX_TEMP_AUDIO_BYTES=10_000,
+            AUDIO_JANITOR_ENABLED=True,
+            AUDIO_EMERGENCY_CAP_FACTOR=1.5,
+        )
+        self._write_clips(6)
+        store = AudioStore(str(self.root))
+        store.rebuild_index()
+
+        cleanup_audio_store(app, store)
+        self.assertEqual(len(list(self.root.glob("*.mp3"))), 6)
+
+        self._write_clips(7)
+        store.rebuild_index()
+        cleanup_audio_store(app, store)
+        self.assertEqual(len(list(self.root.glob("*.mp3"))), 4)
+
+        app.config["AUDIO_JANITOR_ENABLED"] = False
+        self._write_clips(5)
+        store.rebuild_index()
+        cleanup_audio_store(app, store)
+        self.assertEqual(len(list(self.root.glob("*.mp3"))), 4)
+
+    def test_cleanup_audio_command(self):
+        app = create_app()
+        app.config.update(TEMP_AUDIO_DIR=str(self.root), TEMP_AUDIO_TTL_HOURS=1, MAX_TEMP_AUDIO_FILES=100)
+        self._write_clips(2, age_seconds=2 * 3600, prefix="old")
+        self._write_clips(1)
+
+        result = app.test_cli_runner().invoke(args=["cleanup-audio"])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Deleted 2 files", result.output)
+        self.assertEqual(len(list(self.root.glob("*.mp3"))), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
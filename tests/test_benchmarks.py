@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from benchmarks.runner import compare_reports, result_key, run_suite
+from benchmarks.synthetic import cantonese_passage, dictionary_terms, write_dictionary
+from services.dictionary_loader import DictionaryLoader
+
+
+class BenchmarkSuiteTests(unittest.TestCase):
+    def test_synthetic_inputs_are_deterministic(self):
+        self.assertEqual(cantonese_passage(4000, seed=3), cantonese_passage(4000, seed=3))
+        self.assertEqual(len(cantonese_passage(4000, seed=3)), 4000)
+        self.assertEqual(dictionary_terms(500, seed=1), dictionary_terms(500, seed=1))
+        self.assertEqual(len(set(dictionary_terms(500, seed=1))), 500)
+
+    def test_synthetic_dictionary_parses_every_term(self):
+        terms = dictionary_terms(300, seed=2)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_dictionary(Path(tmp) / "synthetic.u8", terms)
+            parsed = DictionaryLoader().load_file(path, source="synthetic")
+        self.assertEqual(set(parsed), set(terms))
+
+    def test_run_suite_report_is_json_and_comparable(self):
+        report = run_suite("quick", only=["serialize.dictionary_lookup"])
+        decoded = json.loads(json.dumps(report))
+
+        self.assertEqual(decoded["meta"]["scale"], "quick")
+        self.assertEqual(len(decoded["results"]), 1)
+        result = decoded["results"][0]
+        self.assertEqual(result["name"], "serialize.dictionary_lookup")
+        self.assertGreater(result["median_seconds"], 0)
+
+        rows = compare_reports(decoded, decoded)
+        self.assertEqual([row["key"] for row in rows], [result_key(result)])
+        self.assertAlmostEqual(rows[0]["ratio"], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
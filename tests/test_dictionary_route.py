@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import os
+import shutil
 import tempfile
+import threading
 import unittest
 from pathlib import Path
 from unittest.mock import patch
@@ -10,6 +12,14 @@ from werkzeug.security import generate_password_hash
 
 from app import create_app
 from models import User, db
+from services import dictionary_manager
+from services.audio_backends import AudioStorageError, FilesystemBackend
+from services.audio_hot_cache import HotClipCache
+from services.audio_policy import audio_stats_dir
+from services.audio_store import AudioStore
+from services.dictionary_compiled import compile_dictionary
+from services.dictionary_shards import build_shards
+from services.dictionary_loader import DictionaryLoader
 
 
 class FakeDictionaryTTS:
@@ -56,6 +66,7 @@ class DictionaryRouteTests(unittest.TestCase):
         os.environ["DICTIONARY_ENABLED"] = "true"
         os.environ["DICTIONARY_CC_CEDICT_PATH"] = str(self.cedict_path)
         os.environ["DICTIONARY_CC_CANTO_PATH"] = str(self.canto_path)
+        os.environ["DICTIONARY_BACKGROUND_LOAD"] = "false"
         os.environ["MAX_DICTIONARY_INPUT_CHARS"] = "120"
         os.environ["MAX_DICTIONARY_TERM_CHARS"] = "32"
         os.environ["TEMP_AUDIO_DIR"] = str(base / "temp_audio")
@@ -101,6 +112,28 @@ class DictionaryRouteTests(unittest.TestCase):
         self.assertIsNotNone(data["best"])
         self.assertEqual(data["best"]["term"], "廣東話")
 
+    def test_lookup_uses_compiled_dictionary_without_text_files(self):
+        compiled_path = Path(self.tmp_dir.name) / "dictionary.bin"
+        loader = DictionaryLoader()
+        compile_dictionary(
+            loader.merge(
+                loader.load_file(self.cedict_path, source="cc-cedict"),
+                loader.load_file(self.canto_path, source="cc-canto"),
+            ),
+            compiled_path,
+        )
+        self.cedict_path.unlink()
+        self.canto_path.unlink()
+        self.app.config["DICTIONARY_COMPILED_PATH"] = str(compiled_path)
+
+        with patch("services.dictionary_manager.DictionaryLoader", side_effect=AssertionError("text files parsed")):
+            response = self.client.post("/api/dictionary/lookup", json={"text": "你好廣東話", "index": 0})
+
+        self.assertEqual(response.status_code, 200)
+        best = response.get_json()["best"]
+        self.assertEqual((best["term"], best["source"], best["jyutping"]), ("你好", "cc-canto", "nei5 hou2"))
+        self.assertEqual(best["definitions"], ["hello (Cantonese)"])
+
     def test_lookup_out_of_range(self):
         response = self.client.post("/api/dictionary/lookup", json={"text": "你好", "index": 5})
         self.assertEqual(response.status_code, 400)
@@ -114,6 +147,214 @@ class DictionaryRouteTests(unittest.TestCase):
         response = self.client.post("/api/dictionary/lookup", json={"text": "你好", "index": 0})
         self.assertEqual(response.status_code, 503)
 
+    def test_lookup_answers_warming_while_the_dictionary_loads(self):
+        self.app.config["DICTIONARY_BACKGROUND_LOAD"] = True
+        release = threading.Event()
+        real_build = dictionary_manager.build_dictionary_service
+
+        def slow_build(sources, logger=None):
+            release.wait(5)
+            return real_build(sources, logger)
+
+        with patch("services.dictionary_manager.build_dictionary_service", side_effect=slow_build):
+            response = self.client.post("/api/dictionary/lookup", json={"text": "你好", "index": 0})
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.get_json()["code"], "dictionary_warming")
+            self.assertEqual(response.headers["Retry-After"], "1")
+            release.set()
+            self.app.extensions["dictionary"]["manager"].wait(5)
+
+        response = self.client.post("/api/dictionary/lookup", json={"text": "你好", "index": 0})
+        self.assertEqual(response.status_code, 200)
+
+    def test_background_load_starts_with_the_first_request_not_the_app(self):
+        with patch.dict(os.environ, {"DICTIONARY_BACKGROUND_LOAD": "true"}):
+            app = create_app()
+        app.config["TESTING"] = True
+        # `flask` CLI commands create the app too; none of them should parse the dictionary.
+        self.assertNotIn("dictionary", app.extensions)
+
+        self.assertEqual(app.test_client().get("/healthz").status_code, 200)
+        manager = app.extensions["dictionary"]["manager"]
+        self.addCleanup(manager.stop)
+        self.assertEqual(manager.wait(5).term_count, 2)
+
+    def test_term_endpoint_is_cacheable_per_dictionary_version(self):
+        response = self.client.get("/api/dictionary/term/你好")
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual([entry["source"] for entry in data["entries"]], ["cc-cedict", "cc-canto"])
+        self.assertEqual(data["entries"][1]["jyutping"], "nei5 hou2")
+        self.assertTrue(response.cache_control.no_cache)
+        etag = response.headers["ETag"]
+
+        versioned = self.client.get(f"/api/dictionary/term/你好?v={data['version']}")
+        self.assertEqual(versioned.cache_control.max_age, 365 * 24 * 3600)
+        self.assertIn("immutable", versioned.headers["Cache-Control"])
+        self.assertEqual(versioned.headers["ETag"], etag)
+        revalidated = self.client.get("/api/dictionary/term/你好", headers={"If-None-Match": etag})
+        self.assertEqual(revalidated.status_code, 304)
+
+        missing = self.client.get("/api/dictionary/term/沒有")
+        self.assertEqual(missing.get_json()["entries"], [])
+
+        # A rebuilt dictionary has a new version, so old ETags no longer match.
+        with self.canto_path.open("a", encoding="utf-8") as handle:
+            handle.write("沒有 没有 [mei2 you3] {mui4 jau5} /not have/\n")
+        self.app.extensions["dictionary"]["manager"].reload()
+        changed = self.client.get("/api/dictionary/term/你好", headers={"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.get_json()["version"], data["version"])
+        self.assertEqual(self.client.get("/api/dictionary/term/" + "你" * 33).status_code, 413)
+
+    def test_prefix_search_is_paginated_and_cacheable(self):
+        response = self.client.get("/api/dictionary/search", query_string={"q": "你", "limit": 1})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual((data["total"], data["offset"], data["next_offset"]), (1, 0, None))
+        self.assertEqual(data["results"], [{"term": "你好", "jyutping": "nei5 hou2", "definitions": ["hello", "hi"]}])
+        self.assertTrue(response.cache_control.no_cache)
+
+        versioned = self.client.get("/api/dictionary/search", query_string={"q": "你", "limit": 1, "v": data["version"]})
+        self.assertIn("immutable", versioned.headers["Cache-Control"])
+        revalidated = self.client.get(
+            "/api/dictionary/search", query_string={"q": "你", "limit": 1}, headers={"If-None-Match": response.headers["ETag"]}
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
+        self.assertEqual(self.client.get("/api/dictionary/search", query_string={"q": "廣"}).get_json()["total"], 1)
+        self.assertEqual(self.client.get("/api/dictionary/search").status_code, 400)
+        self.assertEqual(self.client.get("/api/dictionary/search", query_string={"q": "你", "limit": 51}).status_code, 400)
+        self.assertEqual(self.client.get("/api/dictionary/search", query_string={"q": "你" * 33}).status_code, 413)
+
+    def test_reverse_search_by_jyutping_and_english(self):
+        jyutping = self.client.get("/api/dictionary/search", query_string={"q": "nei hou", "mode": "jyutping"})
+        self.assertEqual(jyutping.status_code, 200)
+        data = jyutping.get_json()
+        self.assertEqual((data["mode"], data["total"]), ("jyutping", 1))
+        self.assertEqual(data["results"][0]["term"], "你好")
+
+        english = self.client.get("/api/dictionary/search", query_string={"q": "Cantonese", "mode": "english"}).get_json()
+        self.assertEqual([result["term"] for result in english["results"]], ["廣東話", "你好"])
+        # The mode is part of the cache key.
+        prefix = self.client.get("/api/dictionary/search", query_string={"q": "Cantonese"})
+        self.assertEqual(prefix.get_json()["total"], 0)
+        self.assertNotEqual(prefix.headers["ETag"], jyutping.headers["ETag"])
+        self.assertEqual(
+            self.client.get("/api/dictionary/search", query_string={"q": "hou", "mode": "pinyin"}).status_code, 400
+        )
+
+    def test_shards_are_served_immutable_and_the_manifest_revalidates(self):
+        shards_dir = Path(self.tmp_dir.name) / "shards"
+        loader = DictionaryLoader()
+        sources = dictionary_manager.dictionary_sources_from_config(self.app).content_hash()
+        manifest = build_shards(
+            loader.load_file(self.cedict_path, source="cc-cedict").items(), shards_dir, shard_count=4, sources=sources
+        )
+        self.app.config["DICTIONARY_SHARDS_DIR"] = str(shards_dir)
+
+        response = self.client.get("/api/dictionary/shards/manifest.json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["shards"], list(manifest.shards))
+        self.assertTrue(response.cache_control.no_cache)
+        response.close()
+
+        response = self.client.get(f"/api/dictionary/shards/{manifest.shards[0]}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.cache_control.max_age, 365 * 24 * 3600)
+        self.assertIn("immutable", response.headers["Cache-Control"])
+        response.close()
+
+        self.assertEqual(self.client.get("/api/dictionary/shards/..%2Fcc-cedict.u8").status_code, 404)
+        self.assertEqual(self.client.get("/api/dictionary/shards/shard-000.0000000000000000.json.gz").status_code, 404)
+
+    def test_manifest_of_other_sources_is_not_served(self):
+        shards_dir = Path(self.tmp_dir.name) / "shards"
+        entries = DictionaryLoader().load_file(self.cedict_path, source="cc-cedict")
+        manifest = build_shards(entries.items(), shards_dir, shard_count=4, sources="0" * 16)
+        self.app.config["DICTIONARY_SHARDS_DIR"] = str(shards_dir)
+
+        # The browser worker falls back to /segment; the shards themselves stay immutable.
+        self.assertEqual(self.client.get("/api/dictionary/shards/manifest.json").status_code, 404)
+        response = self.client.get(f"/api/dictionary/shards/{manifest.shards[0]}")
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_segment_resolves_every_index_like_lookup(self):
+        text = "你好，廣東話"
+        response = self.client.post("/api/dictionary/segment", json={"text": text})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data["length"], len(text))
+
+        def resolve(index):
+            for start, end, span_ids in data["runs"]:
+                if start <= index < end:
+                    candidates = []
+                    for span_id in span_ids:
+                        entry_id, span_start, span_end = data["spans"][span_id]
+                        candidates.append({**data["entries"][entry_id], "start": span_start, "end": span_end})
+                    return {"best": candidates[0], "alternatives": candidates[1:]}
+            return {"best": None, "alternatives": []}
+
+        for index in range(len(text)):
+            expected = self.client.post("/api/dictionary/lookup", json={"text": text, "index": index}).get_json()
+            self.assertEqual(resolve(index), expected, index)
+        # Only entries some tap can show are sent, and each only once.
+        self.assertEqual(sorted(entry["term"] for entry in data["entries"]), ["你好", "廣東話"])
+
+    def test_segment_rejects_over_limit(self):
+        response = self.client.post("/api/dictionary/segment", json={"text": "你" * 121})
+        self.assertEqual(response.status_code, 413)
+
+    def test_registered_document_is_looked_up_by_id(self):
+        text = "你好，廣東話"
+        registered = self.client.post("/api/dictionary/documents", json={"text": "\r\n" + text})
+        self.assertEqual(registered.status_code, 200)
+        document_id = registered.get_json()["document_id"]
+        self.assertEqual(registered.get_json()["length"], len(text))
+        self.assertTrue(registered.get_json()["registered"])
+
+        # Segmenting by id reuses the registered text; lookups then answer from that segmentation.
+        segmented = self.client.post("/api/dictionary/segment", json={"document_id": document_id}).get_json()
+        self.assertEqual(segmented["document_id"], document_id)
+        for index in range(len(text)):
+            by_id = self.client.post("/api/dictionary/lookup", json={"document_id": document_id, "index": index})
+            by_text = self.client.post("/api/dictionary/lookup", json={"text": text, "index": index})
+            self.assertEqual(by_id.get_json(), by_text.get_json(), index)
+
+        out_of_range = self.client.post("/api/dictionary/lookup", json={"document_id": document_id, "index": 99})
+        self.assertEqual(out_of_range.status_code, 400)
+
+    def test_unknown_or_foreign_document_id_asks_for_the_text(self):
+        document_id = self.client.post("/api/dictionary/documents", json={"text": "你好"}).get_json()["document_id"]
+        with self.app.app_context():
+            db.session.add(User(username="other", password_hash=generate_password_hash("otherpass123")))
+            db.session.commit()
+        other = self.app.test_client()
+        other.post("/login", data={"username": "other", "password": "otherpass123"})
+
+        for client, payload in (
+            (self.client, {"document_id": "0" * 32, "index": 0}),
+            (other, {"document_id": document_id, "index": 0}),
+        ):
+            response = client.post("/api/dictionary/lookup", json=payload)
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(response.get_json()["code"], "unknown_document")
+
+    @patch("routes_dictionary.GoogleTTSWrapper", FakeDictionaryTTS)
+    def test_speak_a_span_of_a_registered_document(self):
+        document_id = self.client.post("/api/dictionary/documents", json={"text": "我講廣東話"}).get_json()["document_id"]
+        voice = {"voice_name": "yue-HK-Standard-A", "voice_mode": "standard"}
+        by_id = self.client.post("/api/dictionary/speak", json={"document_id": document_id, "start": 2, "end": 5, **voice})
+        by_text = self.client.post("/api/dictionary/speak", json={"text": "廣東話", **voice})
+
+        self.assertEqual(by_id.status_code, 200)
+        self.assertEqual(by_text.get_json(), {"audio_url": by_id.get_json()["audio_url"], "cached": True})
+        bad_span = {"document_id": document_id, "start": 3, "end": 9, **voice}
+        self.assertEqual(self.client.post("/api/dictionary/speak", json=bad_span).status_code, 400)
+
     @patch("routes_dictionary.GoogleTTSWrapper", FakeDictionaryTTS)
     def test_speak_standard_uses_cache(self):
         payload = {"text": "你好", "voice_name": "yue-HK-Standard-A", "voice_mode": "standard"}
@@ -129,6 +370,78 @@ class DictionaryRouteTests(unittest.TestCase):
         self.assertEqual(first_data["audio_url"], second_data["audio_url"])
         self.assertEqual(FakeDictionaryTTS.standard_calls, 1)
 
+    @patch("routes_dictionary.GoogleTTSWrapper", FakeDictionaryTTS)
+    def test_speak_serves_small_clips_from_memory(self):
+        payload = {"text": "你好", "voice_name": "yue-HK-Standard-A", "voice_mode": "standard"}
+        first = self.client.post("/api/dictionary/speak", json=payload).get_json()
+        self.assertTrue(first["audio_url"].startswith("/api/dictionary/audio/"))
+
+        # Repeat taps and clip fetches never construct an AudioStore.
+        with patch("routes_dictionary.AudioStore", side_effect=AssertionError("filesystem touched")):
+            second = self.client.post("/api/dictionary/speak", json=payload).get_json()
+            clip = self.client.get(first["audio_url"])
+            revalidated = self.client.get(first["audio_url"], headers={"If-None-Match": clip.headers["ETag"]})
+
+        self.assertEqual(second, {"audio_url": first["audio_url"], "cached": True})
+        self.assertEqual(clip.status_code, 200)
+        self.assertEqual(clip.data, b"STD")
+        self.assertEqual(clip.mimetype, "audio/mpeg")
+        self.assertIn("max-age=31536000", clip.headers["Cache-Control"])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(FakeDictionaryTTS.standard_calls, 1)
+
+        # A worker with a cold memory tier reads the written-through clip from disk.
+        self.app.extensions.pop("dictionary_audio")
+        cold = self.client.get(first["audio_url"])
+        self.assertEqual(cold.data, b"STD")
+        self.assertEqual(cold.headers["ETag"], clip.headers["ETag"])
+        self.assertEqual(self.client.get("/api/dictionary/audio/" + "0" * 32).status_code, 404)
+
+    @patch("routes_dictionary.GoogleTTSWrapper", FakeDictionaryTTS)
+    def test_memory_tier_hits_refresh_the_store(self):
+        payload = {"text": "你好", "voice_name": "yue-HK-Standard-A", "voice_mode": "standard"}
+        cache_key = self.client.post("/api/dictionary/speak", json=payload).get_json()["audio_url"].rsplit("/", 1)[1]
+        with self.app.app_context():
+            store = AudioStore(self.app.config["TEMP_AUDIO_DIR"], stats_dir=audio_stats_dir(self.app))
+
+        with patch.object(HotClipCache, "REFRESH_INTERVAL_SECONDS", 0.0):
+            self.client.post("/api/dictionary/speak", json=payload)
+            store.compact_stats()
+            self.assertEqual(store.cache_stats()["hits"], 1)
+
+            # A clip evicted from the store while still hot is written back.
+            shutil.rmtree(self.app.config["TEMP_AUDIO_DIR"])
+            self.assertIsNone(store.get_audio_by_key(cache_key))
+            self.assertEqual(self.client.post("/api/dictionary/speak", json=payload).get_json()["cached"], True)
+
+        self.assertIsNotNone(store.get_audio_by_key(cache_key))
+        self.assertEqual(FakeDictionaryTTS.standard_calls, 1)
+
+    @patch("routes_dictionary.GoogleTTSWrapper", FakeDictionaryTTS)
+    def test_speak_keeps_store_url_for_large_clips(self):
+        self.app.config["DICTIONARY_AUDIO_HOT_CLIP_MAX_BYTES"] = 2
+        payload = {"text": "你好", "voice_name": "yue-HK-Standard-A", "voice_mode": "standard"}
+        data = self.client.post("/api/dictionary/speak", json=payload).get_json()
+        self.assertTrue(data["audio_url"].startswith("/audio/"))
+
+    @patch("routes_dictionary.GoogleTTSWrapper", FakeDictionaryTTS)
+    def test_speak_survives_a_failing_audio_store(self):
+        payload = {"text": "你好", "voice_name": "yue-HK-Standard-A", "voice_mode": "standard"}
+        failure = AudioStorageError("bucket unreachable")
+        with patch.object(FilesystemBackend, "write", side_effect=failure), patch.object(
+            FilesystemBackend, "read", side_effect=failure
+        ):
+            hot = self.client.post("/api/dictionary/speak", json=payload)
+            self.app.extensions.pop("dictionary_audio")
+            self.app.config["DICTIONARY_AUDIO_HOT_CLIP_MAX_BYTES"] = 2
+            uncached = self.client.post("/api/dictionary/speak", json=payload)
+
+        # A clip that fits the memory tier is still served; otherwise the failure is a 502.
+        self.assertEqual(hot.status_code, 200)
+        self.assertTrue(hot.get_json()["audio_url"].startswith("/api/dictionary/audio/"))
+        self.assertEqual(uncached.status_code, 502)
+        self.assertEqual(FakeDictionaryTTS.standard_calls, 2)
+
     @patch("routes_dictionary.GoogleTTSWrapper", FakeDictionaryTTS)
     def test_speak_high_quality_path(self):
         payload = {"text": "廣東話", "voice_name": "yue-HK-Chirp3-HD-Orus", "voice_mode": "high_quality"}
@@ -1,11 +1,28 @@
 from __future__ import annotations
 
+import gzip
+import json
+import os
 import tempfile
+import threading
+import time
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 
-from services.dictionary_loader import DictionaryLoader
+from services.dictionary_compact import CompactDictionary, dictionary_memory_report
+from services.dictionary_compiled import CompiledDictionary, CompiledDictionaryError, compile_dictionary, open_compiled
+from services.dictionary_loader import DictionaryEntry, DictionaryLoader
 from services.dictionary_lookup import DictionaryLookupService
+from services.dictionary_manager import (
+    DictionaryManager,
+    DictionarySources,
+    DictionaryWarmingError,
+    build_dictionary_service,
+)
+from services.dictionary_search import DictionaryPrefixIndex, DictionaryReverseIndex, build_search_indexes
+from services.dictionary_shards import MANIFEST_NAME, build_shards, shard_for
+from services.document_registry import DocumentRegistry, document_id_for
 
 
 class DictionaryServiceTests(unittest.TestCase):
@@ -61,6 +78,311 @@ class DictionaryServiceTests(unittest.TestCase):
         self.assertEqual(result.best.term, "廣東話")
         self.assertGreaterEqual(len(result.alternatives), 1)
 
+    def test_lookup_near_end_of_long_text_only_scans_covering_terms(self):
+        def entry(term: str) -> list[DictionaryEntry]:
+            return [DictionaryEntry(term=term, definitions=(term,), source="test")]
+
+        # 廣東話 is reachable even though its prefix 廣東 is not itself a term.
+        lookup = DictionaryLookupService({"廣東話": entry("廣東話"), "話": entry("話"), "東話": entry("東話")})
+        self.assertEqual(lookup.max_term_length, 3)
+        self.assertEqual(
+            [prefix in lookup.prefixes for prefix in ("廣", "廣東", "東", "廣東話", "話", "你")],
+            [True, True, True, False, False, False],
+        )
+
+        text = "你" * 20_000 + "講廣東話"
+        result = lookup.lookup_at(text, len(text) - 1)
+
+        self.assertEqual(result.best.term, "廣東話")
+        self.assertEqual(result.best.start, len(text) - 3)
+        self.assertEqual([candidate.term for candidate in result.alternatives], ["東話", "話"])
+        self.assertIsNone(lookup.lookup_at(text, 0).best)
+
+    def test_compiled_dictionary_matches_parsed_lookups(self):
+        entries = {
+            "廣東": [DictionaryEntry(term="廣東", definitions=("Guangdong",), source="cc-cedict")],
+            "廣東話": [
+                DictionaryEntry(term="廣東話", definitions=("Cantonese",), source="cc-cedict"),
+                DictionaryEntry(
+                    term="廣東話", definitions=("Cantonese (Canto)",), source="cc-canto", jyutping="gwong2 dung1 waa2"
+                ),
+            ],
+            "話": [DictionaryEntry(term="話", definitions=("speech", "words"), source="cc-cedict")],
+            "a": [DictionaryEntry(term="a", definitions=("latin",), source="cc-cedict")],
+        }
+        parsed = DictionaryLookupService(entries)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "dictionary.bin"
+            self.assertEqual(compile_dictionary(entries, path), 4)
+            compiled = CompiledDictionary(path)
+            try:
+                lookup = DictionaryLookupService.from_compiled(compiled)
+                self.assertEqual(compiled.get("廣東話"), entries["廣東話"])
+                self.assertIsNone(compiled.get("東"))
+                self.assertEqual(
+                    [prefix in lookup.prefixes for prefix in ("廣", "廣東", "廣東話", "話")], [True, True, False, False]
+                )
+                self.assertEqual(lookup.max_term_length, 3)
+
+                text = "我講廣東話a。"
+                for index in range(len(text)):
+                    self.assertEqual(lookup.lookup_at(text, index), parsed.lookup_at(text, index), index)
+                self.assertEqual(lookup.segment(text), parsed.segment(text))
+            finally:
+                compiled.close()
+
+            # A source edited after compiling makes the artifact stale.
+            source = Path(tmp) / "cc-cedict.u8"
+            source.write_text("", encoding="utf-8")
+            os.utime(path, ns=(1, 1))
+            with self.assertLogs("services.dictionary_compiled", level="WARNING") as logs:
+                self.assertIsNone(open_compiled(path, (source,)))
+            self.assertIn("older than", logs.output[0])
+            path.write_bytes(b"not a dictionary" * 8)
+            with self.assertRaises(CompiledDictionaryError):
+                CompiledDictionary(path)
+
+    def test_compact_dictionary_merges_sources_in_order_and_pools_strings(self):
+        cedict = {
+            "你好": [DictionaryEntry(term="你好", definitions=("hello", "hi"), source="cc-cedict")],
+            "好": [DictionaryEntry(term="好", definitions=("good",), source="cc-cedict")],
+        }
+        canto = {
+            "你好": [DictionaryEntry(term="你好", definitions=("hello",), source="cc-canto", jyutping="nei5 hou2")],
+            "好": [DictionaryEntry(term="好", definitions=("good",), source="cc-canto", jyutping="hou2")],
+        }
+        merged = DictionaryLoader().merge(cedict, canto)
+        compact = CompactDictionary.from_entries(cedict, canto)
+
+        self.assertEqual(len(compact), 2)
+        self.assertEqual({term: compact.get(term) for term in compact}, merged)
+        self.assertIsNone(compact.get("廣東話"))
+        self.assertEqual(compact._strings, ["", "hello", "hi", "good", "nei5 hou2", "hou2"])
+        with self.assertRaises(RuntimeError):
+            compact.extend(cedict["好"])
+
+        text = "你好好"
+        compact_lookup, parsed_lookup = DictionaryLookupService(compact), DictionaryLookupService(merged)
+        for index in range(len(text)):
+            self.assertEqual(compact_lookup.lookup_at(text, index), parsed_lookup.lookup_at(text, index))
+
+        report = dictionary_memory_report(compact)
+        self.assertEqual((report.terms, report.entries), (2, 4))
+        # The lookup service's prefix index is part of what a parsed dictionary costs.
+        with_prefixes = dictionary_memory_report(compact, prefix_bytes=compact_lookup.prefixes.memory_bytes)
+        self.assertEqual(with_prefixes.total_bytes, report.total_bytes + compact_lookup.prefixes.memory_bytes)
+        self.assertGreater(with_prefixes.to_dict()["prefix_bytes"], 0)
+
+        # At dictionary scale the flat columns cost well under half the per-entry objects.
+        large: dict[str, list[DictionaryEntry]] = {}
+        for n in range(2_000):
+            term = chr(0x4E00 + n) + chr(0x4E00 + n // 7)
+            large[term] = [
+                DictionaryEntry(term=term, definitions=(f"sense {n % 50}", f"gloss {n}"), source=source, jyutping=f"j{n % 6}")
+                for source in ("cc-cedict", "cc-canto")
+            ]
+        compact_bytes = dictionary_memory_report(CompactDictionary.from_entries(large)).bytes_per_term
+        self.assertLess(compact_bytes, dictionary_memory_report(large).bytes_per_term / 2)
+
+    def test_prefix_index_pages_through_matches_in_code_point_order(self):
+        entries: dict[str, list[DictionaryEntry]] = {}
+        for term in ("廣", "廣州", "廣東", "廣東話", "廣東人", "廣播", "東", "a", "ab", "b"):
+            entries[term] = [DictionaryEntry(term=term, definitions=(f"{term} def",), source="cc-cedict")]
+        entries["廣東話"].append(
+            DictionaryEntry(term="廣東話", definitions=("Cantonese",), source="cc-canto", jyutping="gwong2 dung1 waa2")
+        )
+        expected = sorted(term for term in entries if term.startswith("廣"))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "dictionary.bin"
+            compile_dictionary(entries, path)
+            compiled = CompiledDictionary(path)
+            try:
+                for index in (DictionaryPrefixIndex(entries), DictionaryPrefixIndex(compiled)):
+                    first = index.search("廣", limit=4)
+                    self.assertEqual(first.total, 6)
+                    self.assertEqual(first.next_offset, 4)
+                    rest = index.search("廣", limit=4, offset=first.next_offset)
+                    self.assertIsNone(rest.next_offset)
+                    self.assertEqual([match.term for match in first.matches + rest.matches], expected)
+
+                    match = index.search("廣東話").matches[0]
+                    self.assertEqual((match.jyutping, match.definitions), ("gwong2 dung1 waa2", ("廣東話 def",)))
+                    self.assertEqual([match.term for match in index.search("a").matches], ["a", "ab"])
+                    self.assertEqual(index.search("廣東x").total, 0)
+                    self.assertEqual(index.search("廣", limit=4, offset=10).matches, ())
+                    # Repeated prefixes come from the page cache.
+                    self.assertIs(index.search("廣", limit=4), first)
+            finally:
+                compiled.close()
+
+    def test_reverse_indexes_rank_jyutping_and_english_matches(self):
+        def entry(term: str, jyutping: str, *definitions: str) -> DictionaryEntry:
+            return DictionaryEntry(term=term, definitions=definitions, source="cc-canto", jyutping=jyutping)
+
+        entries = {
+            "好": [entry("好", "hou2", "good", "well; very")],
+            "好人": [entry("好人", "hou2 jan4", "good person")],
+            "你好": [entry("你好", "nei5 hou2", "hello"), entry("你好", "", "how are you")],
+            "號": [entry("號", "hou6", "number; day of the month")],
+            "人": [entry("人", "jan4", "person; people", "CL:個|个[ge4]")],
+            "好似": [entry("好似", "hou2 ci5", "to seem; to be like", "as if it were good")],
+        }
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "dictionary.bin"
+            compile_dictionary(entries, path)
+            compiled = CompiledDictionary(path)
+            try:
+                for indexes in (build_search_indexes(entries), build_search_indexes(compiled)):
+                    jyutping, english = indexes["jyutping"], indexes["english"]
+                    # The syllable alone first, then readings starting with it, shorter terms first.
+                    self.assertEqual([m.term for m in jyutping.search("hou2").matches], ["好", "好人", "好似", "你好"])
+                    # Without a tone the syllable matches every tone.
+                    self.assertEqual([m.term for m in jyutping.search("hou").matches], ["好", "號", "好人", "好似", "你好"])
+                    self.assertEqual(jyutping.search("hou3").total, 0)
+                    self.assertEqual([m.term for m in jyutping.search("Jan4 HOU").matches], ["好人"])
+
+                    # An exact definition first, then the first definition, then any other one.
+                    self.assertEqual([m.term for m in english.search("good").matches], ["好", "好人", "好似"])
+                    self.assertEqual([m.term for m in english.search("seem").matches], ["好似"])
+                    self.assertEqual([m.term for m in english.search("good person").matches], ["好人"])
+                    self.assertEqual(english.search("the to").total, 0)
+                    self.assertEqual(english.search("ge").total, 0)
+
+                    first = jyutping.search("hou", limit=2)
+                    self.assertEqual((first.total, first.next_offset), (5, 2))
+                    rest = jyutping.search("hou", limit=2, offset=4)
+                    self.assertEqual(([m.term for m in rest.matches], rest.next_offset), (["你好"], None))
+                    self.assertEqual(rest.matches[0].jyutping, "nei5 hou2")
+                    self.assertIs(jyutping.search("hou", limit=2), first)
+                    # Five toned syllables plus four toneless ones; each term posts both forms.
+                    self.assertEqual((len(jyutping), jyutping.posting_count), (9, 18))
+            finally:
+                compiled.close()
+
+        class UntokenizedIndex(DictionaryReverseIndex):
+            def query_tokens(self, query: str) -> list[str]:
+                return [query]
+
+        # An incomplete index fails when created, before it walks the dictionary.
+        with self.assertRaises(TypeError):
+            UntokenizedIndex(DictionaryPrefixIndex(entries))
+
+    def test_shards_group_terms_by_leading_character_under_content_hashed_names(self):
+        entries = {
+            "廣東": [DictionaryEntry(term="廣東", definitions=("Guangdong",), source="cc-cedict")],
+            "廣東話": [
+                DictionaryEntry(term="廣東話", definitions=("Cantonese",), source="cc-cedict"),
+                DictionaryEntry(term="廣東話", definitions=("Cantonese",), source="cc-canto", jyutping="gwong2 dung1 waa2"),
+            ],
+            "話": [DictionaryEntry(term="話", definitions=("speech",), source="cc-cedict")],
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / "shards"
+            manifest = build_shards(entries.items(), out, shard_count=8)
+            self.assertEqual((manifest.shard_count, manifest.max_term_length), (8, 3))
+            self.assertEqual(json.loads((out / MANIFEST_NAME).read_text(encoding="utf-8")), manifest.to_dict())
+
+            shard = json.loads(gzip.decompress((out / manifest.shards[shard_for("廣東", 8)]).read_bytes()))
+            self.assertEqual(
+                shard["terms"]["廣東話"],
+                [["cc-cedict", "", ["Cantonese"]], ["cc-canto", "gwong2 dung1 waa2", ["Cantonese"]]],
+            )
+            self.assertIn("廣東", shard["terms"])
+            self.assertNotIn("話", shard["terms"])
+
+            # Same data, same names; changed data renames only its shard and drops the old file.
+            self.assertEqual(build_shards(entries.items(), out, shard_count=8), manifest)
+            entries["話"][0] = DictionaryEntry(term="話", definitions=("words",), source="cc-cedict")
+            rebuilt = build_shards(entries.items(), out, shard_count=8)
+            changed = [index for index in range(8) if rebuilt.shards[index] != manifest.shards[index]]
+            self.assertEqual(changed, [shard_for("話", 8)])
+            self.assertNotEqual(rebuilt.version, manifest.version)
+            self.assertEqual(sorted(path.name for path in out.iterdir()), sorted([*rebuilt.shards, MANIFEST_NAME]))
+
+    def test_manager_warms_in_the_background_and_swaps_rebuilds_in(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cedict = Path(tmp) / "cc-cedict.u8"
+            canto = Path(tmp) / "cc-canto.u8"
+            cedict.write_text("你好 你好 [ni3 hao3] /hello/\n", encoding="utf-8")
+            canto.write_text("", encoding="utf-8")
+            manager = DictionaryManager(DictionarySources(cedict, canto), reload_interval_seconds=0)
+
+            release = threading.Event()
+
+            def slow_build(sources, logger=None):
+                release.wait(5)
+                return build_dictionary_service(sources, logger)
+
+            with patch("services.dictionary_manager.build_dictionary_service", side_effect=slow_build):
+                manager.load()
+                with self.assertRaises(DictionaryWarmingError):
+                    manager.current()
+                release.set()
+                first = manager.wait(5)
+            self.assertEqual((first.term_count, first.generation), (1, 1))
+            self.assertFalse(manager.check_for_changes())
+
+            # While the rebuild runs, the previous dictionary keeps answering.
+            release.clear()
+            cedict.write_text("你好 你好 [ni3 hao3] /hello/\n廣東 广东 [guang3 dong1] /Guangdong/\n", encoding="utf-8")
+            with patch("services.dictionary_manager.build_dictionary_service", side_effect=slow_build):
+                self.assertTrue(manager.check_for_changes())
+                self.assertIs(manager.current(), first)
+                release.set()
+                manager._builder.join(5)
+            second = manager.current()
+            self.assertEqual((second.term_count, second.generation), (2, 2))
+            self.assertEqual(second.service.lookup_at("廣東", 0).best.term, "廣東")
+
+            # A rebuild that fails keeps serving the last good dictionary.
+            cedict.unlink()
+            self.assertTrue(manager.check_for_changes())
+            manager._builder.join(5)
+            self.assertIs(manager.current(), second)
+            self.assertFalse(manager.check_for_changes())
+            manager.stop()
+
+    def test_manager_unmaps_a_swapped_out_compiled_dictionary(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cedict = Path(tmp) / "cc-cedict.u8"
+            canto = Path(tmp) / "cc-canto.u8"
+            compiled_path = Path(tmp) / "dictionary.bin"
+            cedict.write_text("", encoding="utf-8")
+            canto.write_text("", encoding="utf-8")
+            entry = DictionaryEntry(term="你好", definitions=("hello",), source="cc-canto", jyutping="nei5 hou2")
+            compile_dictionary({"你好": [entry]}, compiled_path)
+            manager = DictionaryManager(
+                DictionarySources(cedict, canto, compiled_path), reload_interval_seconds=0, background=False
+            )
+            first = manager.current()
+            first_map = first.service.entries_by_term._map
+
+            with patch.object(DictionaryManager, "RETIRE_GRACE_SECONDS", 0):
+                manager.reload()
+            second = manager.current()
+            self.assertTrue(first_map.closed)
+            self.assertEqual(second.service.lookup_at("你好", 0).best.term, "你好")
+            second.close()
+
+    def test_document_registry_caps_documents_per_user(self):
+        registry = DocumentRegistry(max_documents=2, ttl_seconds=60)
+        kept = registry.register(1, "你好")
+        for idx in range(5):
+            registry.register(2, f"第{idx}篇")
+
+        # Another user's burst only evicts that user's own oldest documents.
+        self.assertIs(registry.get(1, kept.document_id), kept)
+        self.assertEqual(len(registry), 3)
+        self.assertIsNone(registry.get(2, document_id_for("第0篇")))
+        self.assertIsNotNone(registry.get(2, document_id_for("第4篇")))
+
+        with patch("services.document_registry.time.monotonic", return_value=time.monotonic() + 120):
+            registry.register(3, "廣東話")
+        self.assertEqual(len(registry), 1)
+
     def test_lookup_handles_no_match(self):
         lookup = DictionaryLookupService(entries_by_term={})
         result = lookup.lookup_at("你好", 0)
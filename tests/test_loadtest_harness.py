@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import os
+import unittest
+
+from loadtest.client import Sample
+from loadtest.runner import percentile, summarize_samples
+from loadtest.stub_upstreams import StubSettings, start_stub_server
+from services.translation_grok import GrokTranslationService
+from services.tts_google import GoogleTTSWrapper
+
+
+class LoadTestHarnessTests(unittest.TestCase):
+    def setUp(self) -> None:
+        settings = StubSettings(tts_base_latency_ms=0, tts_per_char_latency_ms=0, translate_base_latency_ms=0)
+        self.server = start_stub_server(settings=settings)
+        self.stub_url = f"http://127.0.0.1:{self.server.server_port}"
+        self._previous_endpoint = os.environ.get("TTS_API_ENDPOINT")
+        os.environ["TTS_API_ENDPOINT"] = self.stub_url
+        GoogleTTSWrapper._voice_catalog_cache = None
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        if self._previous_endpoint is None:
+            os.environ.pop("TTS_API_ENDPOINT", None)
+        else:
+            os.environ["TTS_API_ENDPOINT"] = self._previous_endpoint
+        GoogleTTSWrapper._voice_catalog_cache = None
+
+    def test_tts_wrapper_uses_stub_endpoint_for_ssml_marks(self):
+        tts = GoogleTTSWrapper(timeout_seconds=5)
+        chunk = tts.synthesize_ssml('<speak><mark name="c_0"/>你<mark name="c_1"/>好</speak>', "yue-HK-Standard-A", 1.0)
+
+        self.assertTrue(chunk.audio_content.startswith(b"ID3"))
+        self.assertEqual([point["mark_name"] for point in chunk.timepoints], ["c_0", "c_1"])
+
+    def test_voice_catalog_and_high_quality_text_from_stub(self):
+        catalog = GoogleTTSWrapper.get_voice_catalog()
+        self.assertIn("yue-HK-Chirp3-HD-Orus", [voice["id"] for voice in catalog["high_quality"]])
+
+        chunk = GoogleTTSWrapper(timeout_seconds=5).synthesize_text("你好", "yue-HK-Chirp3-HD-Orus")
+        self.assertEqual(chunk.timepoints, [])
+        self.assertGreater(len(chunk.audio_content), 0)
+
+    def test_grok_stub_returns_translation(self):
+        service = GrokTranslationService(api_key="key", base_url=self.stub_url, timeout_seconds=5)
+        result = service.translate_to_english("你好")
+        self.assertIn("stub translation", result.translation)
+
+    def test_summary_percentiles(self):
+        samples = [Sample("lookup", 200, idx / 1000.0, 10) for idx in range(1, 101)]
+        samples.append(Sample("lookup", 502, 0.5, 10))
+        summary = summarize_samples(samples, duration=10.0)
+
+        self.assertEqual(percentile(sorted(s.seconds for s in samples[:100]), 50), 0.05)
+        self.assertEqual(summary["requests"], 101)
+        self.assertEqual(summary["errors"], 1)
+        self.assertAlmostEqual(summary["throughput_rps"], 10.1)
+        self.assertGreaterEqual(summary["p99_ms"], summary["p95_ms"])
+
+
+if __name__ == "__main__":
+    unittest.main()
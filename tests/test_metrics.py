@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from models import User, db
+from services.metrics import MetricsRegistry
+
+
+def _record_in_child(directory: str) -> None:
+    registry = _build_registry(directory)
+    registry.requests.inc(3, outcome="ok")
+    registry.latency.observe(0.2)
+    registry.flush()
+
+
+def _build_registry(directory: str | None) -> MetricsRegistry:
+    registry = MetricsRegistry()
+    registry.configure(directory, flush_seconds=60)
+    registry.requests = registry.counter("test_requests_total", "Requests.", ("outcome",))
+    registry.latency = registry.histogram("test_latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    registry.in_flight = registry.gauge("test_in_flight", "In flight.")
+    return registry
+
+
+class MetricsRegistryTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.mkdtemp(prefix="canto-metrics-")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_render_exposition_format(self):
+        registry = _build_registry(None)
+        registry.requests.inc(outcome="ok")
+        registry.requests.inc(2, outcome="error")
+        registry.latency.observe(0.05)
+        registry.latency.observe(0.5)
+        registry.latency.observe(3.0)
+
+        text = registry.render()
+
+        self.assertIn("# TYPE test_requests_total counter", text)
+        self.assertIn('test_requests_total{outcome="error"} 2', text)
+        self.assertIn('test_requests_total{outcome="ok"} 1', text)
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('test_latency_seconds_bucket{le="1"} 2', text)
+        self.assertIn('test_latency_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn("test_latency_seconds_count 3", text)
+
+    def test_counters_aggregate_across_processes_and_survive_worker_exit(self):
+        registry = _build_registry(self.tmpdir)
+        registry.requests.inc(outcome="ok")
+        registry.in_flight.inc()
+
+        child = multiprocessing.get_context("fork").Process(target=_record_in_child, args=(self.tmpdir,))
+        child.start()
+        child.join(timeout=30)
+        self.assertEqual(child.exitcode, 0)
+
+        text = registry.render()
+
+        self.assertIn('test_requests_total{outcome="ok"} 4', text)
+        self.assertIn("test_latency_seconds_count 1", text)
+        self.assertIn(f'test_in_flight{{pid="{os.getpid()}"}} 1', text)
+        # The exited worker was folded into the archive, so its counts stay but its snapshot is gone.
+        self.assertFalse((Path(self.tmpdir) / f"{child.pid}.json").exists())
+        self.assertTrue((Path(self.tmpdir) / "archive.json").exists())
+        self.assertIn('test_requests_total{outcome="ok"} 4', registry.render())
+
+
+class MetricsEndpointTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(self.db_fd)
+        self.metrics_dir = tempfile.mkdtemp(prefix="canto-metrics-")
+
+        os.environ["FLASK_ENV"] = "development"
+        os.environ["SECRET_KEY"] = "test-secret"
+        os.environ["DATABASE_PATH"] = self.db_path
+        self.previous_metrics_dir = os.environ.get("METRICS_DIR")
+        os.environ["METRICS_DIR"] = self.metrics_dir
+        os.environ["METRICS_TOKEN"] = "scrape-token"
+
+        self.app = create_app()
+        self.app.config["TESTING"] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.add(User(username="user", password_hash=generate_password_hash("userpass123"), is_admin=False))
+            db.session.commit()
+
+    def tearDown(self) -> None:
+        if self.previous_metrics_dir is None:
+            os.environ.pop("METRICS_DIR", None)
+        else:
+            os.environ["METRICS_DIR"] = self.previous_metrics_dir
+        os.environ.pop("METRICS_TOKEN", None)
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+        if os.path.exists(self.db_path):
+            os.unlink(self.db_path)
+        shutil.rmtree(self.metrics_dir, ignore_errors=True)
+
+    def test_requires_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        wrong = self.client.get("/metrics", headers={"Authorization": "Bearer nope"})
+        self.assertEqual(wrong.status_code, 401)
+
+    def test_exposes_subsystem_metrics(self):
+        self.client.post("/login", data={"username": "user", "password": "userpass123"}, follow_redirects=True)
+        self.client.post("/api/translate", json={"text": "你好"})
+
+        response = self.client.get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain"))
+        body = response.get_data(as_text=True)
+        for name in (
+            "canto_tts_upstream_calls_total",
+            "canto_tts_chunks_per_request",
+            "canto_tts_reduced_fallbacks_total",
+            "canto_tts_hq_split_retries_total",
+            "canto_audio_store_written_bytes_total",
+            "canto_audio_store_evicted_bytes_total",
+            "canto_dictionary_cache_total",
+            "canto_dictionary_lookup_seconds",
+            "canto_translation_seconds",
+        ):
+            self.assertIn(f"# TYPE {name}", body)
+        # GROK_API_KEY is unset in tests, so the translation fails fast as an error.
+        self.assertIn('canto_translation_requests_total{outcome="error"}', body)
+        self.assertIn(f'canto_http_in_flight_requests{{pid="{os.getpid()}"}} 1', body)
+
+    def test_disabled(self):
+        self.app.config["METRICS_ENABLED"] = False
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
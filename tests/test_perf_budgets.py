@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from benchmarks.budgets import BudgetFixtures, budget_cases, check_case, load_baselines, run_calibrated
+
+
+@unittest.skipUnless(os.getenv("PERF_BUDGETS") == "1", "perf budget tier; run with PERF_BUDGETS=1")
+class PerfBudgetTests(unittest.TestCase):
+    """Fails when a hot path gets slower, allocates more, or scales worse than its stored baseline."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.fixtures = BudgetFixtures(Path(cls.tmp_dir.name))
+        cls.cases = {case.name: case for case in budget_cases(cls.fixtures)}
+        cls.baselines = load_baselines()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp_dir.cleanup()
+
+    def _assert_within_budget(self, *names: str) -> None:
+        violations: list[str] = []
+        for name in names:
+            case = self.cases[name]
+            results, calibration = run_calibrated(case)
+            violations.extend(check_case(case, results, calibration, self.baselines))
+        self.assertEqual(violations, [], "\n".join(violations))
+
+    def test_chunking_budget(self):
+        self._assert_within_budget("chunking.build_token_chunks", "chunking.build_text_chunks")
+
+    def test_tokenization_budget(self):
+        self._assert_within_budget("tokenization.build_tokens")
+
+    def test_dictionary_lookup_budget(self):
+        self._assert_within_budget("dictionary.lookup_at_end")
+
+    def test_audio_cleanup_budget(self):
+        self._assert_within_budget("audio.cleanup_steady", "audio.cleanup_evict")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import gc
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from app import create_app
+from models import db
+from services import preload
+
+
+class PreloadTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        base = Path(self.tmp_dir.name)
+        (base / "cc-cedict.u8").write_text("你好 你好 [ni3 hao3] /hello/\n", encoding="utf-8")
+        (base / "cc-canto.u8").write_text("你好 你好 [nei5 hou2] {nei5 hou2} /hello/\n", encoding="utf-8")
+        env = {
+            "FLASK_ENV": "development",
+            "SECRET_KEY": "test-secret",
+            "DATABASE_PATH": str(base / "app.db"),
+            "TEMP_AUDIO_DIR": str(base / "temp_audio"),
+            "DICTIONARY_CC_CEDICT_PATH": str(base / "cc-cedict.u8"),
+            "DICTIONARY_CC_CANTO_PATH": str(base / "cc-canto.u8"),
+            "DICTIONARY_COMPILED_PATH": "",
+            "DICTIONARY_BACKGROUND_LOAD": "false",
+        }
+        previous = {key: os.environ.get(key) for key in env}
+        os.environ.update(env)
+        try:
+            self.app = create_app()
+        finally:
+            for key, value in previous.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+    def tearDown(self) -> None:
+        gc.unfreeze()
+        self.tmp_dir.cleanup()
+
+    @patch("services.preload.GoogleTTSWrapper.get_voice_catalog")
+    @patch("services.preload.SSMLBuilder.build_tokens")
+    def test_warm_up_builds_shared_state_and_freezes_it(self, build_tokens, get_voice_catalog):
+        timings = preload.warm_up(self.app)
+
+        self.assertEqual(set(timings), {"dictionary", "jyutping", "voice_catalog", "gc_freeze"})
+        loaded = self.app.extensions["dictionary"]["manager"].loaded
+        self.assertEqual(loaded.term_count, 1)
+        build_tokens.assert_called_once()
+        get_voice_catalog.assert_called_once()
+        self.assertGreater(gc.get_freeze_count(), 0)
+
+        # Workers reuse the preloaded service instead of loading their own.
+        self.assertIs(preload.load_dictionary_service(self.app), loaded.service)
+
+    @patch("services.preload.GoogleTTSWrapper.get_voice_catalog")
+    @patch("services.preload.SSMLBuilder.build_tokens")
+    def test_warm_up_tolerates_missing_dictionary(self, _build_tokens, _get_voice_catalog):
+        self.app.config["DICTIONARY_CC_CEDICT_PATH"] = str(Path(self.tmp_dir.name) / "missing.u8")
+
+        preload.warm_up(self.app)
+
+        self.assertIsNone(self.app.extensions["dictionary"]["manager"].loaded)
+
+    def test_after_fork_drops_inherited_connections_and_starts_the_janitor(self):
+        with self.app.app_context():
+            engine = db.engine
+        with patch.object(engine, "dispose") as dispose, patch("services.preload.ensure_audio_janitor") as janitor:
+            preload.after_fork(self.app)
+        dispose.assert_called_once_with(close=False)
+        janitor.assert_called_once_with(self.app)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from models import User, db
+from services.profiling import get_profiling_controller
+
+
+class ProfilingAdminTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(self.db_fd)
+        self.profile_dir = tempfile.mkdtemp(prefix="canto-profiles-")
+
+        os.environ["FLASK_ENV"] = "development"
+        os.environ["SECRET_KEY"] = "test-secret"
+        os.environ["DATABASE_PATH"] = self.db_path
+        os.environ["PROFILING_DIR"] = self.profile_dir
+        os.environ["PROFILING_POLL_SECONDS"] = "0"
+
+        self.app = create_app()
+        self.app.config["TESTING"] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.add_all(
+                [
+                    User(username="admin", password_hash=generate_password_hash("adminpass123"), is_admin=True),
+                    User(username="user", password_hash=generate_password_hash("userpass123"), is_admin=False),
+                ]
+            )
+            db.session.commit()
+
+    def tearDown(self) -> None:
+        os.environ.pop("PROFILING_DIR", None)
+        os.environ.pop("PROFILING_POLL_SECONDS", None)
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+        if os.path.exists(self.db_path):
+            os.unlink(self.db_path)
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+    def _login(self, username: str, password: str):
+        return self.client.post("/login", data={"username": username, "password": password}, follow_redirects=True)
+
+    def test_requires_admin(self):
+        self._login("user", "userpass123")
+        response = self.client.post("/admin/profiling/start", data={"endpoint": "healthz"})
+        self.assertEqual(response.status_code, 403)
+
+    def test_profiles_capped_requests_and_serves_downloads(self):
+        self._login("admin", "adminpass123")
+        started = self.client.post(
+            "/admin/profiling/start",
+            data={"endpoint": "healthz", "max_requests": "2", "duration_seconds": "60", "sample_rate": "1"},
+        )
+        self.assertEqual(started.status_code, 302)
+
+        self.client.get("/admin/dashboard")  # other endpoints are not profiled
+        for _ in range(3):
+            self.assertEqual(self.client.get("/healthz").status_code, 200)
+
+        controller = get_profiling_controller(self.app)
+        sessions = controller.list_sessions()
+        self.assertEqual(len(sessions), 1)
+        session = sessions[0]
+        self.assertEqual(session["profile_count"], 2)
+        self.assertEqual({entry["endpoint"] for entry in session["requests"]}, {"healthz"})
+        # Reaching the request budget ends the session for every worker.
+        self.assertIsNone(controller.active_session())
+
+        dashboard = self.client.get("/admin/dashboard").get_data(as_text=True)
+        self.assertIn(session["session_id"], dashboard)
+
+        report = self.client.get(f"/admin/profiling/{session['session_id']}/report.txt")
+        self.assertEqual(report.status_code, 200)
+        self.assertIn("2 request profile(s)", report.get_data(as_text=True))
+        self.assertIn("function calls", report.get_data(as_text=True))
+
+        download = self.client.get(f"/admin/profiling/{session['session_id']}/files/request-0000.prof")
+        self.assertEqual(download.status_code, 200)
+        self.assertGreater(len(download.data), 0)
+
+        escape = self.client.get(f"/admin/profiling/{session['session_id']}/files/..%2Fcontrol.json")
+        self.assertEqual(escape.status_code, 404)
+
+    def test_tracemalloc_report_written_when_session_stops(self):
+        self._login("admin", "adminpass123")
+        self.client.post(
+            "/admin/profiling/start",
+            data={"endpoint": "healthz", "max_requests": "50", "duration_seconds": "60", "trace_memory": "on"},
+        )
+        self.client.get("/healthz")
+        self.client.post("/admin/profiling/stop")
+        self.client.get("/healthz")  # next request notices the stop and writes the memory report
+
+        session_id = get_profiling_controller(self.app).list_sessions()[0]["session_id"]
+        report = Path(self.profile_dir) / session_id / f"memory-{os.getpid()}.txt"
+        self.assertTrue(report.exists())
+        self.assertIn("tracemalloc growth", report.read_text(encoding="utf-8"))
+        self.assertTrue((Path(self.profile_dir) / session_id / f"memory-{os.getpid()}.snapshot").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
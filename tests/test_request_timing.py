@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from models import User, db
+from services.request_timing import RequestTimer, timed_stage
+from services.tts_google import SynthesisChunk
+
+
+class FakeStore:
+    def __init__(self, *_args, **_kwargs):
+        pass
+
+    def cleanup(self, **_kwargs):
+        return {"remaining_files": 0, "remaining_bytes": 0, "deleted_files": 0}
+
+    def over_capacity(self, **_kwargs):
+        return False
+
+    def save_audio(self, _content, **_kwargs):
+        return type("Stored", (), {"url": "/static/temp_audio/fake.mp3"})()
+
+
+class FakeTTS:
+    def __init__(self, *_args, **_kwargs):
+        pass
+
+    def validate_voice(self, voice_name, _voice_mode):
+        return voice_name == "yue-HK-Standard-A"
+
+    def synthesize_ssml(self, ssml, _voice_name, _speaking_rate):
+        marks = re.findall(r'<mark name="([^"]+)"/>', ssml)
+        points = [{"mark_name": name, "seconds": 0.1 * (idx + 1)} for idx, name in enumerate(marks)]
+        return SynthesisChunk(audio_content=b"ID3fake", timepoints=points)
+
+
+class RequestTimerTests(unittest.TestCase):
+    def test_repeated_stages_accumulate_in_header(self):
+        timer = RequestTimer()
+        timer.add("tts_call", 0.010)
+        timer.add("tts_call", 0.015)
+        timer.add("audio_write", 0.002)
+
+        header = timer.server_timing(30.0)
+
+        self.assertIn('tts_call;dur=25.0;desc="2x"', header)
+        self.assertIn("audio_write;dur=2.0", header)
+        self.assertTrue(header.endswith("total;dur=30.0"))
+        self.assertEqual(timer.to_dict()["tts_call"]["count"], 2)
+
+    def test_timed_stage_is_noop_outside_request(self):
+        with timed_stage("anything"):
+            value = 1
+        self.assertEqual(value, 1)
+
+
+class RequestTimingRouteTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.db_fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(self.db_fd)
+
+        os.environ["FLASK_ENV"] = "development"
+        os.environ["SECRET_KEY"] = "test-secret"
+        os.environ["DATABASE_PATH"] = self.db_path
+
+        self.app = create_app()
+        self.app.config["TESTING"] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.add(User(username="user", password_hash=generate_password_hash("userpass123"), is_admin=False))
+            db.session.commit()
+
+        self.client.post("/login", data={"username": "user", "password": "userpass123"}, follow_redirects=True)
+
+    def tearDown(self) -> None:
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+        if os.path.exists(self.db_path):
+            os.unlink(self.db_path)
+
+    @patch("routes_tts.AudioStore", FakeStore)
+    @patch("routes_tts.GoogleTTSWrapper", FakeTTS)
+    def test_synthesize_reports_stage_spans(self):
+        response = self.client.post(
+            "/api/tts/synthesize",
+            json={"text": "你好。", "voice_name": "yue-HK-Standard-A", "speaking_rate": 1.0},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        header = response.headers["Server-Timing"]
+        stages = [part.split(";", 1)[0] for part in header.split(", ")]
+        for stage in (
+            "normalize",
+            "voice_check",
+            "jyutping",
+            "tokenize",
+            "chunk_plan",
+            "ssml_build",
+            "tts_call",
+            "audio_write",
+            "cap_check",
+            "log_usage",
+            "serialize",
+            "total",
+        ):
+            self.assertIn(stage, stages)
+        self.assertNotIn("tts_fallback", stages)
+        # Stages are disjoint spans: none is nested in (and so counted twice with) another.
+        durations = {
+            part.split(";", 1)[0]: float(part.split("dur=", 1)[1].split(";", 1)[0]) for part in header.split(", ")
+        }
+        total = durations.pop("total")
+        self.assertLessEqual(sum(durations.values()), total + 0.1 * len(durations))
+
+    @patch("routes_tts.AudioStore", FakeStore)
+    @patch("routes_tts.GoogleTTSWrapper", FakeTTS)
+    def test_slow_request_logs_payload_sizes(self):
+        self.app.config["SLOW_REQUEST_MS"] = 0.001
+
+        with self.assertLogs(self.app.logger, level="WARNING") as captured:
+            response = self.client.post(
+                "/api/tts/synthesize",
+                json={"text": "你好。", "voice_name": "yue-HK-Standard-A", "speaking_rate": 1.0},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        record = json.loads(captured.records[-1].getMessage())
+        self.assertEqual(record["event"], "request_timing")
+        self.assertTrue(record["slow"])
+        self.assertEqual(record["endpoint"], "tts.synthesize")
+        self.assertEqual(record["sizes"]["input_chars"], 3)
+        self.assertEqual(record["sizes"]["audio_bytes"], len(b"ID3fake"))
+        self.assertGreater(record["sizes"]["request_bytes"], 0)
+        self.assertGreater(record["sizes"]["response_bytes"], 0)
+        self.assertIn("tts_call", record["stages"])
+
+    def test_timing_can_be_disabled(self):
+        self.app.config["REQUEST_TIMING_ENABLED"] = False
+        response = self.client.get("/healthz")
+        self.assertNotIn("Server-Timing", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
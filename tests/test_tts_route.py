@@ -18,7 +18,10 @@ class FakeStore:
     def cleanup(self, **_kwargs):
         return {"remaining_files": 0, "remaining_bytes": 0, "deleted_files": 0}
 
-    def save_audio(self, _content):
+    def over_capacity(self, **_kwargs):
+        return False
+
+    def save_audio(self, _content, **_kwargs):
         return type("Stored", (), {"url": "/static/temp_audio/fake.mp3"})()
 
 
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import tempfile
 import unittest
+from unittest.mock import patch
 import os
 from pathlib import Path
 
@@ -238,6 +239,69 @@ class TTSServicesTests(unittest.TestCase):
             self.assertLessEqual(result["remaining_files"], 2)
             self.assertLessEqual(result["remaining_bytes"], 150)
 
+    def test_cleanup_evicts_oldest_from_index_without_rescanning(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = AudioStore(tmp)
+            kept = store.save_audio_with_key(b"a" * 100, cache_key="first")
+            evicted = store.save_audio_with_key(b"b" * 100, cache_key="second")
+            third = store.save_audio_with_key(b"c" * 100, cache_key="third")
+
+            old_time = 1000000000
+            for offset, stored in enumerate((kept, evicted, third)):
+                path = Path(tmp) / stored.filename
+                os.utime(path, (old_time + offset, old_time + offset))
+            store.rebuild_index()
+            # Reuse makes "first" the most recently used clip.
+            self.assertIsNotNone(store.get_audio_by_key("first"))
+
+            with patch("services.audio_backends.os.scandir") as scandir:
+                result = AudioStore(tmp).cleanup(ttl_hours=10**6, max_files=2, max_bytes=10**9)
+            scandir.assert_not_called()
+
+            self.assertEqual(result, {"remaining_files": 2, "remaining_bytes": 200, "deleted_files": 1})
+            self.assertFalse((Path(tmp) / evicted.filename).exists())
+            self.assertIsNone(AudioStore(tmp).get_audio_by_key("second"))
+            self.assertTrue((Path(tmp) / kept.filename).exists())
+
+    def test_missing_cached_audio_is_dropped_from_index(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = AudioStore(tmp)
+            stored = store.save_audio_with_key(b"x" * 50, cache_key="gone")
+            # Simulates another worker's cleanup deleting the clip.
+            (Path(tmp) / stored.filename).unlink()
+
+            self.assertIsNone(store.get_audio_by_key("gone"))
+            self.assertEqual(store.cleanup(ttl_hours=10**6, max_files=10, max_bytes=10**9)["remaining_files"], 0)
+
+    def test_identical_audio_is_stored_once_in_a_shard(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = AudioStore(tmp)
+            first = store.save_audio(b"same-bytes")
+            keyed = store.save_audio_with_key(b"same-bytes", cache_key="term")
+            other = store.save_audio(b"other-bytes")
+
+            self.assertEqual(first.filename, keyed.filename)
+            self.assertNotEqual(first.filename, other.filename)
+            shard, name = first.filename.split("/")
+            self.assertTrue(name.startswith(shard))
+            self.assertEqual(first.url, f"/audio/{first.filename}")
+            self.assertEqual(len(list(Path(tmp).glob("*/*.mp3"))), 2)
+            self.assertEqual(store.get_audio_by_key("term").filename, first.filename)
+
+            result = store.cleanup(ttl_hours=10**6, max_files=10, max_bytes=10**9)
+            self.assertEqual(result["remaining_files"], 2)
+
+    def test_sweep_removes_refs_to_evicted_blobs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = AudioStore(tmp)
+            stored = store.save_audio_with_key(b"x" * 10, cache_key="stale")
+            store.save_audio_with_key(b"y" * 10, cache_key="live")
+            (Path(tmp) / stored.filename).unlink()
+
+            self.assertEqual(store.sweep_refs(min_age_seconds=60), 0)  # too young to judge
+            self.assertEqual(store.sweep_refs(min_age_seconds=0), 1)
+            self.assertEqual(len(list(Path(tmp).glob("*/*.ref"))), 1)
+
     def test_high_quality_text_chunking_splits_long_sentence_without_punctuation(self):
         builder = SSMLBuilder()
         # No sentence-ending punctuation; this should still split into safe HQ chunks.